@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# Use uv run benchmarks/bench_hot_paths.py to run this script
+"""
+Micro-benchmarks for the hot paths of the TickTick MCP server.
+
+Seeds the fake TickTick API with a synthetic workspace (20 projects of 500
+tasks by default, a fifth of them with checklist items) and measures:
+
+- format/*: rendering tasks and projects with format_task, format_project
+  and render_items
+- make_request/*: AsyncTickTickClient._make_request, against an in-process
+  mock transport (client overhead only) and over loopback to the fake API,
+  and TickTickClient._make_request over loopback (sync_fake_api)
+- tool/*: full tool calls dispatched through FastMCP, with the server's
+  default cache settings
+
+Each benchmark reports throughput, p50/p95/p99 latency and the peak memory
+traced by tracemalloc during a separate pass. Results are written as JSON to
+benchmarks/results/ and can be compared with an earlier run with --compare.
+"""
+
+import gc
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from common import summarize, max_rss_mib, environment, use_fake_api, write_results, compare, print_table
+
+import httpx
+
+from ticktick_mcp.src.fake_api import FakeTickTickAPI
+from ticktick_mcp.src.formatting import format_task, format_project, render_items, DEFAULT_FIELDS
+
+COLUMNS = ["ops", "throughput", "p50_ms", "p95_ms", "p99_ms", "peak_kib"]
+
+def measure(operation, ops: int, memory_ops: int):
+    """Time ops calls of operation(i), then trace the memory of memory_ops more."""
+    gc.collect()
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for i in range(ops):
+        before = time.perf_counter()
+        if operation(i) is False:
+            errors += 1
+        latencies.append(time.perf_counter() - before)
+    summary = summarize(latencies, time.perf_counter() - started, errors)
+
+    tracemalloc.start()
+    for i in range(memory_ops):
+        operation(i)
+    summary["peak_kib"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    tracemalloc.stop()
+    return summary
+
+async def measure_async(operation, ops: int, memory_ops: int):
+    """Like measure, for a coroutine function, awaiting one call at a time."""
+    gc.collect()
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for i in range(ops):
+        before = time.perf_counter()
+        if await operation(i) is False:
+            errors += 1
+        latencies.append(time.perf_counter() - before)
+    summary = summarize(latencies, time.perf_counter() - started, errors)
+
+    tracemalloc.start()
+    for i in range(memory_ops):
+        await operation(i)
+    summary["peak_kib"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    tracemalloc.stop()
+    return summary
+
+def bench_formatting(tasks, projects, ops: int, memory_ops: int):
+    page = tasks[:100]
+    fields = DEFAULT_FIELDS["task"]
+    benchmarks = {
+        "format/format_task": lambda i: format_task(tasks[i % len(tasks)]),
+        "format/format_project": lambda i: format_project(projects[i % len(projects)]),
+    }
+    for output_format in ("text", "json", "tsv"):
+        benchmarks[f"format/render_items_100_{output_format}"] = (
+            lambda i, output_format=output_format: render_items(
+                "task", page, format_task, len(page), output_format=output_format, fields=fields))
+
+    results = {}
+    for name, operation in benchmarks.items():
+        count = len(tasks) if name == "format/format_task" else ops
+        results[name] = measure(operation, count, min(count, memory_ops))
+    return results
+
+async def bench_make_request(tasks, ops: int, memory_ops: int):
+    from ticktick_mcp.src.async_ticktick_client import AsyncTickTickClient
+
+    results = {}
+    sample = tasks[0]
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json=sample))
+    clients = {
+        "make_request/mock_transport": AsyncTickTickClient(http=httpx.AsyncClient(transport=transport)),
+        "make_request/fake_api": AsyncTickTickClient()
+    }
+    for name, client in clients.items():
+        async def operation(i, client=client):
+            task = tasks[i % len(tasks)]
+            response = await client._make_request("GET", f"/project/{task['projectId']}/task/{task['id']}")
+            return "error" not in response
+        try:
+            results[name] = await measure_async(operation, ops, memory_ops)
+        finally:
+            await client.close()
+            if not client._owns_http:
+                await client.http.aclose()
+    return results
+
+def bench_make_request_sync(tasks, ops: int, memory_ops: int):
+    from ticktick_mcp.src.ticktick_client import TickTickClient
+
+    client = TickTickClient()
+
+    def operation(i):
+        task = tasks[i % len(tasks)]
+        response = client._make_request("GET", f"/project/{task['projectId']}/task/{task['id']}")
+        return "error" not in response
+    try:
+        return {"make_request/sync_fake_api": measure(operation, ops, memory_ops)}
+    finally:
+        client.close()
+
+async def bench_tools(tasks, projects, ops: int, memory_ops: int):
+    from ticktick_mcp.src import server
+
+    if not await server.initialize_client():
+        raise RuntimeError("The server could not initialize its client")
+    rng = random.Random(0)
+    picks = [rng.choice(tasks) for _ in range(max(ops, memory_ops))]
+
+    async def call(name, arguments):
+        result = await server.mcp.call_tool(name, arguments)
+        text = result[1]["result"] if isinstance(result, tuple) else str(result)
+        return not text.startswith(("Error", "Failed", "Invalid"))
+
+    benchmarks = {
+        "tool/get_projects": lambda i: call("get_projects", {}),
+        "tool/get_project_tasks_100": lambda i: call(
+            "get_project_tasks", {"project_id": projects[i % len(projects)]["id"], "limit": 100}),
+        "tool/get_task": lambda i: call(
+            "get_task", {"project_id": picks[i]["projectId"], "task_id": picks[i]["id"]}),
+        "tool/get_task_json": lambda i: call(
+            "get_task", {"project_id": picks[i]["projectId"], "task_id": picks[i]["id"],
+                         "output_format": "json"}),
+        "tool/search_tasks": lambda i: call("search_tasks", {"query": "invoice", "output_format": "tsv"}),
+        "tool/find_tasks": lambda i: call("find_tasks", {"query": "invoce", "output_format": "tsv"}),
+        "tool/create_task": lambda i: call(
+            "create_task", {"title": f"Benchmark task {i}", "project_id": projects[i % len(projects)]["id"]}),
+    }
+
+    results = {}
+    try:
+        for name, operation in benchmarks.items():
+            # A search reads every project, so run fewer of them
+            count = max(1, ops // 10) if name == "tool/search_tasks" else ops
+            results[name] = await measure_async(operation, count, min(count, memory_ops))
+    finally:
+        await server.ticktick.close()
+    return results
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the TickTick MCP server's hot paths")
+    parser.add_argument("--projects", type=int, default=20, help="Number of projects (default: 20)")
+    parser.add_argument("--tasks-per-project", type=int, default=500,
+                        help="Number of tasks per project (default: 500)")
+    parser.add_argument("--checklist-rate", type=float, default=0.2,
+                        help="Fraction of tasks with checklist items (default: 0.2)")
+    parser.add_argument("--ops", type=int, default=2000,
+                        help="Operations per benchmark, besides format_task which renders every task "
+                             "(default: 2000)")
+    parser.add_argument("--tool-ops", type=int, default=200,
+                        help="Operations per tool and make_request benchmark (default: 200)")
+    parser.add_argument("--memory-ops", type=int, default=100,
+                        help="Operations in the tracemalloc pass of each benchmark (default: 100)")
+    parser.add_argument("--only", action="append",
+                        help="Only run benchmarks whose name contains this text (may be repeated)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic workspace")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/hot_paths-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown against --compare before failing (default: 0.2)")
+    args = parser.parse_args()
+    # Resolve paths before moving to the working directory
+    output = str(Path(args.output).resolve()) if args.output else None
+    baseline_path = Path(args.compare).resolve() if args.compare else None
+
+    logging.basicConfig(level=logging.WARNING)
+    # Measure the code rather than the client-side rate limiter
+    os.environ["TICKTICK_RATE_LIMIT"] = "0"
+
+    api = FakeTickTickAPI(seed=args.seed).start()
+    api.seed_workspace(args.projects, args.tasks_per_project, checklist_rate=args.checklist_rate)
+    projects = list(api.projects.values())
+    tasks = [task for project_tasks in api.tasks.values() for task in project_tasks.values()]
+    workdir = Path(tempfile.mkdtemp(prefix="ticktick-bench-"))
+    use_fake_api(api, workdir)
+    os.chdir(workdir)
+    print(f"Workspace: {len(projects)} projects, {len(tasks)} tasks "
+          f"({sum(1 for task in tasks if task.get('items'))} with checklist items)", file=sys.stderr)
+
+    def wanted(group):
+        return not args.only or any(text in group for text in args.only)
+
+    results = {}
+    try:
+        if wanted("format/"):
+            results.update(bench_formatting(tasks, projects, args.ops, args.memory_ops))
+        if wanted("make_request/"):
+            results.update(asyncio.run(bench_make_request(tasks, args.tool_ops, args.memory_ops)))
+            results.update(bench_make_request_sync(tasks, args.tool_ops, args.memory_ops))
+        if wanted("tool/"):
+            results.update(asyncio.run(bench_tools(tasks, projects, args.tool_ops, args.memory_ops)))
+    finally:
+        api.stop()
+    if args.only:
+        results = {name: result for name, result in results.items()
+                   if any(text in name for text in args.only)}
+
+    print_table(results, COLUMNS)
+    report = {
+        "suite": "hot_paths",
+        "environment": environment(),
+        "config": {"projects": args.projects, "tasks_per_project": args.tasks_per_project,
+                   "checklist_rate": args.checklist_rate, "ops": args.ops,
+                   "tool_ops": args.tool_ops, "seed": args.seed},
+        "max_rss_mib": max_rss_mib(),
+        "benchmarks": results
+    }
+    path = write_results("hot_paths", report, output)
+    print(f"\nPeak RSS: {report['max_rss_mib']} MiB. Results written to {path}")
+
+    if baseline_path:
+        baseline = json.loads(baseline_path.read_text())["benchmarks"]
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
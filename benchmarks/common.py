@@ -0,0 +1,170 @@
+"""
+Shared helpers for the benchmark scripts: latency summaries, pointing the
+server at the fake API, and machine-readable results that can be compared
+between versions.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import platform
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# Make the package importable when the scripts are run from a checkout
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> Dict[str, Any]:
+    """
+    Summarize per-operation latencies.
+
+    Args:
+        latencies: Seconds taken by each operation
+        elapsed: Wall-clock seconds for all operations
+        errors: Number of failed operations
+
+    Returns:
+        Operation and error counts, throughput in operations per second and
+        latency statistics in milliseconds
+    """
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "ops": count,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "throughput": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": round(sum(ordered) / count * 1000, 4) if count else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 4),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 4),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4) if count else 0.0
+    }
+
+def max_rss_mib() -> Optional[float]:
+    """Peak resident set size of this process in MiB, where available."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def environment() -> Dict[str, Any]:
+    """Describe the machine and code version the results were measured with."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    try:
+        from importlib.metadata import version
+        package_version = version("ticktick-mcp")
+    except Exception:
+        package_version = None
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "version": package_version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count()
+    }
+
+def use_fake_api(api, directory: Path) -> Dict[str, str]:
+    """
+    Point the TickTick clients at a running FakeTickTickAPI.
+
+    Sets the API environment variables and writes them to a .env file in
+    directory, which the server requires to start.
+
+    Returns:
+        The environment variables that were set
+    """
+    settings = {
+        "TICKTICK_BASE_URL": api.base_url,
+        "TICKTICK_TOKEN_URL": api.token_url,
+        "TICKTICK_ACCESS_TOKEN": api.access_token,
+        "TICKTICK_REFRESH_TOKEN": api.refresh_token,
+        "TICKTICK_CLIENT_ID": "benchmark",
+        "TICKTICK_CLIENT_SECRET": "benchmark"
+    }
+    os.environ.update(settings)
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / ".env").write_text("".join(f"{key}={value}\n" for key, value in settings.items()))
+    return settings
+
+def write_results(suite: str, results: Dict[str, Any], output: Optional[str] = None) -> Path:
+    """
+    Save results as JSON.
+
+    Args:
+        suite: Name of the benchmark suite
+        results: The results to save
+        output: File to write (default: benchmarks/results/<suite>-<commit or time>.json)
+
+    Returns:
+        The path written
+    """
+    if output:
+        path = Path(output)
+    else:
+        label = results.get("environment", {}).get("commit") or time.strftime("%Y%m%d-%H%M%S")
+        path = RESULTS_DIR / f"{suite}-{label}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2) + "\n")
+    return path
+
+def compare(current: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            tolerance: float) -> List[str]:
+    """
+    Compare benchmark summaries with a baseline run.
+
+    Args:
+        current: Summaries by benchmark name
+        baseline: Summaries by benchmark name from an earlier run
+        tolerance: Allowed slowdown as a fraction (0.2 allows 20%)
+
+    Returns:
+        A description of each benchmark whose p50 latency or throughput regressed
+    """
+    regressions = []
+    for name, result in current.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if before.get("p50_ms") and result["p50_ms"] > before["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {before['p50_ms']:.4f} ms -> {result['p50_ms']:.4f} ms")
+        if before.get("throughput") and result["throughput"] < before["throughput"] / (1 + tolerance):
+            regressions.append(f"{name}: throughput {before['throughput']:.1f}/s -> {result['throughput']:.1f}/s")
+    return regressions
+
+def print_table(rows: Dict[str, Dict[str, Any]], columns: List[str]) -> None:
+    """Print summaries as an aligned table, one row per benchmark."""
+    width = max([len("benchmark")] + [len(name) for name in rows])
+    print(f"{'benchmark':<{width}}  " + "  ".join(f"{column:>12}" for column in columns))
+    for name, row in rows.items():
+        cells = []
+        for column in columns:
+            value = row.get(column)
+            cells.append(f"{value:>12}" if value is not None else f"{'-':>12}")
+        print(f"{name:<{width}}  " + "  ".join(cells))
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# Use uv run benchmarks/load_test.py to run this script
+"""
+Load test for one TickTick MCP server process with many concurrent agents.
+
+Starts the fake TickTick API, launches `ticktick_mcp.cli run` against it on an
+HTTP transport, and runs --concurrency agents for --duration seconds. Each
+agent opens its own MCP session and calls tools back to back, picking each
+call from a weighted mix of read and write tools. Reports throughput, latency
+percentiles and error rates per tool, a per-second timeline and the server's
+RSS over time, and writes the results as JSON to benchmarks/results/.
+
+Runs entirely offline. Point --url at an already running server to skip
+launching one (its RSS is then not sampled).
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+import subprocess
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+from common import summarize, environment, use_fake_api, write_results, print_table
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamablehttp_client
+
+from ticktick_mcp.src.fake_api import FakeTickTickAPI
+
+# Default weights of each tool in the call mix
+DEFAULT_MIX = ("get_projects=1,get_project_tasks=3,get_task=4,search_tasks=1,"
+               "create_task=1,update_task=1,complete_task=1")
+WRITE_TOOLS = {"create_task", "update_task", "complete_task"}
+
+# Replies that report a failed call (rejections are counted separately)
+ERROR_PREFIXES = ("Error", "Failed", "Invalid", "Missing", "Unknown")
+REJECTED_PREFIX = "Server busy"
+
+COLUMNS = ["ops", "errors", "throughput", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse "tool=weight,..." into a weight per tool."""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.strip().partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return {name: weight for name, weight in weights.items() if weight > 0}
+
+class Workload:
+    """Builds tool arguments from a snapshot of the fake API's workspace."""
+
+    def __init__(self, api: FakeTickTickAPI, seed: int):
+        self.projects = list(api.projects)
+        self.tasks = [(task["projectId"], task["id"])
+                      for project_tasks in api.tasks.values() for task in project_tasks.values()]
+        self.random = random.Random(seed)
+
+    def arguments(self, tool: str, agent: int, sequence: int) -> Dict[str, Any]:
+        rng = self.random
+        if tool == "get_projects":
+            return {}
+        if tool == "get_project_tasks":
+            return {"project_id": rng.choice(self.projects), "limit": 100}
+        if tool == "search_tasks":
+            return {"query": rng.choice(("invoice", "report", "groceries", "meeting")),
+                    "output_format": "tsv"}
+        if tool == "create_task":
+            return {"title": f"Load test task {agent}-{sequence}", "project_id": rng.choice(self.projects)}
+        project_id, task_id = rng.choice(self.tasks)
+        if tool == "update_task":
+            return {"task_id": task_id, "project_id": project_id, "priority": rng.choice((0, 1, 3, 5))}
+        return {"project_id": project_id, "task_id": task_id}
+
+class Recorder:
+    """Collects call outcomes, overall, per tool and per second."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.rejected: Dict[str, int] = defaultdict(int)
+        self.error_samples: List[str] = []
+        self.timeline: Dict[int, Dict[str, int]] = defaultdict(lambda: {"ok": 0, "errors": 0, "rejected": 0})
+        self.started = time.perf_counter()
+
+    def record(self, tool: str, elapsed: float, outcome: str, detail: str = "") -> None:
+        self.latencies[tool].append(elapsed)
+        if outcome == "error":
+            self.errors[tool] += 1
+            if len(self.error_samples) < 10:
+                self.error_samples.append(f"{tool}: {detail[:200]}")
+        elif outcome == "rejected":
+            self.rejected[tool] += 1
+        self.timeline[int(time.perf_counter() - self.started)][
+            "errors" if outcome == "error" else outcome] += 1
+
+    def summary(self, elapsed: float) -> Dict[str, Dict[str, Any]]:
+        rows = {}
+        for tool in sorted(self.latencies):
+            rows[tool] = summarize(self.latencies[tool], elapsed, self.errors[tool])
+            rows[tool]["rejected"] = self.rejected[tool]
+        everything = [latency for latencies in self.latencies.values() for latency in latencies]
+        rows["all"] = summarize(everything, elapsed, sum(self.errors.values()))
+        rows["all"]["rejected"] = sum(self.rejected.values())
+        for row in rows.values():
+            row["error_rate"] = round(row["errors"] / row["ops"], 4) if row["ops"] else 0.0
+        return rows
+
+async def run_agent(agent: int, url: str, transport: str, mix: Dict[str, float],
+                    workload: Workload, recorder: Recorder, deadline: float) -> None:
+    """Open one MCP session and call tools until the deadline."""
+    client = streamablehttp_client(url) if transport == "streamable-http" else sse_client(url)
+    tools, weights = list(mix), list(mix.values())
+    async with client as streams:
+        async with ClientSession(streams[0], streams[1]) as session:
+            await session.initialize()
+            sequence = 0
+            while time.perf_counter() < deadline:
+                tool = workload.random.choices(tools, weights)[0]
+                arguments = workload.arguments(tool, agent, sequence)
+                sequence += 1
+                started = time.perf_counter()
+                try:
+                    result = await session.call_tool(tool, arguments)
+                    text = result.content[0].text if result.content else ""
+                    if result.isError or text.startswith(ERROR_PREFIXES):
+                        outcome = "error"
+                    elif text.startswith(REJECTED_PREFIX):
+                        outcome = "rejected"
+                    else:
+                        outcome = "ok"
+                except Exception as e:
+                    outcome, text = "error", repr(e)
+                recorder.record(tool, time.perf_counter() - started, outcome, text)
+
+def read_rss_mib(pid: int) -> Optional[float]:
+    """Current resident set size of a process in MiB."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        output = subprocess.run(["ps", "-o", "rss=", "-p", str(pid)], capture_output=True,
+                                text=True, timeout=5).stdout.strip()
+        return round(int(output) / 1024, 1) if output else None
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+async def sample_rss(pid: int, interval: float, samples: List[Dict[str, float]], started: float) -> None:
+    while True:
+        rss = read_rss_mib(pid)
+        if rss is not None:
+            samples.append({"t": round(time.perf_counter() - started, 1), "rss_mib": rss})
+        await asyncio.sleep(interval)
+
+async def wait_for_port(host: str, port: int, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"The server exited with status {process.returncode}")
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"The server did not listen on {host}:{port} within {timeout:g}s")
+
+def start_server(args, workdir: Path) -> subprocess.Popen:
+    """Launch `ticktick_mcp.cli run` in workdir, logging to server.log there."""
+    command = [sys.executable, "-m", "ticktick_mcp.cli", "run", "--transport", args.transport,
+               "--host", "127.0.0.1", "--port", str(args.port)]
+    if args.max_concurrency is not None:
+        command += ["--max-concurrency", str(args.max_concurrency)]
+    if args.max_queue is not None:
+        command += ["--max-queue", str(args.max_queue)]
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(Path(__file__).resolve().parent.parent),
+                                                       env.get("PYTHONPATH")]))
+    log = open(workdir / "server.log", "w")
+    return subprocess.Popen(command, cwd=workdir, env=env, stdin=subprocess.DEVNULL,
+                            stdout=log, stderr=subprocess.STDOUT)
+
+async def run(args) -> Dict[str, Any]:
+    mix = parse_mix(args.mix)
+    api = FakeTickTickAPI(latency=args.api_latency, latency_jitter=args.api_jitter,
+                          rate_limit_rate=args.api_429_rate, server_error_rate=args.api_5xx_rate,
+                          retry_after=args.api_retry_after, seed=args.seed).start()
+    api.seed_workspace(args.projects, args.tasks_per_project)
+    workload = Workload(api, args.seed)
+    workdir = Path(tempfile.mkdtemp(prefix="ticktick-load-"))
+    use_fake_api(api, workdir)
+
+    process = None
+    rss_samples: List[Dict[str, float]] = []
+    sampler = None
+    try:
+        if args.url:
+            url = args.url
+        else:
+            path = "/mcp" if args.transport == "streamable-http" else "/sse"
+            url = f"http://127.0.0.1:{args.port}{path}"
+            process = start_server(args, workdir)
+            await wait_for_port("127.0.0.1", args.port, process)
+            print(f"Server PID {process.pid} at {url} (log: {workdir / 'server.log'})", file=sys.stderr)
+
+        recorder = Recorder()
+        if process is not None:
+            sampler = asyncio.ensure_future(
+                sample_rss(process.pid, args.sample_interval, rss_samples, recorder.started))
+        deadline = time.perf_counter() + args.duration
+        print(f"Running {args.concurrency} agents for {args.duration:g}s...", file=sys.stderr)
+        agents = await asyncio.gather(
+            *(run_agent(agent, url, args.transport, mix, workload, recorder, deadline)
+              for agent in range(args.concurrency)),
+            return_exceptions=True)
+        elapsed = time.perf_counter() - recorder.started
+        failed_agents = [repr(result) for result in agents if isinstance(result, BaseException)]
+    finally:
+        if sampler is not None:
+            sampler.cancel()
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        api.stop()
+
+    summary = recorder.summary(elapsed)
+    reads = sum(row["ops"] for tool, row in summary.items() if tool != "all" and tool not in WRITE_TOOLS)
+    return {
+        "suite": "load",
+        "environment": environment(),
+        "config": {"transport": args.transport, "concurrency": args.concurrency,
+                   "duration": args.duration, "mix": mix, "projects": args.projects,
+                   "tasks_per_project": args.tasks_per_project, "api_latency": args.api_latency,
+                   "api_jitter": args.api_jitter, "api_429_rate": args.api_429_rate,
+                   "api_5xx_rate": args.api_5xx_rate, "max_concurrency": args.max_concurrency,
+                   "max_queue": args.max_queue, "seed": args.seed},
+        "elapsed_s": round(elapsed, 2),
+        "read_fraction": round(reads / summary["all"]["ops"], 3) if summary["all"]["ops"] else 0.0,
+        "failed_agents": failed_agents,
+        "error_samples": recorder.error_samples,
+        "tools": summary,
+        "timeline": [dict(second=second, **counts) for second, counts in sorted(recorder.timeline.items())],
+        "server_rss": rss_samples,
+        "fake_api": api.get_stats()["counters"]
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test a TickTick MCP server with concurrent agents")
+    parser.add_argument("--concurrency", type=int, default=16, help="Number of concurrent agents (default: 16)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run for (default: 30)")
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help=f"Weighted tool mix as tool=weight,... (default: {DEFAULT_MIX})")
+    parser.add_argument("--transport", choices=("streamable-http", "sse"), default="streamable-http",
+                        help="MCP transport to drive the server over (default: streamable-http)")
+    parser.add_argument("--port", type=int, default=8931, help="Port for the launched server (default: 8931)")
+    parser.add_argument("--url", help="MCP endpoint of an already running server, instead of launching one")
+    parser.add_argument("--max-concurrency", type=int, help="Passed to the launched server")
+    parser.add_argument("--max-queue", type=int, help="Passed to the launched server")
+    parser.add_argument("--projects", type=int, default=20, help="Projects in the fake workspace (default: 20)")
+    parser.add_argument("--tasks-per-project", type=int, default=500,
+                        help="Tasks per project in the fake workspace (default: 500)")
+    parser.add_argument("--api-latency", type=float, default=0.02,
+                        help="Seconds the fake API adds to each response (default: 0.02)")
+    parser.add_argument("--api-jitter", type=float, default=0.01,
+                        help="Further random seconds added to each response (default: 0.01)")
+    parser.add_argument("--api-429-rate", type=float, default=0.0, help="Fraction of API requests answered with 429")
+    parser.add_argument("--api-5xx-rate", type=float, default=0.0, help="Fraction of API requests answered with 5xx")
+    parser.add_argument("--api-retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--client-rate-limit", type=float, default=0.0,
+                        help="TICKTICK_RATE_LIMIT for the launched server (default: 0, no client-side limit)")
+    parser.add_argument("--sample-interval", type=float, default=1.0,
+                        help="Seconds between server RSS samples (default: 1)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the workspace, faults and call mix")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/load-<commit>.json)")
+    args = parser.parse_args()
+    output = str(Path(args.output).resolve()) if args.output else None
+
+    logging.basicConfig(level=logging.WARNING)
+    os.environ["TICKTICK_RATE_LIMIT"] = f"{args.client_rate_limit:g}"
+
+    results = asyncio.run(run(args))
+    print_table(results["tools"], COLUMNS + ["rejected", "error_rate"])
+    rss = [sample["rss_mib"] for sample in results["server_rss"]]
+    if rss:
+        print(f"\nServer RSS: start {rss[0]} MiB, peak {max(rss)} MiB, end {rss[-1]} MiB")
+    for sample in results["error_samples"]:
+        print(f"error: {sample}")
+    for failure in results["failed_agents"]:
+        print(f"agent failed: {failure}")
+    path = write_results("load", results, output)
+    print(f"Results written to {path}")
+    return 1 if results["failed_agents"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,9 +9,10 @@ setup(
     url="https://github.com/parkjs814/ticktick-mcp",
     packages=find_packages(),
     install_requires=[
-        "mcp[cli]>=1.2.0,<2.0.0",
+        "mcp[cli]>=1.9.2,<2.0.0",
         "python-dotenv>=1.0.0,<2.0.0",
         "requests>=2.30.0,<3.0.0",
+        "httpx>=0.27.0,<1.0.0",
     ],
     python_requires=">=3.10",
     entry_points={
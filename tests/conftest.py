@@ -0,0 +1,36 @@
+"""Shared fixtures for the server-level tests."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from ticktick_mcp.src import server
+from ticktick_mcp.src.cache import CachedTickTickClient
+
+class FailingClient:
+    """Stands in for the API client; every task write fails with a 503."""
+
+    async def update_task(self, task_id, project_id, **fields):
+        return {"error": "503 Service Unavailable", "status_code": 503}
+
+    async def delete_task(self, project_id, task_id):
+        return {"error": "503 Service Unavailable", "status_code": 503}
+
+@pytest.fixture
+def failing_server(monkeypatch):
+    """
+    The server wired to a FailingClient behind the cache, without a mirror or write queue.
+
+    Returns a namespace with the cached client and call(tool, *args, **kwargs),
+    which runs a tool's body to completion.
+    """
+    client = CachedTickTickClient(FailingClient(), maxsize=8)
+    monkeypatch.setattr(server, "ticktick", client)
+    monkeypatch.setattr(server, "mirror", None)
+    monkeypatch.setattr(server, "write_queue", None)
+
+    def call(tool, *args, **kwargs):
+        return asyncio.run(getattr(server, tool).__wrapped__(*args, **kwargs))
+
+    return SimpleNamespace(client=client, call=call)
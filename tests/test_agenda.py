@@ -0,0 +1,47 @@
+"""Tests for the due-date agenda index."""
+
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+from ticktick_mcp.src import server
+from ticktick_mcp.src.agenda import AgendaIndex, agenda_key
+
+def task(task_id, due, all_day=False, zone=None, status=0):
+    return {"id": task_id, "projectId": "p1", "title": task_id, "dueDate": due,
+            "isAllDay": all_day, "timeZone": zone, "status": status}
+
+def test_agenda_key():
+    assert agenda_key(task("a", "2026-03-01T09:00:00+0000"))[0] == "time"
+    # All-day tasks are stored as midnight in their own zone
+    day = agenda_key(task("b", "2026-02-28T23:00:00+0000", all_day=True, zone="Europe/Berlin"))
+    assert day == ("day", datetime(2026, 3, 1).toordinal())
+    assert agenda_key(task("c", "2026-03-01T09:00:00+0000", status=2)) is None
+    assert agenda_key({"id": "d"}) is None
+
+def test_query_by_range_and_zone():
+    index = AgendaIndex()
+    index.build([("p1", [task("early", "2026-03-01T07:00:00+0000"),
+                         task("late", "2026-03-02T07:00:00+0000"),
+                         task("day", "2026-02-28T23:00:00+0000", all_day=True, zone="Europe/Berlin")])])
+    zone = ZoneInfo("Europe/Berlin")
+    start = datetime(2026, 3, 1, tzinfo=zone)
+    end = datetime(2026, 3, 2, tzinfo=zone)
+    assert [item["id"] for _, item in index.query(start, end, zone)] == ["day", "early"]
+
+def test_upsert_moves_and_remove_drops():
+    index = AgendaIndex()
+    index.build([("p1", [task("a", "2026-03-01T07:00:00+0000")])])
+    index.upsert(task("a", "2026-04-01T07:00:00+0000"))
+    march = index.query(datetime(2026, 3, 1, tzinfo=timezone.utc), datetime(2026, 3, 31, tzinfo=timezone.utc))
+    assert march == []
+    index.remove("a")
+    assert len(index) == 0
+
+def test_failed_write_invalidates_agenda(failing_server):
+    index = server.agendas[failing_server.client] = AgendaIndex()
+    index.build([])
+    assert index.is_fresh()
+
+    result = failing_server.call("update_task", "a" * 24, "b" * 24, title="x")
+    assert result.startswith("Error updating task")
+    assert not index.is_fresh()
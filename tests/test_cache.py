@@ -0,0 +1,139 @@
+"""Tests for the read cache and the task writes it applies locally."""
+
+import asyncio
+
+from ticktick_mcp.src.cache import CachedTickTickClient
+
+PROJECT = "p1"
+
+class StubClient:
+    """In-memory stand-in for AsyncTickTickClient; fetches can be held open."""
+
+    def __init__(self):
+        self.tasks = {"t1": {"id": "t1", "projectId": PROJECT, "title": "One"},
+                      "t2": {"id": "t2", "projectId": PROJECT, "title": "Two"}}
+        self.fetches = 0
+        # Events that the next fetches wait for before answering, in order
+        self.holds = []
+
+    async def get_project_with_data(self, project_id):
+        self.fetches += 1
+        snapshot = {"project": {"id": project_id}, "tasks": [dict(task) for task in self.tasks.values()]}
+        if self.holds:
+            await self.holds.pop(0).wait()
+        return snapshot
+
+    async def get_task(self, project_id, task_id):
+        return dict(self.tasks[task_id])
+
+    async def update_task(self, task_id, project_id, title=None, **kwargs):
+        if task_id not in self.tasks:
+            return {"error": "404 Not Found"}
+        self.tasks[task_id]["title"] = title
+        return dict(self.tasks[task_id])
+
+    async def delete_task(self, project_id, task_id):
+        self.tasks.pop(task_id, None)
+        return {}
+
+def make_client(ttl=60.0):
+    stub = StubClient()
+    return stub, CachedTickTickClient(stub, maxsize=16, ttls={"get_project_with_data": ttl})
+
+def titles(data):
+    return [task["title"] for task in data["tasks"]]
+
+def test_writes_are_applied_to_cached_project_data():
+    async def scenario():
+        stub, client = make_client()
+        await client.get_project_with_data(PROJECT)
+        await client.update_task("t1", PROJECT, title="Renamed")
+        await client.delete_task(PROJECT, "t2")
+        data = await client.get_project_with_data(PROJECT)
+        return stub, client, data
+
+    stub, client, data = asyncio.run(scenario())
+    assert titles(data) == ["Renamed"]
+    assert stub.fetches == 1
+    assert client.get_cache_stats()["patches"] == 2
+
+def test_patched_task_keeps_its_fetch_time():
+    async def scenario():
+        stub, client = make_client()
+        client.ttls["get_task"] = 60.0
+        await client.get_task(PROJECT, "t1")
+        await asyncio.sleep(0.05)
+        await client.update_task("t1", PROJECT, title="Renamed")
+        await client.update_task("t2", PROJECT, title="Also renamed")
+        return client, await client.get_task(PROJECT, "t1")
+
+    client, task = asyncio.run(scenario())
+    assert task["title"] == "Renamed"
+    assert client.age("get_task", PROJECT, "t1") >= 0.05
+    # A task that was never read is not cached by the write
+    assert client.age("get_task", PROJECT, "t2") is None
+
+def test_failed_write_invalidates_project():
+    async def scenario():
+        stub, client = make_client()
+        await client.get_project_with_data(PROJECT)
+        await client.update_task("missing", PROJECT, title="x")
+        await client.get_project_with_data(PROJECT)
+        return stub
+
+    assert asyncio.run(scenario()).fetches == 2
+
+def test_mismatch_counted_on_next_sync():
+    async def scenario():
+        stub, client = make_client(ttl=0.05)
+        await client.get_project_with_data(PROJECT)
+        await client.update_task("t1", PROJECT, title="Renamed")
+        stub.tasks["t1"]["title"] = "Changed elsewhere"
+        await asyncio.sleep(0.1)
+        await client.get_project_with_data(PROJECT)
+        return client.get_cache_stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["mismatches"] == 1
+    assert stats["recent_mismatches"][0]["fields"] == ["title"]
+
+def test_write_during_fetch_is_not_overwritten_by_stale_answer():
+    async def scenario():
+        stub, client = make_client()
+        hold = asyncio.Event()
+        stub.holds = [hold]
+        read = asyncio.create_task(client.get_project_with_data(PROJECT))
+        await asyncio.sleep(0)
+        await client.update_task("t1", PROJECT, title="Renamed")
+        hold.set()
+        stale = await read
+        fresh = await client.get_project_with_data(PROJECT)
+        return stub, stale, fresh
+
+    stub, stale, fresh = asyncio.run(scenario())
+    assert titles(stale) == ["One", "Two"]
+    assert titles(fresh) == ["Renamed", "Two"]
+    assert stub.fetches == 2
+
+def test_patch_during_sync_is_not_a_mismatch():
+    async def scenario():
+        stub, client = make_client(ttl=0.05)
+        await client.get_project_with_data(PROJECT)
+        await asyncio.sleep(0.1)
+        # Two reads miss at once; the first answer is cached and patched
+        # before the second, older answer arrives
+        first_hold, second_hold = asyncio.Event(), asyncio.Event()
+        stub.holds = [first_hold, second_hold]
+        first = asyncio.create_task(client.get_project_with_data(PROJECT))
+        second = asyncio.create_task(client.get_project_with_data(PROJECT))
+        await asyncio.sleep(0)
+        first_hold.set()
+        await first
+        await client.update_task("t1", PROJECT, title="Renamed")
+        second_hold.set()
+        await second
+        return client.get_cache_stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["mismatches"] == 0
+    assert stats["unverified_patches"] == 1
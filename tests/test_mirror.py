@@ -0,0 +1,64 @@
+"""Tests for the local SQLite mirror."""
+
+import asyncio
+import time
+
+import pytest
+
+from ticktick_mcp.src.cache import CachedTickTickClient
+from ticktick_mcp.src.mirror import TaskMirror
+
+PROJECTS = [{"id": "p1", "name": "Work"}, {"id": "p2", "name": "Home"}]
+
+class StubClient:
+    def __init__(self):
+        self.data = {
+            "p1": {"project": PROJECTS[0], "tasks": [{"id": "t1", "projectId": "p1", "title": "One"}]},
+            "p2": {"project": PROJECTS[1], "tasks": []},
+        }
+        self.calls = []
+
+    async def get_projects(self):
+        self.calls.append("get_projects")
+        return list(PROJECTS)
+
+    async def get_project_with_data(self, project_id):
+        self.calls.append(project_id)
+        return self.data[project_id]
+
+@pytest.fixture
+def mirror(tmp_path):
+    mirror = TaskMirror(str(tmp_path / "mirror.db"), max_age=60)
+    yield mirror
+    mirror.close()
+
+def test_data_expires_by_fetch_time(mirror):
+    data = {"project": PROJECTS[0], "tasks": []}
+    mirror.store_project_data("p1", data, fetched_at=time.time() - 90)
+    assert mirror.get_project_data("p1") is None
+    mirror.store_project_data("p1", data, fetched_at=time.time() - 30)
+    assert mirror.get_project_data("p1") is not None
+    assert 29 < mirror.age("p1") < 32
+
+def test_invalidate_marks_project_stale(mirror):
+    mirror.store_project_data("p1", {"project": PROJECTS[0], "tasks": []})
+    mirror.invalidate("p1")
+    assert mirror.get_project_data("p1") is None
+    assert mirror.age("p1") is None
+
+def test_sync_fetches_only_stale_projects(mirror):
+    stub = StubClient()
+    mirror.store_project_data("p2", stub.data["p2"])
+    summary = asyncio.run(mirror.sync(stub))
+    assert summary["projects_synced"] == 1 and summary["added"] == 1
+    assert stub.calls == ["get_projects", "p1"]
+    assert mirror.get_task("p1", "t1")["title"] == "One"
+
+def test_cache_reports_age_of_cached_answer():
+    async def scenario():
+        client = CachedTickTickClient(StubClient(), maxsize=8, ttls={"get_project_with_data": 15})
+        assert client.age("get_project_with_data", "p1") is None
+        await client.get_project_with_data("p1")
+        return client.age("get_project_with_data", "p1")
+
+    assert 0 <= asyncio.run(scenario()) < 1
@@ -0,0 +1,87 @@
+"""Tests for project and column name resolution."""
+
+import asyncio
+
+import pytest
+
+from ticktick_mcp.src import server
+from ticktick_mcp.src.cache import CachedTickTickClient
+from ticktick_mcp.src.names import NameIndex, fold_name, looks_like_id
+
+WORK_ID = "a" * 24
+
+PROJECTS = [{"id": WORK_ID, "name": "Éclair Plans"},
+            {"id": "b" * 24, "name": "Home"},
+            {"id": "c" * 24, "name": "home"},
+            {"id": "d" * 24, "name": "Inbox"}]
+
+class StubClient:
+    def __init__(self):
+        self.project_fetches = 0
+
+    async def get_projects(self):
+        self.project_fetches += 1
+        return [dict(project) for project in PROJECTS]
+
+@pytest.fixture
+def client(monkeypatch):
+    stub = StubClient()
+    monkeypatch.setattr(server, "ticktick", CachedTickTickClient(stub, maxsize=0))
+    monkeypatch.setattr(server, "mirror", None)
+    return stub
+
+def test_fold_name():
+    assert fold_name("  Éclair   PLANS ") == "eclair plans"
+
+def test_looks_like_id():
+    assert looks_like_id(WORK_ID)
+    assert looks_like_id("inbox123")
+    assert not looks_like_id("inbox")
+    assert not looks_like_id("Work")
+
+def test_index_lookups():
+    index = NameIndex()
+    index.set_projects(PROJECTS)
+    assert index.project_id("eclair plans") == WORK_ID
+    assert index.project_id(WORK_ID) == WORK_ID
+    assert index.project_id("Nope") is None
+    with pytest.raises(ValueError, match="ambiguous"):
+        index.project_id("HOME")
+    assert "Did you mean 'Éclair Plans'" in index.unknown_project("Eclair Plan")
+
+def test_column_lookup():
+    index = NameIndex()
+    index.set_columns(WORK_ID, [{"id": "col1", "name": "In Progress"}])
+    assert index.column_id(WORK_ID, "in progress") == "col1"
+    assert index.column_id(WORK_ID, "Done") is None
+
+def test_id_reference_does_not_load_names(client):
+    assert asyncio.run(server.resolve_project_id(WORK_ID)) == WORK_ID
+    assert asyncio.run(server.resolve_project_id("inbox42")) == "inbox42"
+    assert client.project_fetches == 0
+
+def test_project_named_inbox_is_resolved_by_name(client):
+    assert asyncio.run(server.resolve_project_id("Inbox")) == "d" * 24
+    assert asyncio.run(server.resolve_project_id("inbox")) == "d" * 24
+
+def test_name_reference_loads_names_once(client):
+    async def scenario():
+        first = await server.resolve_project_id("eclair plans")
+        second = await server.resolve_project_id("ÉCLAIR PLANS")
+        return first, second
+
+    assert asyncio.run(scenario()) == (WORK_ID, WORK_ID)
+    assert client.project_fetches == 1
+
+def test_unknown_name_is_refreshed_once_before_failing(client):
+    async def scenario():
+        await server.resolve_project_id("eclair plans")
+        with pytest.raises(ValueError, match="No project named 'Garden'"):
+            await server.resolve_project_id("Garden")
+
+    asyncio.run(scenario())
+    assert client.project_fetches == 2
+
+def test_ambiguous_name_is_rejected(client):
+    with pytest.raises(ValueError, match="ambiguous"):
+        asyncio.run(server.resolve_project_id("home"))
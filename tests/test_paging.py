@@ -0,0 +1,35 @@
+"""Tests for cursor pagination."""
+
+import pytest
+
+from ticktick_mcp.src.paging import paginate, encode_cursor, decode_cursor
+
+def items(*keys):
+    return [{"id": item_id, "sortOrder": order} for order, item_id in keys]
+
+def test_pages_cover_every_item_once():
+    listing = items((3, "c"), (1, "a"), (2, "b"), (2, "a"), (5, "e"))
+    seen, cursor = [], None
+    while True:
+        page, offset, cursor = paginate(listing, 2, cursor)
+        assert offset == len(seen)
+        seen.extend(item["id"] + str(item["sortOrder"]) for item in page)
+        if cursor is None:
+            break
+    assert seen == ["a1", "a2", "b2", "c3", "e5"]
+
+def test_cursor_survives_inserts_and_deletes():
+    listing = items((1, "a"), (2, "b"), (3, "c"), (4, "d"))
+    page, _, cursor = paginate(listing, 2)
+    assert [item["id"] for item in page] == ["a", "b"]
+    # Drop an item already returned and add one before the cursor
+    changed = items((0, "z"), (2, "b"), (3, "c"), (4, "d"))
+    page, offset, cursor = paginate(changed, 2, cursor)
+    assert [item["id"] for item in page] == ["c", "d"]
+    assert offset == 2 and cursor is None
+
+def test_cursor_round_trip_and_rejects_garbage():
+    assert decode_cursor(encode_cursor((-5, "abc"))) == (-5, "abc")
+    for bad in ("not-a-cursor", encode_cursor(("x", "y"))):
+        with pytest.raises(ValueError):
+            paginate(items((1, "a")), 1, bad)
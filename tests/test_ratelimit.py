@@ -0,0 +1,24 @@
+"""Tests for the retry classification of failed requests."""
+
+from ticktick_mcp.src.ratelimit import RetryPolicy
+
+def test_idempotent_requests_retry_on_server_errors_and_transport_failures():
+    policy = RetryPolicy(max_retries=2)
+    assert policy.should_retry("GET", 0, 503)
+    assert policy.should_retry("DELETE", 1, 500)
+    assert policy.should_retry("GET", 0, None)
+    assert not policy.should_retry("GET", 2, 503)
+    assert not policy.should_retry("GET", 0, 404)
+
+def test_non_idempotent_requests_retry_only_when_unprocessed():
+    policy = RetryPolicy()
+    assert policy.should_retry("POST", 0, 429)
+    assert not policy.should_retry("POST", 0, 503)
+    assert policy.should_retry("POST", 0, None, request_sent=False)
+    assert not policy.should_retry("POST", 0, None, request_sent=True)
+
+def test_backoff_honours_retry_after_up_to_the_cap():
+    policy = RetryPolicy(base_delay=1.0, max_delay=10.0)
+    assert policy.backoff(0, "3") == 3
+    assert policy.backoff(0, "60") is None
+    assert 0 <= policy.backoff(3) <= 8
@@ -0,0 +1,56 @@
+"""Tests for the cross-project search_tasks tool."""
+
+import json
+import asyncio
+
+import pytest
+
+from ticktick_mcp.src import server
+from ticktick_mcp.src.cache import CachedTickTickClient
+
+class WorkspaceClient:
+    """Stands in for the API client with two projects of undone tasks."""
+
+    def __init__(self):
+        self.projects = [{"id": "p1", "name": "Work"}, {"id": "p2", "name": "Home"}]
+        self.tasks = {
+            project["id"]: [{"id": f"{project['id']}-t{n}", "projectId": project["id"],
+                             "title": f"Report {n}", "sortOrder": n, "priority": n % 2}
+                            for n in range(5)]
+            for project in self.projects
+        }
+
+    async def get_projects(self):
+        return self.projects
+
+    async def get_project_with_data(self, project_id):
+        return {"project": {"id": project_id}, "tasks": self.tasks[project_id], "columns": []}
+
+@pytest.fixture
+def search(monkeypatch):
+    monkeypatch.setattr(server, "ticktick", CachedTickTickClient(WorkspaceClient(), maxsize=32))
+    monkeypatch.setattr(server, "mirror", None)
+    monkeypatch.setattr(server, "write_queue", None)
+
+    def search(**arguments):
+        return asyncio.run(server.search_tasks.__wrapped__(**arguments))
+    return search
+
+def test_results_are_paged_with_a_cursor(search):
+    seen, cursor = [], None
+    while True:
+        page = json.loads(search(query="report", limit=4, cursor=cursor, output_format="json"))
+        assert page["total"] == 10 and page["offset"] == len(seen)
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == 10
+
+    text = search(query="report", priority=1, limit=1)
+    assert "Showing tasks 1-1 of 4" in text and "Call search_tasks with cursor=" in text
+
+def test_completed_status_is_rejected(search):
+    assert "Completed tasks cannot be searched" in search(status="completed")
+    assert search(status="done").startswith("Invalid status")
+    assert search(limit=-1).startswith("Invalid limit")
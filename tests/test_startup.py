@@ -0,0 +1,46 @@
+"""Tests for the startup milestones reported in ticktick://stats."""
+
+import asyncio
+
+from ticktick_mcp.src import server
+
+def test_first_tool_call_is_recorded_once(monkeypatch):
+    monkeypatch.setattr(server, "startup_started", 0.0)
+    monkeypatch.setattr(server, "startup_timings", {})
+    monkeypatch.setattr(server, "ticktick", None)
+    monkeypatch.setattr(server, "tenant_pool", None)
+
+    @server.tool()
+    async def probe() -> str:
+        return "ok"
+
+    try:
+        assert asyncio.run(probe()) == "ok"
+        first = server.startup_timings["first_call"]
+        asyncio.run(probe())
+        assert server.startup_timings["first_call"] == first
+    finally:
+        server.mcp.remove_tool("probe")
+
+def test_handshake_is_timed_and_earlier_handler_still_runs(monkeypatch):
+    monkeypatch.setattr(server, "startup_started", 0.0)
+    monkeypatch.setattr(server, "startup_timings", {})
+    seen = []
+
+    async def earlier(notification):
+        seen.append(notification)
+
+    handlers = {server.types.InitializedNotification: earlier}
+    monkeypatch.setattr(server.mcp._mcp_server, "notification_handlers", handlers)
+    server.watch_handshake()
+    server.watch_handshake()
+
+    notification = server.types.InitializedNotification(method="notifications/initialized")
+    asyncio.run(handlers[server.types.InitializedNotification](notification))
+    assert "handshake" in server.startup_timings
+    assert "first_call" not in server.startup_timings
+    assert seen == [notification]
+
+def test_handshake_timing_is_skipped_without_handlers(monkeypatch):
+    monkeypatch.setattr(server.mcp._mcp_server, "notification_handlers", None)
+    server.watch_handshake()
@@ -0,0 +1,46 @@
+"""Tests for per-tenant clients and their authentication."""
+
+import asyncio
+
+import pytest
+
+from ticktick_mcp.src.tenants import TenantClientPool, TenantAuthError, bearer_token
+
+@pytest.fixture
+def pool(tmp_path):
+    (tmp_path / "alice.env").write_text("TICKTICK_ACCESS_TOKEN=token-a\nTICKTICK_TENANT_SECRET=s3cret-a\n")
+    (tmp_path / "bob.env").write_text("TICKTICK_ACCESS_TOKEN=token-b\n")
+    pool = TenantClientPool(str(tmp_path))
+    yield pool
+    asyncio.run(pool.close())
+
+def test_bearer_token():
+    assert bearer_token("Bearer abc") == "abc"
+    assert bearer_token("bearer  abc ") == "abc"
+    assert bearer_token("Basic abc") is None
+    assert bearer_token("Bearer ") is None
+    assert bearer_token(None) is None
+
+def test_client_requires_tenant_secret(pool):
+    client = asyncio.run(pool.get("alice", "s3cret-a"))
+    assert asyncio.run(pool.get("alice", "s3cret-a")) is client
+    assert pool.created == 1
+
+@pytest.mark.parametrize("tenant, secret", [
+    ("alice", None),
+    ("alice", "wrong"),
+    ("bob", "anything"),      # no TICKTICK_TENANT_SECRET in its file
+    ("carol", "s3cret-a"),    # no token file
+    ("../alice", "s3cret-a"), # not a valid tenant name
+    (None, "s3cret-a"),       # no tenant header
+])
+def test_unauthenticated_requests_are_rejected(pool, tenant, secret):
+    with pytest.raises(TenantAuthError):
+        asyncio.run(pool.get(tenant, secret))
+    assert pool.created == 0
+    assert pool.get_stats()["rejected"] == 1
+
+def test_open_client_still_checks_secret(pool):
+    asyncio.run(pool.get("alice", "s3cret-a"))
+    with pytest.raises(TenantAuthError):
+        asyncio.run(pool.get("alice", "wrong"))
@@ -0,0 +1,42 @@
+"""Tests for the synchronous client against the fake API."""
+
+import pytest
+
+from ticktick_mcp.src.fake_api import FakeTickTickAPI
+from ticktick_mcp.src.ticktick_client import TickTickClient
+
+@pytest.fixture
+def api(monkeypatch):
+    api = FakeTickTickAPI(seed=1).start()
+    monkeypatch.setenv("TICKTICK_BASE_URL", api.base_url)
+    monkeypatch.setenv("TICKTICK_TOKEN_URL", api.token_url)
+    monkeypatch.setenv("TICKTICK_ACCESS_TOKEN", api.access_token)
+    monkeypatch.setenv("TICKTICK_REFRESH_TOKEN", api.refresh_token)
+    yield api
+    api.stop()
+
+def test_empty_responses_are_empty_dicts(api):
+    client = TickTickClient()
+    try:
+        project = client.create_project("Errands")
+        first = client.create_task("Buy milk", project["id"])
+        second = client.create_task("Post letter", project["id"])
+
+        assert client.complete_task(project["id"], first["id"]) == {}
+        assert client.delete_task(project["id"], second["id"]) == {}
+        assert client.get_project_with_data(project["id"])["tasks"] == []
+    finally:
+        client.close()
+
+def test_update_to_unknown_project_leaves_the_task_alone(api):
+    client = TickTickClient()
+    try:
+        project = client.create_project("Errands")
+        task = client.create_task("Buy milk", project["id"])
+
+        result = client.update_task(task["id"], "f" * 24, title="Buy oat milk")
+        assert "error" in result
+        assert client.get_task(project["id"], task["id"])["title"] == "Buy milk"
+        assert api.tasks[project["id"]][task["id"]]["projectId"] == project["id"]
+    finally:
+        client.close()
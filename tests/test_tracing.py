@@ -0,0 +1,31 @@
+"""Tests for the trace exporters' configuration."""
+
+import json
+
+from ticktick_mcp.src import tracing
+
+def test_log_and_otlp_exporters_write_separate_files(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracing.configure_tracing(["log", "otlp"], str(path))
+    try:
+        with tracing.span("tool", tool="get_projects"):
+            pass
+    finally:
+        tracing.shutdown_tracing()
+
+    assert not path.exists()
+    log_line = json.loads((tmp_path / "traces.log.jsonl").read_text())
+    otlp_line = json.loads((tmp_path / "traces.otlp.jsonl").read_text())
+    assert log_line["name"] == "tool"
+    assert "resourceSpans" in otlp_line
+
+def test_single_file_exporter_keeps_the_path(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracing.configure_tracing(["otlp", "memory"], str(path))
+    try:
+        with tracing.span("tool"):
+            pass
+    finally:
+        tracing.shutdown_tracing()
+
+    assert "resourceSpans" in json.loads(path.read_text())
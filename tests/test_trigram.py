@@ -0,0 +1,49 @@
+"""Tests for the fuzzy trigram index behind find_tasks."""
+
+from ticktick_mcp.src import server
+from ticktick_mcp.src.trigram import TrigramIndex, normalize, trigrams
+
+def task(task_id, title, project_id="p1", content="", status=0):
+    return {"id": task_id, "projectId": project_id, "title": title, "content": content, "status": status}
+
+def ids(results):
+    return [result["id"] for result in results]
+
+def build(*tasks):
+    index = TrigramIndex()
+    by_project = {}
+    for item in tasks:
+        by_project.setdefault(item["projectId"], []).append(item)
+    index.build(by_project.items())
+    return index
+
+def test_normalize_and_trigrams():
+    assert normalize("Crème BRÛLÉE") == "creme brulee"
+    assert "  c" in trigrams("cat") and "at " in trigrams("cat")
+
+def test_search_tolerates_typos_and_ranks_best_first():
+    index = build(task("a", "Pay the invoice"), task("b", "Invoice template review"),
+                  task("c", "Buy groceries"))
+    found = index.search("invoce", limit=5)
+    assert set(ids(found)) == {"a", "b"}
+    assert ids(index.search("groceries", limit=5)) == ["c"]
+    assert index.search("zzzz", limit=5) == []
+
+def test_search_by_project_and_updates():
+    index = build(task("a", "Quarterly report"), task("b", "Quarterly report", project_id="p2"))
+    assert ids(index.search("quarterly report", project_id="p2")) == ["b"]
+    index.upsert(task("a", "Annual summary"))
+    assert ids(index.search("quarterly report")) == ["b"]
+    index.upsert(task("b", "Quarterly report", project_id="p2", status=2))
+    assert index.search("quarterly report") == []
+    index.remove_project("p1")
+    assert len(index) == 0
+
+def test_failed_write_invalidates_text_index(failing_server):
+    index = server.text_indexes[failing_server.client] = TrigramIndex()
+    index.build([])
+    assert index.is_fresh()
+
+    result = failing_server.call("delete_task", "b" * 24, "a" * 24)
+    assert result.startswith("Error deleting task")
+    assert not index.is_fresh()
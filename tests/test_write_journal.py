@@ -0,0 +1,121 @@
+"""Tests for the write-behind journal and queue."""
+
+import asyncio
+
+import pytest
+
+from ticktick_mcp.src import write_journal
+from ticktick_mcp.src.write_journal import WriteJournal, WriteBehindQueue, is_permanent
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = WriteJournal(str(tmp_path / "journal.db"))
+    yield journal
+    journal.close()
+
+def test_updates_to_a_task_are_merged(journal):
+    journal.append("t1", "p1", {"title": "a"})
+    entry = journal.append("t1", "p1", {"title": "b", "priority": 1})
+    assert entry["updates"] == 2
+    assert entry["fields"] == {"title": "b", "priority": 1}
+    assert journal.get_stats()["pending"] == 1
+
+def test_claimed_entry_is_not_merged_into_and_holds_back_later_ones(journal):
+    journal.append("t1", "p1", {"title": "a"})
+    [claimed] = journal.claim_due(float("inf"), float("inf"))
+    later = journal.append("t1", "p1", {"title": "b"})
+    assert later["seq"] != claimed["seq"]
+    assert journal.claim_due(float("inf"), float("inf")) == []
+    journal.complete(claimed["seq"])
+    assert [entry["seq"] for entry in journal.claim_due(float("inf"), float("inf"))] == [later["seq"]]
+
+def test_is_permanent():
+    assert is_permanent({"error": "x", "status_code": 404})
+    assert is_permanent({"error": "x", "status_code": 400})
+    assert not is_permanent({"error": "x", "status_code": 429})
+    assert not is_permanent({"error": "x", "status_code": 408})
+    assert not is_permanent({"error": "x", "status_code": 503})
+    assert not is_permanent({"error": "connection reset"})
+
+def run_queue(tmp_path, send, scenario):
+    failed = []
+
+    async def main():
+        queue = WriteBehindQueue(str(tmp_path / "queue.db"), send, on_failed=failed.append, window=0)
+        try:
+            await scenario(queue)
+            return queue.get_stats(), queue.failures("t1")
+        finally:
+            await queue.close()
+
+    stats, failures = asyncio.run(main())
+    return stats, failures, failed
+
+def test_rejected_update_is_not_retried(tmp_path):
+    calls = []
+
+    async def send(**update):
+        calls.append(update)
+        return {"error": "404 Not Found", "status_code": 404}
+
+    async def scenario(queue):
+        queue.enqueue("t1", "p1", {"title": "a"})
+        await queue.flush()
+
+    stats, failures, failed = run_queue(tmp_path, send, scenario)
+    assert len(calls) == 1
+    assert stats["rejected"] == 1 and stats["retries"] == 0
+    assert [entry["task_id"] for entry in failed] == ["t1"]
+    assert failures[0]["fields"] == {"title": "a"} and failures[0]["error"] == "404 Not Found"
+    assert stats["failures"][0]["task_id"] == "t1"
+
+def test_transient_failure_is_given_up_after_max_attempts(tmp_path, monkeypatch):
+    monkeypatch.setattr(write_journal, "RETRY_DELAY", 0.01)
+    calls = []
+
+    async def send(**update):
+        calls.append(update)
+        return {"error": "503 Service Unavailable", "status_code": 503}
+
+    async def scenario(queue):
+        queue.max_attempts = 3
+        queue.start()
+        queue.enqueue("t1", "p1", {"title": "a"})
+        for _ in range(200):
+            if queue.get_stats()["given_up"]:
+                break
+            await asyncio.sleep(0.01)
+
+    stats, failures, failed = run_queue(tmp_path, send, scenario)
+    assert len(calls) == 3
+    assert stats["retries"] == 2 and stats["given_up"] == 1 and stats["rejected"] == 0
+    assert len(failed) == 1 and len(failures) == 1
+
+def test_later_sent_update_clears_failures(tmp_path):
+    responses = [{"error": "400 Bad Request", "status_code": 400}, {"id": "t1", "projectId": "p1"}]
+
+    async def send(**update):
+        return responses.pop(0)
+
+    async def scenario(queue):
+        queue.enqueue("t1", "p1", {"title": "bad"})
+        await queue.flush()
+        assert len(queue.failures("t1")) == 1
+        queue.enqueue("t1", "p1", {"title": "good"})
+        await queue.flush()
+
+    stats, failures, _ = run_queue(tmp_path, send, scenario)
+    assert failures == []
+    assert stats["failed"] == 0 and stats["sent"] == 1
+
+def test_discard_drops_failed_updates(tmp_path):
+    async def send(**update):
+        return {"error": "404 Not Found", "status_code": 404}
+
+    async def scenario(queue):
+        queue.enqueue("t1", "p1", {"title": "a"})
+        await queue.flush()
+        await queue.discard(task_id="t1")
+
+    stats, failures, _ = run_queue(tmp_path, send, scenario)
+    assert failures == [] and stats["failed"] == 0
@@ -9,7 +9,10 @@ import argparse
 import logging
 from pathlib import Path
 
-from .src.server import main as server_main
+from .src.server import main as server_main, TRANSPORTS
+from .src.formatting import OUTPUT_FORMATS, set_default_output_format
+from .src.tracing import EXPORTERS, DEFAULT_BUFFER_SIZE, configure_tracing
+from .src.fake_api import FakeTickTickAPI
 from .authenticate import main as auth_main
 
 def check_auth_setup() -> bool:
@@ -39,19 +42,151 @@ def main():
     run_parser.add_argument(
         "--transport", 
         default="stdio", 
-        choices=["stdio"], 
-        help="Transport type (currently only stdio is supported)"
+        choices=TRANSPORTS, 
+        help="Transport type: stdio for a single client, sse or streamable-http to serve many clients from one process"
+    )
+    run_parser.add_argument(
+        "--host",
+        help="Interface to listen on for the HTTP transports (default: 127.0.0.1)"
+    )
+    run_parser.add_argument(
+        "--port",
+        type=int,
+        help="Port to listen on for the HTTP transports (default: 8000)"
+    )
+    run_parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve Prometheus metrics at http://127.0.0.1:PORT/metrics (defaults to TICKTICK_METRICS_PORT)"
+    )
+    run_parser.add_argument(
+        "--trace",
+        action="append",
+        choices=EXPORTERS,
+        help="Export trace spans: log (JSON lines to --trace-file or the log), memory "
+             "(recent spans in the ticktick://traces resource) or otlp (OTLP JSON lines "
+             "to --trace-file). May be repeated (defaults to TICKTICK_TRACE)"
+    )
+    run_parser.add_argument(
+        "--trace-file",
+        help="File for the log and otlp trace exporters; with both, each writes to the file "
+             "name with .log or .otlp before the extension (defaults to TICKTICK_TRACE_FILE)"
+    )
+    run_parser.add_argument(
+        "--trace-buffer",
+        type=int,
+        default=DEFAULT_BUFFER_SIZE,
+        help=f"Number of spans kept by the memory trace exporter (default: {DEFAULT_BUFFER_SIZE})"
+    )
+    run_parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        help="Maximum tool calls running at once (defaults to TICKTICK_MAX_CONCURRENT_REQUESTS or 16)"
+    )
+    run_parser.add_argument(
+        "--max-queue",
+        type=int,
+        help="Maximum tool calls waiting for a slot before new calls are rejected "
+             "(defaults to TICKTICK_MAX_QUEUED_REQUESTS or 64)"
+    )
+    run_parser.add_argument(
+        "--output-format",
+        choices=OUTPUT_FORMATS,
+        help="Default tool output format (defaults to TICKTICK_OUTPUT_FORMAT or text)"
     )
     
     # 'auth' command for authentication
     auth_parser = subparsers.add_parser("auth", help="Authenticate with TickTick")
     
+    # 'fake-api' command for serving an in-memory fake of the TickTick API
+    fake_parser = subparsers.add_parser(
+        "fake-api",
+        help="Serve an in-memory fake of the TickTick API for offline testing and benchmarks"
+    )
+    fake_parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default: 127.0.0.1)")
+    fake_parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    fake_parser.add_argument("--projects", type=int, default=10, help="Number of generated projects (default: 10)")
+    fake_parser.add_argument(
+        "--tasks-per-project",
+        type=int,
+        default=50,
+        help="Number of generated tasks per project (default: 50)"
+    )
+    fake_parser.add_argument(
+        "--columns-per-project",
+        type=int,
+        default=0,
+        help="Number of generated kanban columns per project (default: 0)"
+    )
+    fake_parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    fake_parser.add_argument(
+        "--latency-jitter",
+        type=float,
+        default=0.0,
+        help="Up to this many further seconds added to each response at random"
+    )
+    fake_parser.add_argument(
+        "--rate-limit-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of API requests answered with 429 Too Many Requests"
+    )
+    fake_parser.add_argument(
+        "--retry-after",
+        type=float,
+        default=1.0,
+        help="Retry-After seconds sent with 429 responses (default: 1)"
+    )
+    fake_parser.add_argument(
+        "--server-error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of API requests answered with 500, 502 or 503"
+    )
+    fake_parser.add_argument(
+        "--token-lifetime",
+        type=float,
+        help="Seconds an access token stays valid before requests get 401 (default: never expires)"
+    )
+    fake_parser.add_argument("--seed", type=int, default=0, help="Seed for generated data and injected faults")
+    
     args = parser.parse_args()
     
     # If no command specified, default to 'run'
     if not args.command:
         args.command = "run"
     
+    if args.command == "fake-api":
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        )
+        api = FakeTickTickAPI(
+            host=args.host,
+            port=args.port,
+            latency=args.latency,
+            latency_jitter=args.latency_jitter,
+            rate_limit_rate=args.rate_limit_rate,
+            retry_after=args.retry_after,
+            server_error_rate=args.server_error_rate,
+            token_lifetime=args.token_lifetime,
+            seed=args.seed
+        )
+        api.seed_workspace(args.projects, args.tasks_per_project, args.columns_per_project)
+        print(f"""Point the server at the fake API with (any client ID and secret are accepted):
+    TICKTICK_BASE_URL={api.base_url}
+    TICKTICK_TOKEN_URL={api.token_url}
+    TICKTICK_ACCESS_TOKEN={api.access_token}
+    TICKTICK_REFRESH_TOKEN={api.refresh_token}
+    TICKTICK_CLIENT_ID=fake
+    TICKTICK_CLIENT_SECRET=fake
+""", file=sys.stderr)
+        try:
+            api.serve_forever()
+        except KeyboardInterrupt:
+            print("Fake API stopped by user", file=sys.stderr)
+        sys.exit(0)
+    
     # For the run command, check if auth is set up
     if args.command == "run" and not check_auth_setup():
         print("""
@@ -89,9 +224,19 @@ Run 'uv run -m ticktick_mcp.cli auth' to set up authentication later.
             format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
         )
         
+        if args.output_format:
+            set_default_output_format(args.output_format)
+        if args.trace:
+            configure_tracing(args.trace, args.trace_file or os.getenv("TICKTICK_TRACE_FILE"),
+                              args.trace_buffer)
+        if args.max_concurrency is not None:
+            os.environ["TICKTICK_MAX_CONCURRENT_REQUESTS"] = str(args.max_concurrency)
+        if args.max_queue is not None:
+            os.environ["TICKTICK_MAX_QUEUED_REQUESTS"] = str(args.max_queue)
+        
         # Start the server
         try:
-            server_main()
+            server_main(args.transport, args.host, args.port, args.metrics_port)
         except KeyboardInterrupt:
             print("Server stopped by user", file=sys.stderr)
             sys.exit(0)
@@ -0,0 +1,215 @@
+"""
+Due-date index over every task, for agenda queries.
+
+Tasks are placed by their due date, or their start date when they have no due
+date. Timed tasks happen at an instant and are ordered by its UTC timestamp.
+All-day tasks happen on a calendar day: TickTick stores them as midnight in
+the task's timeZone, so they are converted back to that local date, and a
+query matches them against the days of its own time zone. Both orders are kept
+in sorted lists, so a range query costs two binary searches plus the matching
+tasks, and a task update costs a binary search plus a list insertion.
+"""
+
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, date, timezone, tzinfo
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple, Iterable
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Default number of seconds the index is trusted before it is rebuilt from the API
+DEFAULT_AGENDA_MAX_AGE = 60.0
+
+def parse_date(date_str: str) -> datetime:
+    """
+    Parse a TickTick or ISO 8601 date string into an aware datetime (UTC if no offset).
+    """
+    try:
+        parsed = datetime.strptime(date_str, "%Y-%m-%dT%H:%M:%S%z")
+    except ValueError:
+        parsed = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+@lru_cache(maxsize=256)
+def get_zone(name: Optional[str]) -> Optional[tzinfo]:
+    """
+    Look up an IANA time zone.
+
+    Returns:
+        The zone, or None if name is empty or unknown
+    """
+    if not name:
+        return None
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+def agenda_key(task: Dict) -> Optional[Tuple[str, float]]:
+    """
+    Where a task belongs in the agenda.
+
+    Returns:
+        ("time", UTC timestamp) for timed tasks, ("day", date ordinal) for
+        all-day tasks, or None for completed tasks and tasks without dates
+    """
+    if task.get('status') == 2:
+        return None
+    date_str = task.get('dueDate') or task.get('startDate')
+    if not date_str:
+        return None
+    try:
+        moment = parse_date(date_str)
+    except ValueError:
+        return None
+
+    if task.get('isAllDay'):
+        zone = get_zone(task.get('timeZone')) or timezone.utc
+        return ("day", moment.astimezone(zone).date().toordinal())
+    return ("time", moment.timestamp())
+
+class AgendaIndex:
+    """
+    Undone tasks with a due or start date, sorted by when they are due.
+    """
+
+    def __init__(self, max_age: float = DEFAULT_AGENDA_MAX_AGE):
+        """
+        Args:
+            max_age: Seconds after a full build before is_fresh() asks for a rebuild
+        """
+        self.max_age = max_age
+        # (timestamp, task ID) of timed tasks and (date ordinal, task ID) of all-day tasks
+        self._timed: List[Tuple[float, str]] = []
+        self._days: List[Tuple[int, str]] = []
+        # Task ID -> (project ID, sorted list the task is in, its entry there, task)
+        self._tasks: Dict[str, Tuple[str, list, tuple, Dict]] = {}
+        self._project_tasks: Dict[str, set] = {}
+        self.built_at: Optional[float] = None
+        self.stats = {"builds": 0, "upserts": 0, "removals": 0, "queries": 0}
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def is_fresh(self) -> bool:
+        """Whether the index was built from the API within max_age seconds."""
+        return self.built_at is not None and time.monotonic() - self.built_at < self.max_age
+
+    def invalidate(self) -> None:
+        """Ask for a rebuild on next use."""
+        self.built_at = None
+
+    def build(self, project_tasks: Iterable[Tuple[str, List[Dict]]]) -> None:
+        """
+        Replace the tasks of the given projects, and mark the index fresh.
+
+        Projects not listed keep their tasks (e.g. projects that failed to load).
+
+        Args:
+            project_tasks: (project ID, undone tasks of the project) pairs
+        """
+        for project_id, tasks in project_tasks:
+            for task_id in list(self._project_tasks.get(project_id, ())):
+                self._discard(task_id)
+            for task in tasks:
+                self._add(task, project_id)
+        self.stats["builds"] += 1
+        self.built_at = time.monotonic()
+
+    def upsert(self, task: Dict, project_id: Optional[str] = None) -> None:
+        """Add a task, or move it to where its current dates and project put it."""
+        task_id = task.get('id')
+        if not task_id:
+            return
+        self._discard(task_id)
+        self._add(task, project_id or task.get('projectId'))
+        self.stats["upserts"] += 1
+
+    def remove(self, task_id: str) -> None:
+        """Remove a task, if it is indexed."""
+        if self._discard(task_id):
+            self.stats["removals"] += 1
+
+    def remove_project(self, project_id: str) -> None:
+        """Remove every task of a project."""
+        for task_id in list(self._project_tasks.pop(project_id, ())):
+            self.remove(task_id)
+
+    def retain_projects(self, project_ids: Iterable[str]) -> None:
+        """Remove the tasks of every project not in project_ids."""
+        keep = set(project_ids)
+        for project_id in [project_id for project_id in self._project_tasks if project_id not in keep]:
+            self.remove_project(project_id)
+
+    def _add(self, task: Dict, project_id: str) -> None:
+        key = agenda_key(task)
+        if key is None or not task.get('id'):
+            return
+        kind, value = key
+        entries = self._days if kind == "day" else self._timed
+        entry = (value, task['id'])
+        insort(entries, entry)
+        self._tasks[task['id']] = (project_id, entries, entry, task)
+        self._project_tasks.setdefault(project_id, set()).add(task['id'])
+
+    def _discard(self, task_id: str) -> bool:
+        indexed = self._tasks.pop(task_id, None)
+        if indexed is None:
+            return False
+        project_id, entries, entry, _ = indexed
+        position = bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
+        self._project_tasks.get(project_id, set()).discard(task_id)
+        return True
+
+    def query(self, start: Optional[datetime], end: Optional[datetime],
+              zone: tzinfo = timezone.utc) -> List[Tuple[float, Dict]]:
+        """
+        Get the tasks due in [start, end).
+
+        Timed tasks match by instant. All-day tasks match by day: those on
+        the days from the local date of start up to, but excluding, the local
+        date of end in zone. With start at midnight this selects whole days;
+        with end at the current time it selects days before today.
+
+        Args:
+            start: Start of the range (None for no lower bound)
+            end: End of the range, exclusive (None for no upper bound)
+            zone: Time zone that defines the days for all-day tasks
+
+        Returns:
+            (UTC timestamp, task) pairs in due order, where all-day tasks are
+            placed at the start of their day in zone
+        """
+        self.stats["queries"] += 1
+        matches = []
+
+        low = bisect_left(self._timed, (start.timestamp(),)) if start else 0
+        high = bisect_left(self._timed, (end.timestamp(),)) if end else len(self._timed)
+        for timestamp, task_id in self._timed[low:high]:
+            matches.append((timestamp, self._tasks[task_id][3]))
+
+        first_day = start.astimezone(zone).date().toordinal() if start else None
+        end_day = end.astimezone(zone).date().toordinal() if end else None
+        low = bisect_left(self._days, (first_day,)) if start else 0
+        high = bisect_left(self._days, (end_day,)) if end else len(self._days)
+        for ordinal, task_id in self._days[low:high]:
+            midnight = datetime.combine(date.fromordinal(ordinal), datetime.min.time(), zone)
+            matches.append((midnight.timestamp(), self._tasks[task_id][3]))
+
+        matches.sort(key=lambda match: (match[0], match[1].get('id', '')))
+        return matches
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the number of indexed tasks, its age and update counters."""
+        return {
+            "tasks": len(self._tasks),
+            "timed": len(self._timed),
+            "all_day": len(self._days),
+            "age_seconds": round(time.monotonic() - self.built_at, 1) if self.built_at is not None else None,
+            "max_age": self.max_age,
+            **self.stats
+        }
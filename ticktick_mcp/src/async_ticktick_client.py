@@ -0,0 +1,382 @@
+import os
+import time
+import httpx
+import asyncio
+import logging
+from typing import Dict, List, Any, Optional, Tuple
+
+from .ticktick_client import BaseTickTickClient, DEFAULT_POOL_MAXSIZE
+from .metrics import record_http, endpoint_template
+from .tracing import span
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Default connection limits (overridable via environment variables)
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_TIMEOUT = 30.0
+
+def http_limits_from_env(max_connections: Optional[int] = None,
+                         max_keepalive_connections: Optional[int] = None,
+                         timeout: Optional[float] = None) -> Tuple[int, int, float]:
+    """
+    Resolve connection limits, falling back to TICKTICK_MAX_CONNECTIONS,
+    TICKTICK_POOL_MAXSIZE and TICKTICK_TIMEOUT.
+    
+    Returns:
+        A (max_connections, max_keepalive_connections, timeout) tuple
+    """
+    return (
+        max_connections or int(os.getenv("TICKTICK_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)),
+        max_keepalive_connections or int(os.getenv("TICKTICK_POOL_MAXSIZE", DEFAULT_POOL_MAXSIZE)),
+        timeout or float(os.getenv("TICKTICK_TIMEOUT", DEFAULT_TIMEOUT))
+    )
+
+def create_http_client(max_connections: int, max_keepalive_connections: int,
+                       timeout: float) -> httpx.AsyncClient:
+    """Create a pooled HTTP client with the given connection limits."""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        ),
+        timeout=timeout
+    )
+
+class AsyncTickTickClient(BaseTickTickClient):
+    """
+    Asynchronous client for the TickTick API using OAuth2 authentication.
+
+    Mirrors the surface of TickTickClient but awaits network I/O on a pooled
+    httpx.AsyncClient, so concurrent callers on one event loop overlap their
+    requests instead of blocking each other. Identical GETs that are in flight
+    at the same time are coalesced into a single HTTP request, and the access
+    token is refreshed in the background shortly before it expires.
+    """
+
+    def __init__(self, max_connections: Optional[int] = None,
+                 max_keepalive_connections: Optional[int] = None,
+                 timeout: Optional[float] = None, env_path: Optional[str] = None,
+                 http: Optional[httpx.AsyncClient] = None):
+        """
+        Initialize the async TickTick client.
+
+        Args:
+            max_connections: Maximum number of concurrent connections
+                (defaults to TICKTICK_MAX_CONNECTIONS or 20)
+            max_keepalive_connections: Maximum number of idle keep-alive connections
+                (defaults to TICKTICK_POOL_MAXSIZE or 10)
+            timeout: Request timeout in seconds (defaults to TICKTICK_TIMEOUT or 30)
+            env_path: File holding this account's tokens (see BaseTickTickClient)
+            http: Shared HTTP client to send requests on; it is not closed by close()
+                (by default the client creates and owns its own)
+        """
+        super().__init__(env_path)
+
+        self.max_connections, self.max_keepalive_connections, self.timeout = http_limits_from_env(
+            max_connections, max_keepalive_connections, timeout)
+        self._owns_http = http is None
+        self.http = http or create_http_client(
+            self.max_connections, self.max_keepalive_connections, self.timeout)
+        # In-flight GET requests by URL, shared by every concurrent caller
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # The running token refresh, shared by every caller that needs it
+        self._refresh_future: Optional[asyncio.Future] = None
+        # Background task that refreshes the token ahead of expiry
+        self._refresh_timer: Optional[asyncio.Task] = None
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        Get connection pool statistics for tuning the pool size.
+
+        Returns:
+            A dictionary with the pool limits, the number of requests sent and
+            the number of open and idle connections
+        """
+        connections = []
+        pool = getattr(getattr(self.http, "_transport", None), "_pool", None)
+        if pool is not None:
+            connections = list(getattr(pool, "connections", []))
+
+        return {
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+            "requests": self.request_stats["requests"],
+            "open_connections": len(connections),
+            "idle_connections": sum(1 for conn in connections if conn.is_idle())
+        }
+
+    def get_request_stats(self) -> Dict[str, Any]:
+        """
+        Get request, throttling, retry and coalescing counters.
+
+        Returns:
+            The counters from BaseTickTickClient.get_request_stats plus the number
+            of GET requests served by joining an identical in-flight request
+        """
+        stats = super().get_request_stats()
+        stats["coalesced"] = self.request_stats["coalesced"]
+        return stats
+
+    async def close(self) -> None:
+        """Stop the background token refresh and close the HTTP client if this client owns it."""
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+        if self._owns_http:
+            await self.http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _refresh_access_token(self) -> bool:
+        """
+        Refresh the access token using the refresh token.
+
+        Returns:
+            True if successful, False otherwise
+        """
+        refresh_request = self._build_refresh_request()
+        if not refresh_request:
+            return False
+        token_data, headers = refresh_request
+
+        try:
+            # Send the token request
+            response = await self.http.post(self.token_url, data=token_data, headers=headers)
+            response.raise_for_status()
+
+            # Parse the response and update the tokens
+            self._apply_tokens(response.json())
+            return True
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error refreshing access token: {e}")
+            return False
+
+    async def _refresh_token_once(self, stale_token: str) -> bool:
+        """
+        Refresh the access token unless it was already replaced since stale_token.
+
+        Only one refresh runs at a time; callers arriving while it runs await
+        the same future and reuse its result.
+
+        Args:
+            stale_token: The access token the caller found expired
+
+        Returns:
+            True if a fresh access token is available
+        """
+        if self.access_token != stale_token:
+            return True
+        if self._refresh_future is None or self._refresh_future.done():
+            self._refresh_future = asyncio.ensure_future(self._run_refresh())
+        return await asyncio.shield(self._refresh_future)
+
+    async def _run_refresh(self) -> bool:
+        self.request_stats["token_refreshes"] += 1
+        with span("token.refresh") as current:
+            refreshed = await self._refresh_access_token()
+            current.set(refreshed=refreshed)
+        if refreshed:
+            self._schedule_refresh()
+            return True
+        # Stop refreshing ahead of time until a refresh succeeds again
+        self.request_stats["token_refresh_failures"] += 1
+        self.token_expires_at = None
+        return False
+
+    def _schedule_refresh(self) -> None:
+        """Start the background task that refreshes the token ahead of expiry."""
+        if self.token_expires_at is None:
+            return
+        if self._refresh_timer is not None and not self._refresh_timer.done():
+            return
+        self._refresh_timer = asyncio.ensure_future(self._refresh_when_due())
+
+    async def _refresh_when_due(self) -> None:
+        delay = self.token_expires_at - self.refresh_margin - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._refresh_timer = None
+        if self._token_refresh_due():
+            self.request_stats["proactive_token_refreshes"] += 1
+            await self._refresh_token_once(self.access_token)
+        else:
+            self._schedule_refresh()
+
+    async def _ensure_fresh_token(self) -> None:
+        """Wait for a refresh if the token has expired, otherwise keep the background refresh scheduled."""
+        if self.token_expires_at is None:
+            return
+        if time.time() >= self.token_expires_at:
+            self.request_stats["proactive_token_refreshes"] += 1
+            await self._refresh_token_once(self.access_token)
+        else:
+            self._schedule_refresh()
+
+    async def _make_request(self, method: str, endpoint: str, data=None) -> Dict:
+        """
+        Makes a request to the TickTick API.
+
+        GET requests for a URL that is already being fetched wait for that
+        request instead of sending another one, and share its parsed result.
+
+        Args:
+            method: HTTP method (GET, POST, DELETE)
+            endpoint: API endpoint (without base URL)
+            data: Request data (for POST)
+
+        Returns:
+            API response as a dictionary
+        """
+        url = f"{self.base_url}{endpoint}"
+
+        if method not in ("GET", "POST", "DELETE"):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+
+        if method != "GET":
+            return await self._send_request(method, endpoint, url, data)
+
+        inflight = self._inflight.get(url)
+        if inflight is not None:
+            self.request_stats["coalesced"] += 1
+        else:
+            inflight = asyncio.ensure_future(self._send_request(method, endpoint, url, data))
+            self._inflight[url] = inflight
+            inflight.add_done_callback(lambda _: self._inflight.pop(url, None))
+
+        # Shield the shared request so one cancelled caller does not cancel it for the others
+        return await asyncio.shield(inflight)
+
+    async def _send_request(self, method: str, endpoint: str, url: str, data=None) -> Dict:
+        """
+        Sends a request with throttling, retries and token refresh.
+
+        Returns:
+            API response as a dictionary
+        """
+        await self._ensure_fresh_token()
+
+        attempt = 0
+        refreshed = False
+        try:
+            while True:
+                self._record_throttle(await self.rate_limiter.acquire_async())
+
+                try:
+                    # Make the request over the pooled client
+                    self.request_stats["requests"] += 1
+                    sent_token = self.access_token
+                    started = time.perf_counter()
+                    with span("http.request", method=method, endpoint=endpoint_template(endpoint),
+                              attempt=attempt) as current:
+                        response = await self.http.request(method, url, headers=self.headers, json=data)
+                        current.set(status=response.status_code, bytes=len(response.content))
+                    record_http(method, endpoint, response.status_code, time.perf_counter() - started,
+                                len(response.request.content), len(response.content))
+                except httpx.TransportError as e:
+                    record_http(method, endpoint, "error", time.perf_counter() - started)
+                    # Failing to connect means the server never saw the request
+                    request_sent = not isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                    if not self.retry_policy.should_retry(method, attempt, request_sent=request_sent):
+                        raise
+                    delay = self.retry_policy.backoff(attempt)
+                    self._record_retry(method, endpoint, repr(e), delay)
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+
+                # Check if the request was unauthorized (401)
+                if response.status_code == 401 and not refreshed:
+                    logger.info("Access token expired. Attempting to refresh...")
+                    refreshed = True
+
+                    # Try to refresh the access token, then retry the request with the new token
+                    if await self._refresh_token_once(sent_token):
+                        continue
+
+                if response.status_code == 429:
+                    self.request_stats["rate_limited_responses"] += 1
+                if self.retry_policy.should_retry(method, attempt, status=response.status_code):
+                    delay = self.retry_policy.backoff(attempt, response.headers.get("Retry-After"))
+                    if delay is not None:
+                        self._record_retry(method, endpoint, f"HTTP {response.status_code}", delay)
+                        await asyncio.sleep(delay)
+                        attempt += 1
+                        continue
+                break
+
+            # Raise an exception for 4xx/5xx status codes
+            response.raise_for_status()
+
+            # Return empty dict for 204 No Content or an empty body
+            if response.status_code == 204 or not response.content:
+                return {}
+
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            logger.error(f"API request failed: {e}")
+            return {"error": str(e), "status_code": e.response.status_code}
+        except httpx.HTTPError as e:
+            logger.error(f"API request failed: {e}")
+            return {"error": str(e)}
+
+    # Project methods
+    async def get_projects(self) -> List[Dict]:
+        """Gets all projects for the user."""
+        return await self._make_request("GET", "/project")
+
+    async def get_project(self, project_id: str) -> Dict:
+        """Gets a specific project by ID."""
+        return await self._make_request("GET", f"/project/{project_id}")
+
+    async def get_project_with_data(self, project_id: str) -> Dict:
+        """Gets project with tasks and columns."""
+        return await self._make_request("GET", f"/project/{project_id}/data")
+
+    async def create_project(self, name: str, color: str = "#F18181", view_mode: str = "list", kind: str = "TASK") -> Dict:
+        """Creates a new project."""
+        data = self._project_data(name, color, view_mode, kind)
+        return await self._make_request("POST", "/project", data)
+
+    async def update_project(self, project_id: str, name: str = None, color: str = None,
+                             view_mode: str = None, kind: str = None) -> Dict:
+        """Updates an existing project."""
+        data = self._project_data(name, color, view_mode, kind)
+        return await self._make_request("POST", f"/project/{project_id}", data)
+
+    async def delete_project(self, project_id: str) -> Dict:
+        """Deletes a project."""
+        return await self._make_request("DELETE", f"/project/{project_id}")
+
+    # Task methods
+    async def get_task(self, project_id: str, task_id: str) -> Dict:
+        """Gets a specific task by project ID and task ID."""
+        return await self._make_request("GET", f"/project/{project_id}/task/{task_id}")
+
+    async def create_task(self, title: str, project_id: str, content: str = None,
+                          start_date: str = None, due_date: str = None,
+                          priority: int = 0, is_all_day: bool = False) -> Dict:
+        """Creates a new task."""
+        data = self._create_task_data(title, project_id, content, start_date,
+                                      due_date, priority, is_all_day)
+        return await self._make_request("POST", "/task", data)
+
+    async def update_task(self, task_id: str, project_id: str, title: str = None,
+                          content: str = None, priority: int = None,
+                          start_date: str = None, due_date: str = None) -> Dict:
+        """Updates an existing task."""
+        data = self._update_task_data(task_id, project_id, title, content,
+                                      priority, start_date, due_date)
+        return await self._make_request("POST", f"/task/{task_id}", data)
+
+    async def complete_task(self, project_id: str, task_id: str) -> Dict:
+        """Marks a task as complete."""
+        return await self._make_request("POST", f"/project/{project_id}/task/{task_id}/complete")
+
+    async def delete_task(self, project_id: str, task_id: str) -> Dict:
+        """Deletes a task."""
+        return await self._make_request("DELETE", f"/project/{project_id}/task/{task_id}")
@@ -299,7 +299,7 @@ class TickTickAuth:
             response.raise_for_status()
             
             # Parse the response
-        
+            self.tokens = response.json()
             
             # Save the tokens to the .env file
             self._save_tokens_to_env()
@@ -310,7 +310,7 @@ class TickTickAuth:
             logger.error(f"Error exchanging code for token: {e}")
             if hasattr(e, 'response') and e.response is not None:
                 try:
-                
+                    error_details = e.response.json()
                     return f"Error exchanging code for token: {error_details}"
                 except:
                     return f"Error exchanging code for token: {e.response.text}"
@@ -337,6 +337,11 @@ class TickTickAuth:
         env_content["TICKTICK_ACCESS_TOKEN"] = self.tokens.get('access_token', '')
         if 'refresh_token' in self.tokens:
             env_content["TICKTICK_REFRESH_TOKEN"] = self.tokens.get('refresh_token', '')
+        if self.tokens.get('expires_in'):
+            # Lets the client refresh the access token before it expires
+            env_content["TICKTICK_TOKEN_EXPIRES_AT"] = str(int(time.time() + float(self.tokens['expires_in'])))
+        else:
+            env_content.pop("TICKTICK_TOKEN_EXPIRES_AT", None)
         
         # Make sure client credentials are saved as well
         if self.client_id and "TICKTICK_CLIENT_ID" not in env_content:
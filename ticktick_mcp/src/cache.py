@@ -0,0 +1,497 @@
+"""
+In-process read-through cache for the TickTick client.
+
+CachedTickTickClient wraps an AsyncTickTickClient, caching read endpoints with
+per-endpoint TTLs in a bounded LRU cache. Every entry is tagged with the
+project it belongs to, so mutations invalidate exactly the reads they affect.
+
+Task mutations are applied to the cached project data instead: a successful
+create or update puts the returned task in place, and a complete or delete
+removes it, so the next read needs no request. The patched tasks are checked
+against the API's answer when the project data is next fetched, and any
+difference is counted and logged as a mismatch.
+"""
+
+import os
+import time
+import logging
+from collections import OrderedDict, deque
+from typing import Dict, List, Any, Optional, Tuple, Iterable, Callable, Awaitable
+
+from .tracing import span
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Default cache settings (overridable via environment variables)
+DEFAULT_MAXSIZE = 256
+DEFAULT_TTLS = {
+    "get_projects": 60.0,
+    "get_project": 60.0,
+    "get_project_with_data": 15.0,
+    "get_task": 15.0
+}
+
+# Environment variable suffix for each cached endpoint's TTL
+TTL_ENV_VARS = {
+    "get_projects": "TICKTICK_CACHE_TTL_PROJECTS",
+    "get_project": "TICKTICK_CACHE_TTL_PROJECT",
+    "get_project_with_data": "TICKTICK_CACHE_TTL_PROJECT_DATA",
+    "get_task": "TICKTICK_CACHE_TTL_TASK"
+}
+
+# Tag for the project list
+PROJECTS_TAG = "projects"
+
+# Task fields compared when a locally patched task is checked against the API
+SYNC_FIELDS = ("projectId", "title", "content", "desc", "priority", "status", "startDate",
+               "dueDate", "isAllDay", "timeZone", "reminders", "repeatFlag", "items", "tags")
+
+# Number of recent mismatches kept for the stats
+MISMATCH_HISTORY = 10
+
+def project_tag(project_id: str) -> str:
+    """Tag shared by every cached read belonging to a project."""
+    return f"project:{project_id}"
+
+def ttls_from_env() -> Dict[str, float]:
+    """Read per-endpoint TTLs from the environment, falling back to the defaults."""
+    return {
+        endpoint: float(os.getenv(TTL_ENV_VARS[endpoint], default))
+        for endpoint, default in DEFAULT_TTLS.items()
+    }
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire after a per-entry TTL and can be
+    invalidated by tag.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Any, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, set] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Any) -> Tuple[bool, Any]:
+        """
+        Look up a key.
+
+        Returns:
+            A (found, value) tuple
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+
+        expires_at, value, _ = entry
+        if time.monotonic() >= expires_at:
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return False, None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, value
+
+    def set(self, key: Any, value: Any, ttl: float, tags: Iterable[str] = ()) -> None:
+        """
+        Store a value for ttl seconds, evicting the least recently used entries
+        when the cache is full.
+        """
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        tags = tuple(tags)
+        self._entries[key] = (time.monotonic() + ttl, value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.maxsize:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def peek(self, key: Any) -> Tuple[bool, Any]:
+        """
+        Look up a live entry without counting a hit or miss or refreshing its LRU position.
+
+        Returns:
+            A (found, value) tuple
+        """
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() >= entry[0]:
+            return False, None
+        return True, entry[1]
+
+    def remaining(self, key: Any) -> Optional[float]:
+        """Seconds until a live entry expires, or None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        left = entry[0] - time.monotonic()
+        return left if left > 0 else None
+
+    def replace(self, key: Any, value: Any) -> bool:
+        """
+        Replace the value of a live entry, keeping its expiry time and tags.
+
+        Returns:
+            True if the entry was replaced, False if it is missing or expired
+        """
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() >= entry[0]:
+            return False
+        self._entries[key] = (entry[0], value, entry[2])
+        return True
+
+    def discard(self, key: Any) -> None:
+        """Drop one entry, if it is cached."""
+        if key in self._entries:
+            self._remove(key)
+
+    def _remove(self, key: Any) -> None:
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def invalidate(self, *tags: str) -> int:
+        """
+        Drop every entry carrying any of the given tags.
+
+        Returns:
+            The number of entries dropped
+        """
+        dropped = 0
+        for tag in tags:
+            for key in list(self._tags.get(tag, ())):
+                if key in self._entries:
+                    self._remove(key)
+                    dropped += 1
+        self.invalidations += dropped
+        return dropped
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
+        self._tags.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit, miss, eviction and invalidation counters."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
+
+class CachedTickTickClient:
+    """
+    Read-through caching wrapper around an AsyncTickTickClient.
+
+    Exposes the same methods as the wrapped client; attributes that are not
+    overridden here (close, get_pool_stats, ...) are delegated to it.
+    """
+
+    def __init__(self, client, maxsize: Optional[int] = None,
+                 ttls: Optional[Dict[str, float]] = None):
+        """
+        Initialize the caching wrapper.
+
+        Args:
+            client: The AsyncTickTickClient to wrap
+            maxsize: Maximum number of cached responses
+                (defaults to TICKTICK_CACHE_SIZE or 256; 0 disables caching)
+            ttls: Per-endpoint TTLs in seconds, keyed by client method name
+                (defaults to the TICKTICK_CACHE_TTL_* environment variables)
+        """
+        self.client = client
+        if maxsize is None:
+            maxsize = int(os.getenv("TICKTICK_CACHE_SIZE", DEFAULT_MAXSIZE))
+        self.ttls = ttls_from_env()
+        self.ttls.update(ttls or {})
+        self.cache = TTLCache(maxsize)
+        # Project ID -> task ID -> task as patched locally (None if removed),
+        # checked when the project data is next fetched
+        self._patched: Dict[str, Dict[str, Optional[Dict]]] = {}
+        self.sync_stats = {"patches": 0, "verified": 0, "mismatches": 0}
+        self._mismatches: deque = deque(maxlen=MISMATCH_HISTORY)
+        # Tag -> number of writes that touched it; a read whose tags were
+        # written to while it was in flight is not cached
+        self._generations: Dict[str, int] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get cache counters, the configured TTLs and local patch counters."""
+        stats = self.cache.get_stats()
+        stats["ttls"] = dict(self.ttls)
+        stats.update(self.sync_stats)
+        stats["unverified_patches"] = sum(len(tasks) for tasks in self._patched.values())
+        stats["recent_mismatches"] = list(self._mismatches)
+        return stats
+
+    def age(self, endpoint: str, *args: Any) -> Optional[float]:
+        """
+        Seconds since the cached answer of a read was fetched from the API.
+
+        Args:
+            endpoint: Cached client method name, e.g. "get_project_with_data"
+            *args: Its arguments
+
+        Returns:
+            The age, or None if the read is not cached
+        """
+        remaining = self.cache.remaining((endpoint,) + args)
+        if remaining is None:
+            return None
+        return max(0.0, self.ttls.get(endpoint, 0) - remaining)
+
+    def invalidate_project(self, project_id: str) -> None:
+        """Drop every cached read belonging to a project."""
+        self._patched.pop(project_id, None)
+        self._invalidate(project_tag(project_id))
+
+    def _invalidate(self, *tags: str) -> None:
+        """Drop every cached read carrying any of the tags, and fence off reads in flight."""
+        self._bump(*tags)
+        self.cache.invalidate(*tags)
+
+    def _bump(self, *tags: str) -> None:
+        for tag in tags:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    def _generation(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def _apply(self, project_id: str, task_id: str, task: Optional[Dict]) -> None:
+        """
+        Apply a successful task mutation to the cached reads of its project.
+
+        Only reads already cached are changed, and they keep their expiry time.
+
+        Args:
+            project_id: ID of the project the task belongs to
+            task_id: ID of the task
+            task: The task as returned by the API, or None if it was completed or deleted
+        """
+        if task is not None and task.get('status') == 2:
+            task = None
+        self._bump(project_tag(project_id))
+        key = ("get_project_with_data", project_id)
+        found, data = self.cache.peek(key)
+        if found:
+            tasks = [cached for cached in data.get('tasks', []) if cached.get('id') != task_id]
+            if task is not None:
+                # An updated task keeps its place; a new one goes last
+                ids = [cached.get('id') for cached in data.get('tasks', [])]
+                tasks.insert(ids.index(task_id) if task_id in ids else len(tasks), task)
+            self.cache.replace(key, {**data, 'tasks': tasks})
+            self._patched.setdefault(project_id, {})[task_id] = task
+            self.sync_stats["patches"] += 1
+
+        if task is not None:
+            self.cache.replace(("get_task", project_id, task_id), task)
+        else:
+            self.cache.discard(("get_task", project_id, task_id))
+
+    def _cached_task(self, project_id: str, task_id: str) -> Optional[Dict]:
+        """A task from the cached project data, without counting a cache lookup."""
+        found, data = self.cache.peek(("get_project_with_data", project_id))
+        if found:
+            for task in data.get('tasks', []):
+                if task.get('id') == task_id:
+                    return task
+        return None
+
+    async def _sync_project_data(self, project_id: str) -> Dict:
+        """Fetch a project's data, checking the tasks patched locally since the last fetch."""
+        # Only patches made before the request went out can be in its answer
+        patched = self._patched.pop(project_id, None)
+        try:
+            data = await self.client.get_project_with_data(project_id)
+        except BaseException:
+            self._restore_patches(project_id, patched)
+            raise
+        if not isinstance(data, dict) or 'error' in data:
+            self._restore_patches(project_id, patched)
+            return data
+        if not patched:
+            return data
+
+        fetched = {task.get('id'): task for task in data.get('tasks', [])}
+        # Tasks patched again during the request are checked on the next fetch
+        repatched = self._patched.get(project_id, {})
+        for task_id, expected in patched.items():
+            if task_id in repatched:
+                continue
+            actual = fetched.get(task_id)
+            if expected is None:
+                differences = ["present"] if actual is not None else []
+            elif actual is None:
+                differences = ["missing"]
+            else:
+                differences = [field for field in SYNC_FIELDS
+                               if (expected.get(field) or None) != (actual.get(field) or None)]
+            if differences:
+                self.sync_stats["mismatches"] += 1
+                self._mismatches.append({"project_id": project_id, "task_id": task_id,
+                                         "fields": differences})
+                logger.warning(f"Locally patched task {task_id} in project {project_id} "
+                               f"differs from the API: {', '.join(differences)}")
+            else:
+                self.sync_stats["verified"] += 1
+        return data
+
+    def _restore_patches(self, project_id: str, patched: Optional[Dict[str, Optional[Dict]]]) -> None:
+        """Put back patches a failed fetch could not check, unless they were patched again since."""
+        for task_id, task in (patched or {}).items():
+            self._patched.setdefault(project_id, {}).setdefault(task_id, task)
+
+    async def _cached(self, endpoint: str, args: Tuple, tags: Iterable[str],
+                      loader: Callable[[], Awaitable[Any]]) -> Any:
+        key = (endpoint,) + args
+        with span("cache.lookup", endpoint=endpoint) as current:
+            found, value = self.cache.get(key)
+            current.set(hit=found)
+        if found:
+            return value
+
+        tags = tuple(tags)
+        generation = self._generation(tags)
+        value = await loader()
+        # Never cache errors, or answers that a write may have made stale while they were in flight
+        if not (isinstance(value, dict) and 'error' in value) and self._generation(tags) == generation:
+            self.cache.set(key, value, self.ttls.get(endpoint, 0), tags)
+        return value
+
+    # Cached reads
+    async def get_projects(self) -> List[Dict]:
+        """Gets all projects for the user."""
+        return await self._cached("get_projects", (), (PROJECTS_TAG,),
+                                  self.client.get_projects)
+
+    async def get_project(self, project_id: str) -> Dict:
+        """Gets a specific project by ID."""
+        return await self._cached("get_project", (project_id,),
+                                  (PROJECTS_TAG, project_tag(project_id)),
+                                  lambda: self.client.get_project(project_id))
+
+    async def get_project_with_data(self, project_id: str) -> Dict:
+        """Gets project with tasks and columns."""
+        return await self._cached("get_project_with_data", (project_id,),
+                                  (project_tag(project_id),),
+                                  lambda: self._sync_project_data(project_id))
+
+    async def get_task(self, project_id: str, task_id: str) -> Dict:
+        """Gets a specific task by project ID and task ID."""
+        return await self._cached("get_task", (project_id, task_id),
+                                  (project_tag(project_id),),
+                                  lambda: self.client.get_task(project_id, task_id))
+
+    # Invalidating writes
+    async def create_project(self, *args, **kwargs) -> Dict:
+        """Creates a new project."""
+        try:
+            return await self.client.create_project(*args, **kwargs)
+        finally:
+            self._invalidate(PROJECTS_TAG)
+
+    async def update_project(self, project_id: str, *args, **kwargs) -> Dict:
+        """Updates an existing project."""
+        try:
+            return await self.client.update_project(project_id, *args, **kwargs)
+        finally:
+            self._invalidate(PROJECTS_TAG)
+            self.invalidate_project(project_id)
+
+    async def delete_project(self, project_id: str) -> Dict:
+        """Deletes a project."""
+        try:
+            return await self.client.delete_project(project_id)
+        finally:
+            self._invalidate(PROJECTS_TAG)
+            self.invalidate_project(project_id)
+
+    # Locally applied writes (anything but a successful result invalidates instead)
+    def _saved(self, project_id: str, task_id: Optional[str], result: Any) -> None:
+        """Apply a create or update result, or invalidate if it failed or moved the task."""
+        if not isinstance(result, dict) or 'error' in result or not result.get('id'):
+            self.invalidate_project(project_id)
+            return
+        saved_in = result.get('projectId') or project_id
+        if saved_in != project_id:
+            self.invalidate_project(project_id)
+            self.invalidate_project(saved_in)
+            return
+        self._apply(project_id, task_id or result['id'], result)
+
+    def _removed(self, project_id: str, task_id: str, result: Any) -> None:
+        """Apply a complete or delete, or invalidate if it failed."""
+        if not isinstance(result, dict) or 'error' in result:
+            self.invalidate_project(project_id)
+        else:
+            self._apply(project_id, task_id, None)
+
+    async def create_task(self, title: str, project_id: str, *args, **kwargs) -> Dict:
+        """Creates a new task."""
+        result = None
+        try:
+            result = await self.client.create_task(title, project_id, *args, **kwargs)
+            return result
+        finally:
+            self._saved(project_id, None, result)
+
+    async def update_task(self, task_id: str, project_id: str, *args, **kwargs) -> Dict:
+        """Updates an existing task."""
+        result = None
+        try:
+            result = await self.client.update_task(task_id, project_id, *args, **kwargs)
+            return result
+        finally:
+            self._saved(project_id, task_id, result)
+
+    async def complete_task(self, project_id: str, task_id: str) -> Dict:
+        """Marks a task as complete."""
+        # Completing a recurring task moves it to its next occurrence, so it is re-read instead
+        cached = self._cached_task(project_id, task_id)
+        recurring = cached is not None and bool(cached.get('repeatFlag'))
+        result = None
+        try:
+            result = await self.client.complete_task(project_id, task_id)
+            return result
+        finally:
+            if recurring:
+                self.invalidate_project(project_id)
+            else:
+                self._removed(project_id, task_id, result)
+
+    async def delete_task(self, project_id: str, task_id: str) -> Dict:
+        """Deletes a task."""
+        result = None
+        try:
+            result = await self.client.delete_task(project_id, task_id)
+            return result
+        finally:
+            self._removed(project_id, task_id, result)
@@ -0,0 +1,517 @@
+"""
+In-memory fake of the TickTick Open API for offline testing and benchmarks.
+
+Implements the endpoints described in ticktick-openapi.md (project and task
+CRUD, /project/{id}/data, task completion and the OAuth token endpoint) on a
+threaded HTTP server from the standard library, with all state kept in memory.
+Latency, 429 and 5xx responses and access token expiry can be injected; random
+choices come from a seeded generator so runs are reproducible.
+
+Point the clients at a running fake with TICKTICK_BASE_URL and
+TICKTICK_TOKEN_URL (see FakeTickTickAPI.base_url and token_url).
+"""
+
+import re
+import json
+import time
+import random
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlsplit
+from typing import Dict, List, Any, Optional, Tuple
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Tokens accepted by a new fake
+DEFAULT_ACCESS_TOKEN = "fake-access-token"
+DEFAULT_REFRESH_TOKEN = "fake-refresh-token"
+
+# expires_in reported for tokens that never expire (TickTick issues ~180 day tokens)
+DEFAULT_EXPIRES_IN = 15552000
+
+# Date format used by the API
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%S+0000"
+
+API_PREFIX = "/open/v1"
+TOKEN_PATH = "/oauth/token"
+STATS_PATH = "/_fake/stats"
+
+# (method, path pattern, handler) for the Open API endpoints, relative to API_PREFIX
+ROUTES = [
+    ("GET", "/project", "_list_projects"),
+    ("POST", "/project", "_create_project"),
+    ("GET", "/project/{id}", "_get_project"),
+    ("POST", "/project/{id}", "_update_project"),
+    ("DELETE", "/project/{id}", "_delete_project"),
+    ("GET", "/project/{id}/data", "_get_project_data"),
+    ("GET", "/project/{id}/task/{id}", "_get_task"),
+    ("DELETE", "/project/{id}/task/{id}", "_delete_task"),
+    ("POST", "/project/{id}/task/{id}/complete", "_complete_task"),
+    ("POST", "/task", "_create_task"),
+    ("POST", "/task/{id}", "_update_task"),
+]
+_ROUTES = [(method, re.compile(re.escape(pattern).replace(r"\{id\}", "([^/]+)") + "$"),
+            f"{method} {pattern}", handler) for method, pattern, handler in ROUTES]
+
+class FakeAPIError(Exception):
+    """An error response from the fake."""
+
+    def __init__(self, status: int, code: str, message: str = ""):
+        super().__init__(message or code)
+        self.status = status
+        self.body = {"errorCode": code, "errorMessage": message or code}
+
+class FakeTickTickAPI:
+    """
+    An in-memory TickTick Open API served over HTTP, with fault injection.
+
+    The fault settings are plain attributes and may be changed while the
+    server is running.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 latency_jitter: float = 0.0, rate_limit_rate: float = 0.0,
+                 retry_after: Optional[float] = 1.0, server_error_rate: float = 0.0,
+                 token_lifetime: Optional[float] = None,
+                 access_token: str = DEFAULT_ACCESS_TOKEN,
+                 refresh_token: str = DEFAULT_REFRESH_TOKEN, seed: int = 0):
+        """
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port)
+            latency: Seconds added to every response
+            latency_jitter: Up to this many further seconds added at random
+            rate_limit_rate: Fraction of API requests answered with 429
+            retry_after: Retry-After seconds sent with 429 responses (None omits the header)
+            server_error_rate: Fraction of API requests answered with 500, 502 or 503
+            token_lifetime: Seconds an access token stays valid, including the
+                initial one (None: tokens never expire)
+            access_token: Access token accepted from the start
+            refresh_token: Refresh token accepted by the token endpoint
+            seed: Seed for injected faults and generated workspaces
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.server_error_rate = server_error_rate
+        self.token_lifetime = token_lifetime
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+
+        self.projects: Dict[str, Dict] = {}
+        self.tasks: Dict[str, Dict[str, Dict]] = {}
+        self.columns: Dict[str, List[Dict]] = {}
+        # Project of each task, for updates that only name the task
+        self._task_projects: Dict[str, str] = {}
+        # Access token -> expiry (epoch seconds, None for never)
+        self._tokens: Dict[str, Optional[float]] = {}
+        self._refresh_tokens = {refresh_token}
+        self._next_id = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self.stats: Counter = Counter()
+
+        self.add_token(access_token)
+
+    # Server lifecycle
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def base_url(self) -> str:
+        """Value for TICKTICK_BASE_URL."""
+        return self.url + API_PREFIX
+
+    @property
+    def token_url(self) -> str:
+        """Value for TICKTICK_TOKEN_URL."""
+        return self.url + TOKEN_PATH
+
+    def _bind(self) -> ThreadingHTTPServer:
+        server = ThreadingHTTPServer((self.host, self.port), _Handler)
+        server.daemon_threads = True
+        server.api = self
+        self.port = server.server_address[1]
+        self._server = server
+        return server
+
+    def start(self) -> "FakeTickTickAPI":
+        """Serve in a background thread and return self."""
+        server = self._bind()
+        self._thread = threading.Thread(target=server.serve_forever, name="fake-ticktick-api",
+                                        daemon=True)
+        self._thread.start()
+        logger.info(f"Fake TickTick API listening at {self.url}")
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve in the calling thread until interrupted."""
+        server = self._bind()
+        logger.info(f"Fake TickTick API listening at {self.url}")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+
+    def stop(self) -> None:
+        """Stop a server started with start()."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # State
+
+    def _new_id(self) -> str:
+        self._next_id += 1
+        return f"{self._next_id:024x}"
+
+    def add_token(self, access_token: str, lifetime: Optional[float] = None) -> None:
+        """Accept an access token, expiring after lifetime (default: token_lifetime) seconds."""
+        lifetime = lifetime if lifetime is not None else self.token_lifetime
+        self._tokens[access_token] = time.time() + lifetime if lifetime is not None else None
+
+    def expire_tokens(self) -> None:
+        """Expire every access token issued so far, as if their lifetime had passed."""
+        with self._lock:
+            for token in self._tokens:
+                self._tokens[token] = 0.0
+
+    def seed_workspace(self, projects: int = 10, tasks_per_project: int = 50,
+                       columns_per_project: int = 0, completed_rate: float = 0.0,
+                       checklist_rate: float = 0.2, today: Optional[datetime] = None) -> None:
+        """
+        Add generated projects and tasks.
+
+        Titles, priorities, dates, tags and subtasks come from the seeded
+        generator, so the same seed and arguments give the same workspace.
+
+        Args:
+            projects: Number of projects to add
+            tasks_per_project: Number of tasks per project
+            columns_per_project: Number of kanban columns per project
+            completed_rate: Fraction of tasks that are completed (and left out
+                of the project data, as the real API does)
+            checklist_rate: Fraction of tasks with checklist items
+            today: Day that due dates are spread around (default: today, UTC)
+        """
+        rng = self._random
+        today = (today or datetime.now(timezone.utc)).replace(hour=0, minute=0, second=0, microsecond=0)
+        words = ("review", "draft", "plan", "call", "email", "fix", "buy", "book", "write",
+                 "update", "report", "budget", "meeting", "invoice", "groceries", "release")
+        tags = ("work", "home", "errand", "urgent", "later")
+
+        with self._lock:
+            for p in range(projects):
+                project_id = self._new_id()
+                self.projects[project_id] = {
+                    "id": project_id,
+                    "name": f"Project {len(self.projects) + 1}",
+                    "color": f"#{rng.randrange(0x1000000):06X}",
+                    "closed": False,
+                    "viewMode": "kanban" if columns_per_project else "list",
+                    "permission": "write",
+                    "kind": "TASK",
+                    "sortOrder": p
+                }
+                self.tasks[project_id] = {}
+                self.columns[project_id] = [
+                    {"id": self._new_id(), "projectId": project_id, "name": f"Column {c + 1}",
+                     "sortOrder": c}
+                    for c in range(columns_per_project)
+                ]
+
+                for t in range(tasks_per_project):
+                    task_id = self._new_id()
+                    task = {
+                        "id": task_id,
+                        "projectId": project_id,
+                        "title": " ".join(rng.choice(words) for _ in range(rng.randint(2, 5))).capitalize(),
+                        "content": f"Notes for task {t + 1}" if rng.random() < 0.3 else "",
+                        "priority": rng.choice((0, 0, 1, 3, 5)),
+                        "status": 2 if rng.random() < completed_rate else 0,
+                        "sortOrder": t,
+                        "isAllDay": True,
+                        "timeZone": "UTC"
+                    }
+                    if rng.random() < 0.7:
+                        due = today + timedelta(days=rng.randint(-30, 60))
+                        task["startDate"] = due.strftime(DATE_FORMAT)
+                        task["dueDate"] = due.strftime(DATE_FORMAT)
+                    if rng.random() < 0.3:
+                        task["tags"] = rng.sample(tags, rng.randint(1, 2))
+                    if rng.random() < checklist_rate:
+                        task["items"] = [
+                            {"id": self._new_id(), "title": f"Step {i + 1}", "status": 0, "sortOrder": i}
+                            for i in range(rng.randint(1, 4))
+                        ]
+                    if self.columns[project_id]:
+                        task["columnId"] = rng.choice(self.columns[project_id])["id"]
+                    if task["status"] == 2:
+                        task["completedTime"] = today.strftime(DATE_FORMAT)
+                    self.tasks[project_id][task_id] = task
+                    self._task_projects[task_id] = project_id
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request and injected fault counters and the size of the workspace."""
+        with self._lock:
+            return self._stats()
+
+    def _stats(self) -> Dict[str, Any]:
+        return {
+            "counters": dict(self.stats),
+            "projects": len(self.projects),
+            "tasks": len(self._task_projects)
+        }
+
+    # Request handling
+
+    def _delay(self) -> float:
+        if not self.latency_jitter:
+            return self.latency
+        with self._lock:
+            return self.latency + self._random.uniform(0, self.latency_jitter)
+
+    def handle(self, method: str, path: str, headers: Dict[str, str],
+               body: bytes) -> Tuple[int, bytes, Dict[str, str]]:
+        """
+        Answer one request.
+
+        Returns:
+            A (status, response body, extra headers) tuple
+        """
+        path = urlsplit(path).path
+        delay = self._delay()
+        if delay > 0:
+            time.sleep(delay)
+
+        with self._lock:
+            self.stats["requests"] += 1
+            try:
+                if path == TOKEN_PATH and method == "POST":
+                    status, payload, extra = 200, self._issue_tokens(headers, body), {}
+                elif path == STATS_PATH and method == "GET":
+                    status, payload, extra = 200, self._stats(), {}
+                else:
+                    status, payload, extra = self._handle_api(method, path, headers, body)
+            except FakeAPIError as e:
+                self.stats[f"status_{e.status}"] += 1
+                status, payload, extra = e.status, e.body, {}
+            # Serialize before releasing the lock, as payloads share the stored objects
+            content = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        return status, content, extra
+
+    def _handle_api(self, method: str, path: str, headers: Dict[str, str],
+                    body: bytes) -> Tuple[int, Optional[Any], Dict[str, str]]:
+        if not path.startswith(API_PREFIX):
+            raise FakeAPIError(404, "not_found", path)
+        endpoint = path[len(API_PREFIX):]
+        for route_method, pattern, route, handler in _ROUTES:
+            match = pattern.match(endpoint)
+            if match and route_method == method:
+                break
+        else:
+            raise FakeAPIError(404, "not_found", f"{method} {path}")
+
+        self.stats[route] += 1
+        self._check_token(headers.get("authorization", ""))
+
+        # Injected faults, after authentication like the real API
+        if self.rate_limit_rate and self._random.random() < self.rate_limit_rate:
+            self.stats["injected_429"] += 1
+            extra = {"Retry-After": f"{self.retry_after:g}"} if self.retry_after is not None else {}
+            return 429, {"errorCode": "exceed_query_limit", "errorMessage": "Too many requests"}, extra
+        if self.server_error_rate and self._random.random() < self.server_error_rate:
+            status = self._random.choice((500, 502, 503))
+            self.stats["injected_5xx"] += 1
+            return status, {"errorCode": "server_error", "errorMessage": "Injected failure"}, {}
+
+        data = json.loads(body) if body else {}
+        result = getattr(self, handler)(data, *match.groups())
+        return 200, result, {}
+
+    def _check_token(self, authorization: str) -> None:
+        token = authorization[len("Bearer "):] if authorization.startswith("Bearer ") else None
+        if token not in self._tokens:
+            self.stats["unauthorized"] += 1
+            raise FakeAPIError(401, "unauthorized", "Missing or unknown access token")
+        expires_at = self._tokens[token]
+        if expires_at is not None and time.time() >= expires_at:
+            self.stats["expired_tokens"] += 1
+            raise FakeAPIError(401, "unauthorized", "Access token expired")
+
+    def _issue_tokens(self, headers: Dict[str, str], body: bytes) -> Dict[str, Any]:
+        if not headers.get("authorization", "").startswith("Basic "):
+            raise FakeAPIError(401, "invalid_client", "Client credentials must use Basic auth")
+        form = {key: values[0] for key, values in parse_qs(body.decode("utf-8")).items()}
+        grant_type = form.get("grant_type")
+        if grant_type == "refresh_token":
+            if form.get("refresh_token") not in self._refresh_tokens:
+                raise FakeAPIError(400, "invalid_grant", "Unknown refresh token")
+        elif grant_type == "authorization_code":
+            if not form.get("code"):
+                raise FakeAPIError(400, "invalid_request", "Missing code")
+        else:
+            raise FakeAPIError(400, "unsupported_grant_type", str(grant_type))
+
+        access_token = f"fake-{self._new_id()}"
+        refresh_token = form.get("refresh_token") or f"fake-refresh-{self._new_id()}"
+        self._refresh_tokens.add(refresh_token)
+        self.add_token(access_token)
+        self.stats["tokens_issued"] += 1
+        return {
+            "access_token": access_token,
+            "token_type": "bearer",
+            "refresh_token": refresh_token,
+            "expires_in": int(self.token_lifetime) if self.token_lifetime is not None else DEFAULT_EXPIRES_IN,
+            "scope": "tasks:read tasks:write"
+        }
+
+    # Open API endpoints (called with the JSON body and the path IDs, holding the lock)
+
+    def _project(self, project_id: str) -> Dict:
+        project = self.projects.get(project_id)
+        if project is None:
+            raise FakeAPIError(404, "project_not_found", project_id)
+        return project
+
+    def _task(self, project_id: str, task_id: str) -> Dict:
+        task = self.tasks.get(project_id, {}).get(task_id)
+        if task is None:
+            raise FakeAPIError(404, "task_not_found", task_id)
+        return task
+
+    def _list_projects(self, data: Dict) -> List[Dict]:
+        return list(self.projects.values())
+
+    def _create_project(self, data: Dict) -> Dict:
+        if not data.get("name"):
+            raise FakeAPIError(400, "invalid_request", "name is required")
+        project_id = self._new_id()
+        project = {"color": None, "closed": False, "viewMode": "list", "permission": "write",
+                   "sortOrder": 0}
+        project.update(data)
+        project.update(id=project_id, kind=str(data.get("kind") or "TASK").upper())
+        self.projects[project_id] = project
+        self.tasks[project_id] = {}
+        self.columns[project_id] = []
+        return project
+
+    def _get_project(self, data: Dict, project_id: str) -> Dict:
+        return self._project(project_id)
+
+    def _update_project(self, data: Dict, project_id: str) -> Dict:
+        project = self._project(project_id)
+        project.update({key: value for key, value in data.items() if key != "id"})
+        return project
+
+    def _delete_project(self, data: Dict, project_id: str) -> None:
+        self._project(project_id)
+        del self.projects[project_id]
+        for task_id in self.tasks.pop(project_id, {}):
+            self._task_projects.pop(task_id, None)
+        self.columns.pop(project_id, None)
+
+    def _get_project_data(self, data: Dict, project_id: str) -> Dict:
+        return {
+            "project": self._project(project_id),
+            "tasks": [task for task in self.tasks[project_id].values() if task.get("status") != 2],
+            "columns": self.columns[project_id]
+        }
+
+    def _get_task(self, data: Dict, project_id: str, task_id: str) -> Dict:
+        return self._task(project_id, task_id)
+
+    def _delete_task(self, data: Dict, project_id: str, task_id: str) -> None:
+        self._task(project_id, task_id)
+        del self.tasks[project_id][task_id]
+        del self._task_projects[task_id]
+
+    def _complete_task(self, data: Dict, project_id: str, task_id: str) -> None:
+        task = self._task(project_id, task_id)
+        task["status"] = 2
+        task["completedTime"] = datetime.now(timezone.utc).strftime(DATE_FORMAT)
+
+    def _create_task(self, data: Dict) -> Dict:
+        if not data.get("title"):
+            raise FakeAPIError(400, "invalid_request", "title is required")
+        project_id = data.get("projectId")
+        self._project(project_id)
+        task_id = self._new_id()
+        task = {"status": 0, "priority": 0, "sortOrder": len(self.tasks[project_id])}
+        task.update(data)
+        task["id"] = task_id
+        self.tasks[project_id][task_id] = task
+        self._task_projects[task_id] = project_id
+        return task
+
+    def _update_task(self, data: Dict, task_id: str) -> Dict:
+        project_id = self._task_projects.get(task_id)
+        if project_id is None:
+            raise FakeAPIError(404, "task_not_found", task_id)
+        task = self.tasks[project_id][task_id]
+        # Check the target project before changing anything
+        new_project_id = data.get("projectId") or project_id
+        if new_project_id != project_id:
+            self._project(new_project_id)
+        task.update({key: value for key, value in data.items() if key != "id"})
+
+        # Move the task if the update names another project
+        if new_project_id != project_id:
+            del self.tasks[project_id][task_id]
+            self.tasks[new_project_id][task_id] = task
+            self._task_projects[task_id] = new_project_id
+        return task
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; avoid Nagle/delayed-ACK stalls
+    disable_nagle_algorithm = True
+
+    def _respond(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        headers = {key.lower(): value for key, value in self.headers.items()}
+        try:
+            status, content, extra = self.server.api.handle(self.command, self.path, headers, body)
+        except Exception as e:
+            logger.exception(f"Fake API request failed: {e}")
+            status, content, extra = 500, b"", {}
+
+        try:
+            self.send_response(status)
+            if content:
+                self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            for key, value in extra.items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(content)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on the request (e.g. a timeout or shutdown)
+            self.close_connection = True
+
+    do_GET = do_POST = do_DELETE = _respond
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"{self.address_string()} {format % args}")
@@ -0,0 +1,248 @@
+"""
+Rendering of TickTick records for tool responses.
+
+Records can be rendered as human-readable text (the default), compact JSON or
+TSV. The compact modes support field projection, so listing tools can return
+only the fields the caller needs.
+"""
+
+import os
+import json
+from typing import Dict, List, Any, Optional, Tuple, Callable
+
+from .tracing import span
+
+# Supported output formats
+OUTPUT_FORMATS = ("text", "json", "tsv")
+
+# Fields returned by the compact formats when no projection is given
+DEFAULT_FIELDS = {
+    "task": ["id", "projectId", "title", "startDate", "dueDate", "priority", "status"],
+    "project": ["id", "name", "color", "viewMode", "closed", "kind"],
+    "match": ["id", "projectId", "title", "score"]
+}
+
+# Server-wide output format set by the CLI (falls back to TICKTICK_OUTPUT_FORMAT)
+_default_output_format = None
+
+# Format a task object from TickTick for better display
+def format_task(task: Dict) -> str:
+    """Format a task into a human-readable string."""
+    formatted = f"Title: {task.get('title', 'No title')}\n"
+    
+    # Add project ID
+    formatted += f"Project ID: {task.get('projectId', 'None')}\n"
+    
+    # Add dates if available
+    if task.get('startDate'):
+        formatted += f"Start Date: {task.get('startDate')}\n"
+    if task.get('dueDate'):
+        formatted += f"Due Date: {task.get('dueDate')}\n"
+    
+    # Add priority if available
+    priority_map = {0: "None", 1: "Low", 3: "Medium", 5: "High"}
+    priority = task.get('priority', 0)
+    formatted += f"Priority: {priority_map.get(priority, str(priority))}\n"
+    
+    # Add status if available
+    status = "Completed" if task.get('status') == 2 else "Active"
+    formatted += f"Status: {status}\n"
+    
+    # Add content if available
+    if task.get('content'):
+        formatted += f"\nContent:\n{task.get('content')}\n"
+    
+    # Add subtasks if available
+    items = task.get('items', [])
+    if items:
+        lines = [f"\nSubtasks ({len(items)}):\n"]
+        for i, item in enumerate(items, 1):
+            status = "✓" if item.get('status') == 1 else "□"
+            lines.append(f"{i}. [{status}] {item.get('title', 'No title')}\n")
+        formatted += "".join(lines)
+    
+    return formatted
+
+# Format a project object from TickTick for better display
+def format_project(project: Dict) -> str:
+    """Format a project into a human-readable string."""
+    formatted = f"Name: {project.get('name', 'No name')}\n"
+    formatted += f"ID: {project.get('id', 'No ID')}\n"
+    
+    # Add color if available
+    if project.get('color'):
+        formatted += f"Color: {project.get('color')}\n"
+    
+    # Add view mode if available
+    if project.get('viewMode'):
+        formatted += f"View Mode: {project.get('viewMode')}\n"
+    
+    # Add closed status if available
+    if 'closed' in project:
+        formatted += f"Closed: {'Yes' if project.get('closed') else 'No'}\n"
+    
+    # Add kind if available
+    if project.get('kind'):
+        formatted += f"Kind: {project.get('kind')}\n"
+    
+    return formatted
+
+# Format a fuzzy search match for better display
+def format_match(match: Dict) -> str:
+    """Format a find_tasks match into a human-readable string."""
+    return (f"Title: {match.get('title') or 'No title'}\n"
+            f"Task ID: {match.get('id')}\n"
+            f"Project ID: {match.get('projectId')}\n"
+            f"Score: {match.get('score')} (similarity {match.get('similarity')})\n")
+
+# Format a queued task update for better display
+def format_queued_update(record: Dict) -> str:
+    """Format the acknowledgement of a write-behind task update into a human-readable string."""
+    changes = ", ".join(f"{name}={record[name]!r}" for name in
+                        ("title", "content", "startDate", "dueDate", "priority") if name in record)
+    return (f"Task ID: {record.get('id')}\n"
+            f"Project ID: {record.get('projectId')}\n"
+            f"Pending changes: {changes or 'none'}\n"
+            f"Updates combined: {record.get('updates', 1)}\n")
+
+def format_unsent_updates(failures: List[Dict]) -> str:
+    """Format write-behind updates of a task that could not be sent into a warning."""
+    lines = [f"Warning: {len(failures)} queued update(s) of this task were not applied by TickTick:"]
+    for failure in failures:
+        changes = ", ".join(f"{name}={value!r}" for name, value in failure.get('changes', {}).items())
+        lines.append(f"- {changes or 'no changes'}: {failure.get('error')}")
+    return "\n".join(lines) + "\n"
+
+def render_page(noun: str, items: List[Dict], formatter, total: int, offset: int = 0,
+                next_cursor: Optional[str] = None, tool_name: str = None, scope: str = "") -> str:
+    """
+    Render a page of formatted items in linear time.
+    
+    Args:
+        noun: Singular item name, e.g. "task"
+        items: Items on this page
+        formatter: Function formatting a single item
+        total: Total number of items across all pages
+        offset: Position of the first item of this page
+        next_cursor: Cursor for the next page, if any
+        tool_name: Tool to call with next_cursor to continue
+        scope: Text appended to the heading, e.g. " in project 'Work'"
+    """
+    if offset == 0 and not next_cursor:
+        parts = [f"Found {total} {noun}s{scope}:\n\n"]
+    else:
+        parts = [f"Showing {noun}s {offset + 1}-{offset + len(items)} of {total}{scope}:\n\n"]
+    
+    label = noun.capitalize()
+    for i, item in enumerate(items, offset + 1):
+        parts.append(f"{label} {i}:\n")
+        parts.append(formatter(item))
+        parts.append("\n")
+    
+    if next_cursor:
+        parts.append(f"More {noun}s available. Call {tool_name} with cursor=\"{next_cursor}\" to continue.\n")
+    return "".join(parts)
+
+def set_default_output_format(output_format: Optional[str]) -> None:
+    """
+    Set the server-wide output format used when a tool call does not specify one.
+    
+    Raises:
+        ValueError: If the format is not supported
+    """
+    global _default_output_format
+    if output_format is not None and output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Invalid output format. Must be one of: {', '.join(OUTPUT_FORMATS)}.")
+    _default_output_format = output_format
+
+def get_default_output_format() -> str:
+    """Get the server-wide output format."""
+    return _default_output_format or os.getenv("TICKTICK_OUTPUT_FORMAT") or "text"
+
+def resolve_output(output_format: Optional[str], fields: Optional[str],
+                   noun: str) -> Tuple[str, List[str]]:
+    """
+    Resolve a tool call's output_format and fields arguments.
+    
+    Args:
+        output_format: "text", "json", "tsv" or None for the server-wide default
+        fields: Comma-separated field names to include in compact formats, or None
+        noun: Record type ("task", "project" or "match"), used for the default fields
+    
+    Returns:
+        An (output_format, fields) tuple
+    
+    Raises:
+        ValueError: If the output format is not supported
+    """
+    output_format = (output_format or get_default_output_format()).lower()
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Invalid output_format. Must be one of: {', '.join(OUTPUT_FORMATS)}.")
+    
+    selected = [name.strip() for name in fields.split(",") if name.strip()] if fields else []
+    return output_format, selected or list(DEFAULT_FIELDS.get(noun, []))
+
+def project_record(record: Dict, fields: List[str]) -> Dict:
+    """Keep only the given fields of a record (missing fields are omitted)."""
+    return {name: record[name] for name in fields if name in record}
+
+def _tsv_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+def render_tsv(items: List[Dict], fields: List[str]) -> List[str]:
+    """Render records as TSV lines: a header row followed by one row per record."""
+    lines = ["\t".join(fields)]
+    for item in items:
+        lines.append("\t".join(_tsv_value(item.get(name)) for name in fields))
+    return lines
+
+def render_items(noun: str, items: List[Dict], formatter: Callable[[Dict], str], total: int,
+                 offset: int = 0, next_cursor: Optional[str] = None, tool_name: str = None,
+                 scope: str = "", output_format: str = "text", fields: List[str] = None,
+                 notes: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Render a page of records in the requested output format.
+    
+    Text output is produced by render_page. JSON output is a single compact object
+    with total, offset, next_cursor, any notes and the projected items. TSV output
+    is a header row and one row per record, followed by "#name<TAB>value" lines for
+    next_cursor (when more pages exist) and any notes.
+    
+    Args:
+        notes: Extra values for the compact formats, such as projects that could not be read
+    """
+    with span("render", format=output_format, items=len(items)):
+        notes = {name: value for name, value in (notes or {}).items() if value}
+        if output_format == "json":
+            page = {"total": total, "offset": offset, "next_cursor": next_cursor}
+            page.update(notes)
+            page["items"] = [project_record(item, fields) for item in items]
+            return json.dumps(page, separators=(",", ":"), ensure_ascii=False)
+        
+        if output_format == "tsv":
+            lines = render_tsv(items, fields)
+            if next_cursor:
+                notes = dict(next_cursor=next_cursor, **notes)
+            for name, value in notes.items():
+                lines.append(f"#{name}\t{_tsv_value(value)}")
+            return "\n".join(lines) + "\n"
+        
+        return render_page(noun, items, formatter, total, offset, next_cursor, tool_name, scope)
+
+def render_item(item: Dict, formatter: Callable[[Dict], str], output_format: str = "text",
+                fields: List[str] = None, heading: str = "") -> str:
+    """Render a single record in the requested output format."""
+    with span("render", format=output_format, items=1):
+        if output_format == "json":
+            return json.dumps(project_record(item, fields), separators=(",", ":"), ensure_ascii=False)
+        
+        if output_format == "tsv":
+            return "\n".join(render_tsv([item], fields)) + "\n"
+        
+        return heading + formatter(item)
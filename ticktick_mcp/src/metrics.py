@@ -0,0 +1,249 @@
+"""
+Lightweight in-process metrics for the TickTick client and MCP tools.
+
+Counters and fixed-bucket histograms are plain dictionaries updated inline,
+so recording a sample costs a couple of microseconds and the metrics can stay
+on in production. Values that other components already count (retries, token
+refreshes, cache hits, ...) are read from them by collectors when the metrics
+are rendered, instead of being counted twice. The registry renders as a JSON
+snapshot or in the Prometheus text exposition format.
+"""
+
+import re
+import asyncio
+import logging
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple, Callable, Iterable
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Latency histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# A collected sample: (name, type, help, labels, value)
+Sample = Tuple[str, str, str, Dict[str, str], float]
+
+class Counter:
+    """A monotonically increasing value per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1.0) -> None:
+        """Add amount to the series for the given label values."""
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [{"labels": dict(zip(self.labelnames, labels)), "value": value}
+                for labels, value in self.values.items()]
+
+class Histogram:
+    """Counts of observations per bucket, with their sum, per label combination."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self.series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        """Record one observation for the given label values."""
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def cumulative(self, labels: Tuple[str, ...]) -> List[Tuple[str, int]]:
+        """Cumulative (upper bound, count) pairs for a series, ending with +Inf."""
+        counts, _, _ = self.series[labels]
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else f"{bound:g}", total))
+        return result
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [{
+            "labels": dict(zip(self.labelnames, labels)),
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else 0.0,
+            "buckets": dict(self.cumulative(labels))
+        } for labels, (_, total, count) in self.series.items()]
+
+class MetricsRegistry:
+    """Holds named metrics and collectors, and renders them."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        """Get or create a counter."""
+        if name not in self._metrics:
+            self._metrics[name] = Counter(name, documentation, labelnames)
+        return self._metrics[name]
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        """Get or create a histogram."""
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, documentation, labelnames, buckets)
+        return self._metrics[name]
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        """Register a function producing samples when the metrics are rendered."""
+        self._collectors.append(collector)
+
+    def reset(self) -> None:
+        """Drop every recorded value (collectors are kept)."""
+        for metric in self._metrics.values():
+            if isinstance(metric, Histogram):
+                metric.series.clear()
+            else:
+                metric.values.clear()
+
+    def collect(self) -> List[Sample]:
+        """Run the collectors, skipping any that fail."""
+        samples = []
+        for collector in self._collectors:
+            try:
+                samples.extend(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+        return samples
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get every metric as a JSON-serializable dictionary."""
+        result = {name: metric.snapshot() for name, metric in self._metrics.items()}
+        for name, _, _, labels, value in self.collect():
+            result.setdefault(name, []).append({"labels": labels, "value": value})
+        return result
+
+    def render_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            if isinstance(metric, Histogram):
+                for labels, (_, total, count) in metric.series.items():
+                    base = dict(zip(metric.labelnames, labels))
+                    for bound, cumulative in metric.cumulative(labels):
+                        lines.append(f"{name}_bucket{_labels(dict(base, le=bound))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(base)} {total:.6f}")
+                    lines.append(f"{name}_count{_labels(base)} {count}")
+            else:
+                for labels, value in metric.values.items():
+                    lines.append(f"{name}{_labels(dict(zip(metric.labelnames, labels)))} {value:g}")
+
+        described = set()
+        for name, kind, documentation, labels, value in self.collect():
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name}{_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+# Path segments following these are IDs
+_ID_SEGMENTS = re.compile(r"/(project|task)/[^/]+")
+
+@lru_cache(maxsize=1024)
+def endpoint_template(endpoint: str) -> str:
+    """Replace the IDs in an API endpoint so metrics are grouped per endpoint, e.g. /project/{id}/data."""
+    return _ID_SEGMENTS.sub(r"/\1/{id}", endpoint)
+
+# Process-wide registry and the metrics recorded inline
+REGISTRY = MetricsRegistry()
+
+HTTP_DURATION = REGISTRY.histogram(
+    "ticktick_http_request_duration_seconds", "TickTick API request latency per attempt.",
+    ("method", "endpoint"))
+HTTP_RESPONSES = REGISTRY.counter(
+    "ticktick_http_responses_total", "TickTick API responses by status code ('error' for transport failures).",
+    ("method", "endpoint", "status"))
+HTTP_SENT_BYTES = REGISTRY.counter(
+    "ticktick_http_sent_bytes_total", "Request body bytes sent to the TickTick API.",
+    ("method", "endpoint"))
+HTTP_RECEIVED_BYTES = REGISTRY.counter(
+    "ticktick_http_received_bytes_total", "Response body bytes received from the TickTick API.",
+    ("method", "endpoint"))
+TOOL_DURATION = REGISTRY.histogram(
+    "ticktick_tool_duration_seconds", "MCP tool call latency.", ("tool",))
+TOOL_CALLS = REGISTRY.counter(
+    "ticktick_tool_calls_total", "MCP tool calls by outcome (ok, rejected or error).", ("tool", "outcome"))
+
+def record_http(method: str, endpoint: str, status: Any, elapsed: float,
+                sent_bytes: int = 0, received_bytes: int = 0) -> None:
+    """Record one HTTP attempt against the TickTick API."""
+    labels = (method, endpoint_template(endpoint))
+    HTTP_DURATION.observe(labels, elapsed)
+    HTTP_RESPONSES.inc(labels + (str(status),))
+    if sent_bytes:
+        HTTP_SENT_BYTES.inc(labels, sent_bytes)
+    if received_bytes:
+        HTTP_RECEIVED_BYTES.inc(labels, received_bytes)
+
+def record_tool(tool: str, outcome: str, elapsed: float) -> None:
+    """Record one MCP tool call."""
+    TOOL_DURATION.observe((tool,), elapsed)
+    TOOL_CALLS.inc((tool, outcome))
+
+async def start_metrics_server(host: str, port: int,
+                               registry: MetricsRegistry = REGISTRY) -> asyncio.AbstractServer:
+    """
+    Serve the registry in the Prometheus text format at http://host:port/metrics.
+
+    Returns:
+        The running server; close it to stop serving
+    """
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            # Skip the request headers
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.split()
+            path = parts[1].split(b"?")[0] if len(parts) > 1 else b""
+            if path in (b"/metrics", b"/"):
+                status, body = "200 OK", registry.render_prometheus().encode("utf-8")
+            else:
+                status, body = "404 Not Found", b"Not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode("ascii") + body)
+            await writer.drain()
+        except Exception as e:
+            logger.debug(f"Metrics request failed: {e}")
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info(f"Serving Prometheus metrics at http://{host}:{port}/metrics")
+    return server
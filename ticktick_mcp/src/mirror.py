@@ -0,0 +1,403 @@
+"""
+Local SQLite mirror of TickTick projects and tasks.
+
+The mirror stores Project, Task, ChecklistItem and Column records (as described
+in ticktick-openapi.md) in a WAL-mode SQLite database so the server can answer
+read tools locally. Each project list and each project's data carries its own
+sync timestamp: the time the data was fetched from the API, which may be
+earlier than the time it was stored when it came through a cache. Reads only
+return mirrored data younger than ``max_age`` and fall through to the API
+otherwise.
+"""
+
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Any, Optional
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Default freshness bound in seconds
+DEFAULT_MAX_AGE = 60.0
+
+# Sync-state scope for the project list
+PROJECTS_SCOPE = "__projects__"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    color TEXT,
+    sort_order INTEGER,
+    closed INTEGER,
+    group_id TEXT,
+    view_mode TEXT,
+    permission TEXT,
+    kind TEXT,
+    raw TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    project_id TEXT NOT NULL,
+    title TEXT,
+    content TEXT,
+    "desc" TEXT,
+    is_all_day INTEGER,
+    start_date TEXT,
+    due_date TEXT,
+    time_zone TEXT,
+    repeat_flag TEXT,
+    priority INTEGER,
+    status INTEGER,
+    completed_time TEXT,
+    sort_order INTEGER,
+    raw TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_project ON tasks (project_id);
+CREATE TABLE IF NOT EXISTS checklist_items (
+    id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    title TEXT,
+    status INTEGER,
+    completed_time TEXT,
+    is_all_day INTEGER,
+    sort_order INTEGER,
+    start_date TEXT,
+    time_zone TEXT,
+    PRIMARY KEY (task_id, id)
+);
+CREATE TABLE IF NOT EXISTS columns (
+    id TEXT PRIMARY KEY,
+    project_id TEXT NOT NULL,
+    name TEXT,
+    sort_order INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_columns_project ON columns (project_id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    scope TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL
+);
+"""
+
+class TaskMirror:
+    """
+    SQLite-backed mirror of projects, tasks, checklist items and columns.
+    """
+
+    def __init__(self, path: str, max_age: float = DEFAULT_MAX_AGE):
+        """
+        Open (and create if needed) the mirror database.
+
+        Args:
+            path: Path to the SQLite database file
+            max_age: Maximum age in seconds of mirrored data served to readers
+        """
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    # Freshness tracking
+    def _synced_at(self, scope: str) -> Optional[float]:
+        row = self._conn.execute(
+            "SELECT synced_at FROM sync_state WHERE scope = ?", (scope,)).fetchone()
+        return row[0] if row else None
+
+    def _mark_synced(self, scope: str, fetched_at: Optional[float] = None) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sync_state (scope, synced_at) VALUES (?, ?)",
+            (scope, fetched_at if fetched_at is not None else time.time()))
+
+    def _is_fresh(self, scope: str) -> bool:
+        synced_at = self._synced_at(scope)
+        return synced_at is not None and time.time() - synced_at <= self.max_age
+
+    def age(self, project_id: Optional[str] = None) -> Optional[float]:
+        """
+        Get the age in seconds of the mirrored project list or project data.
+
+        Args:
+            project_id: Project to check, or None for the project list
+
+        Returns:
+            Seconds since the last sync, or None if never synced
+        """
+        with self._lock:
+            synced_at = self._synced_at(project_id or PROJECTS_SCOPE)
+        return time.time() - synced_at if synced_at is not None else None
+
+    def invalidate(self, project_id: Optional[str] = None) -> None:
+        """
+        Mark the project list or a project's data as stale.
+
+        Args:
+            project_id: Project to invalidate, or None for the project list
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM sync_state WHERE scope = ?",
+                               (project_id or PROJECTS_SCOPE,))
+
+    # Reads
+    def get_projects(self) -> Optional[List[Dict]]:
+        """
+        Get all mirrored projects.
+
+        Returns:
+            The project list, or None if it is missing or older than max_age
+        """
+        with self._lock:
+            if not self._is_fresh(PROJECTS_SCOPE):
+                return None
+            rows = self._conn.execute(
+                "SELECT raw FROM projects ORDER BY sort_order, rowid").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get_project(self, project_id: str) -> Optional[Dict]:
+        """
+        Get a mirrored project.
+
+        Returns:
+            The project, or None if it is not mirrored or older than max_age
+        """
+        with self._lock:
+            if not (self._is_fresh(PROJECTS_SCOPE) or self._is_fresh(project_id)):
+                return None
+            row = self._conn.execute(
+                "SELECT raw FROM projects WHERE id = ?", (project_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_project_data(self, project_id: str) -> Optional[Dict]:
+        """
+        Get a mirrored project with its tasks and columns.
+
+        Returns:
+            A ProjectData dictionary, or None if it is missing or older than max_age
+        """
+        with self._lock:
+            if not self._is_fresh(project_id):
+                return None
+            project = self._conn.execute(
+                "SELECT raw FROM projects WHERE id = ?", (project_id,)).fetchone()
+            tasks = self._conn.execute(
+                "SELECT raw FROM tasks WHERE project_id = ? ORDER BY sort_order, rowid",
+                (project_id,)).fetchall()
+            columns = self._conn.execute(
+                "SELECT id, project_id, name, sort_order FROM columns "
+                "WHERE project_id = ? ORDER BY sort_order", (project_id,)).fetchall()
+
+        return {
+            "project": json.loads(project[0]) if project else {"id": project_id},
+            "tasks": [json.loads(row[0]) for row in tasks],
+            "columns": [
+                {"id": row[0], "projectId": row[1], "name": row[2], "sortOrder": row[3]}
+                for row in columns
+            ]
+        }
+
+    def get_task(self, project_id: str, task_id: str) -> Optional[Dict]:
+        """
+        Get a mirrored task.
+
+        Returns:
+            The task, or None if it is not mirrored or its project is older than max_age
+        """
+        with self._lock:
+            if not self._is_fresh(project_id):
+                return None
+            row = self._conn.execute(
+                "SELECT raw FROM tasks WHERE id = ? AND project_id = ?",
+                (task_id, project_id)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # Writes
+    def _upsert_project(self, project: Dict) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO projects (id, name, color, sort_order, closed, group_id, "
+            "view_mode, permission, kind, raw) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (project.get('id'), project.get('name'), project.get('color'),
+             project.get('sortOrder'), int(bool(project.get('closed'))), project.get('groupId'),
+             project.get('viewMode'), project.get('permission'), project.get('kind'),
+             json.dumps(project, sort_keys=True)))
+
+    def _upsert_task(self, task: Dict) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO tasks (id, project_id, title, content, \"desc\", is_all_day, "
+            "start_date, due_date, time_zone, repeat_flag, priority, status, completed_time, "
+            "sort_order, raw) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (task.get('id'), task.get('projectId'), task.get('title'), task.get('content'),
+             task.get('desc'), int(bool(task.get('isAllDay'))), task.get('startDate'),
+             task.get('dueDate'), task.get('timeZone'), task.get('repeatFlag'),
+             task.get('priority'), task.get('status'), task.get('completedTime'),
+             task.get('sortOrder'), json.dumps(task, sort_keys=True)))
+        self._conn.execute("DELETE FROM checklist_items WHERE task_id = ?", (task.get('id'),))
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO checklist_items (id, task_id, title, status, completed_time, "
+            "is_all_day, sort_order, start_date, time_zone) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(item.get('id'), task.get('id'), item.get('title'), item.get('status'),
+              item.get('completedTime'), int(bool(item.get('isAllDay'))), item.get('sortOrder'),
+              item.get('startDate'), item.get('timeZone'))
+             for item in task.get('items') or []])
+
+    def _delete_tasks(self, task_ids: List[str]) -> None:
+        self._conn.executemany("DELETE FROM tasks WHERE id = ?", [(i,) for i in task_ids])
+        self._conn.executemany("DELETE FROM checklist_items WHERE task_id = ?",
+                               [(i,) for i in task_ids])
+
+    def store_projects(self, projects: List[Dict], fetched_at: Optional[float] = None) -> Dict[str, int]:
+        """
+        Replace the mirrored project list, dropping projects that no longer exist.
+
+        Args:
+            projects: The full project list from the API
+            fetched_at: Time (time.time()) the list was fetched from the API (defaults to now)
+
+        Returns:
+            Counts of upserted and removed projects
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                known = {row[0] for row in self._conn.execute("SELECT id FROM projects")}
+                current = {project.get('id') for project in projects}
+                for project in projects:
+                    self._upsert_project(project)
+                removed = known - current
+                for project_id in removed:
+                    self._remove_project(project_id)
+                self._mark_synced(PROJECTS_SCOPE, fetched_at)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return {"projects": len(projects), "removed": len(removed)}
+
+    def store_project_data(self, project_id: str, data: Dict,
+                           fetched_at: Optional[float] = None) -> Dict[str, int]:
+        """
+        Incrementally apply a project's data, touching only changed rows.
+
+        Args:
+            project_id: ID of the project
+            data: ProjectData dictionary from get_project_with_data
+            fetched_at: Time (time.time()) the data was fetched from the API (defaults to now)
+
+        Returns:
+            Counts of added, updated, unchanged and removed tasks
+        """
+        tasks = data.get('tasks', [])
+        counts = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if data.get('project'):
+                    self._upsert_project(data['project'])
+
+                existing = dict(self._conn.execute(
+                    "SELECT id, raw FROM tasks WHERE project_id = ?", (project_id,)).fetchall())
+                for task in tasks:
+                    raw = existing.pop(task.get('id'), None)
+                    if raw is None:
+                        counts["added"] += 1
+                    elif raw == json.dumps(task, sort_keys=True):
+                        counts["unchanged"] += 1
+                        continue
+                    else:
+                        counts["updated"] += 1
+                    self._upsert_task(task)
+                self._delete_tasks(list(existing))
+                counts["removed"] = len(existing)
+
+                self._conn.execute("DELETE FROM columns WHERE project_id = ?", (project_id,))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO columns (id, project_id, name, sort_order) "
+                    "VALUES (?, ?, ?, ?)",
+                    [(column.get('id'), column.get('projectId', project_id), column.get('name'),
+                      column.get('sortOrder')) for column in data.get('columns') or []])
+
+                self._mark_synced(project_id, fetched_at)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return counts
+
+    def upsert_task(self, task: Dict) -> None:
+        """Apply a created or updated task returned by the API."""
+        with self._lock:
+            self._upsert_task(task)
+
+    def remove_task(self, project_id: str, task_id: str) -> None:
+        """Remove a completed or deleted task."""
+        with self._lock:
+            self._delete_tasks([task_id])
+
+    def upsert_project(self, project: Dict) -> None:
+        """Apply a created or updated project returned by the API."""
+        with self._lock:
+            self._upsert_project(project)
+
+    def _remove_project(self, project_id: str) -> None:
+        task_ids = [row[0] for row in self._conn.execute(
+            "SELECT id FROM tasks WHERE project_id = ?", (project_id,))]
+        self._delete_tasks(task_ids)
+        self._conn.execute("DELETE FROM columns WHERE project_id = ?", (project_id,))
+        self._conn.execute("DELETE FROM projects WHERE id = ?", (project_id,))
+        self._conn.execute("DELETE FROM sync_state WHERE scope = ?", (project_id,))
+
+    def remove_project(self, project_id: str) -> None:
+        """Remove a deleted project and everything mirrored under it."""
+        with self._lock:
+            self._remove_project(project_id)
+
+    # Synchronization
+    async def sync(self, client, force: bool = False) -> Dict[str, Any]:
+        """
+        Refresh the mirror from the API.
+
+        The project list is always re-fetched; only projects whose data is older
+        than max_age (or all of them, when forced) are re-fetched, and only
+        changed task rows are rewritten.
+
+        Args:
+            client: An AsyncTickTickClient (not a cache in front of one, as the
+                data is stamped as fetched when it arrives)
+            force: Re-fetch every project regardless of age
+
+        Returns:
+            A summary of the sync, or a dictionary with an "error" key
+        """
+        projects = await client.get_projects()
+        if 'error' in projects:
+            return {"error": projects['error']}
+        summary = self.store_projects(projects)
+
+        synced = 0
+        totals = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+        for project in projects:
+            project_id = project.get('id')
+            with self._lock:
+                fresh = self._is_fresh(project_id)
+            if fresh and not force:
+                continue
+            data = await client.get_project_with_data(project_id)
+            if 'error' in data:
+                logger.warning(f"Skipping project {project_id} during sync: {data['error']}")
+                continue
+            for key, value in self.store_project_data(project_id, data).items():
+                totals[key] += value
+            synced += 1
+
+        summary.update(totals)
+        summary["projects_synced"] = synced
+        return summary
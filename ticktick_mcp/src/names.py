@@ -0,0 +1,159 @@
+"""
+Name-to-ID lookup for projects and kanban columns.
+
+Tools accept a project (or column) name wherever they take its ID. Names are
+compared case- and accent-insensitively with runs of whitespace collapsed, so
+"work", " WORK " and "Wörk" all find a project named "Work". A name shared by
+several projects is reported as ambiguous rather than guessed.
+"""
+
+import re
+import time
+import difflib
+from typing import Dict, List, Any, Optional, Iterable
+
+from .trigram import normalize
+
+# Default number of seconds project names are trusted before they are refreshed from the API
+DEFAULT_NAME_INDEX_MAX_AGE = 300.0
+
+# TickTick IDs: 24 hex digits, or "inbox" followed by the user's number
+_ID = re.compile(r"[0-9a-f]{24}|inbox\d+")
+
+def fold_name(name: str) -> str:
+    """The form names are compared in: case-folded, without accents, single-spaced."""
+    return " ".join(normalize(name or "").split())
+
+def looks_like_id(reference: str) -> bool:
+    """Whether a reference has the shape of a TickTick project, column or task ID."""
+    return bool(_ID.fullmatch(reference))
+
+def _resolve(kind: str, reference: str, ids: Iterable[str], by_name: Dict[str, List[Dict]]) -> Optional[str]:
+    """
+    Look up an ID or name among records.
+
+    Returns:
+        The record's ID, or None if nothing matches
+
+    Raises:
+        ValueError: If the name matches more than one record
+    """
+    if reference in ids:
+        return reference
+    matches = by_name.get(fold_name(reference), [])
+    if len(matches) > 1:
+        listed = ", ".join(match.get('id') for match in matches)
+        raise ValueError(f"{kind.capitalize()} name '{reference}' is ambiguous: it matches "
+                         f"{len(matches)} {kind}s ({listed}). Use the {kind} ID instead.")
+    return matches[0].get('id') if matches else None
+
+def _unknown(kind: str, reference: str, by_name: Dict[str, List[Dict]], scope: str = "") -> str:
+    """An error message for a name that matches nothing, suggesting close names."""
+    close = difflib.get_close_matches(fold_name(reference), list(by_name), n=3, cutoff=0.6)
+    message = f"No {kind} named '{reference}'{scope}."
+    if close:
+        names = ", ".join(f"'{by_name[name][0].get('name')}'" for name in close)
+        message += f" Did you mean {names}?"
+    return message
+
+class NameIndex:
+    """
+    Project and kanban column names of one account, by folded name.
+    """
+
+    def __init__(self, max_age: float = DEFAULT_NAME_INDEX_MAX_AGE):
+        """
+        Args:
+            max_age: Seconds after a refresh before is_fresh() asks for another
+        """
+        self.max_age = max_age
+        self._project_ids: set = set()
+        self._projects: Dict[str, List[Dict]] = {}
+        # Project ID -> (column IDs, columns by folded name)
+        self._columns: Dict[str, tuple] = {}
+        self.built_at: Optional[float] = None
+        self.stats = {"builds": 0, "lookups": 0, "misses": 0, "ambiguous": 0}
+
+    def is_fresh(self) -> bool:
+        """Whether the project names were refreshed within max_age seconds."""
+        return self.built_at is not None and time.monotonic() - self.built_at < self.max_age
+
+    def invalidate(self) -> None:
+        """Forget every name, so the next lookup refreshes them."""
+        self.built_at = None
+        self._columns.clear()
+
+    def set_projects(self, projects: List[Dict]) -> None:
+        """Replace the project names, and mark them fresh."""
+        self._project_ids = {project.get('id') for project in projects if project.get('id')}
+        self._projects = {}
+        for project in projects:
+            if project.get('id'):
+                self._projects.setdefault(fold_name(project.get('name')), []).append(project)
+        self._columns = {project_id: columns for project_id, columns in self._columns.items()
+                         if project_id in self._project_ids}
+        self.stats["builds"] += 1
+        self.built_at = time.monotonic()
+
+    def set_columns(self, project_id: str, columns: List[Dict]) -> None:
+        """Replace the column names of a project."""
+        by_name = {}
+        for column in columns:
+            if column.get('id'):
+                by_name.setdefault(fold_name(column.get('name')), []).append(column)
+        self._columns[project_id] = ({column.get('id') for column in columns}, by_name)
+
+    def project_id(self, reference: str) -> Optional[str]:
+        """
+        Find a project by ID or name.
+
+        Returns:
+            The project ID, or None if no known project matches
+
+        Raises:
+            ValueError: If the name matches more than one project
+        """
+        return self._lookup("project", reference, self._project_ids, self._projects)
+
+    def column_id(self, project_id: str, reference: str) -> Optional[str]:
+        """
+        Find a kanban column of a project by ID or name.
+
+        Returns:
+            The column ID, or None if no known column matches
+
+        Raises:
+            ValueError: If the name matches more than one column
+        """
+        ids, by_name = self._columns.get(project_id, (set(), {}))
+        return self._lookup("column", reference, ids, by_name)
+
+    def _lookup(self, kind: str, reference: str, ids: set, by_name: Dict[str, List[Dict]]) -> Optional[str]:
+        self.stats["lookups"] += 1
+        try:
+            found = _resolve(kind, reference, ids, by_name)
+        except ValueError:
+            self.stats["ambiguous"] += 1
+            raise
+        if found is None:
+            self.stats["misses"] += 1
+        return found
+
+    def unknown_project(self, reference: str) -> str:
+        """An error message for a project reference that matches nothing."""
+        return _unknown("project", reference, self._projects)
+
+    def unknown_column(self, project_id: str, reference: str) -> str:
+        """An error message for a column reference that matches nothing."""
+        _, by_name = self._columns.get(project_id, (set(), {}))
+        return _unknown("column", reference, by_name, f" in project {project_id}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the number of known project and column names, their age and lookup counters."""
+        return {
+            "projects": len(self._project_ids),
+            "projects_with_columns": len(self._columns),
+            "age_seconds": round(time.monotonic() - self.built_at, 1) if self.built_at is not None else None,
+            "max_age": self.max_age,
+            **self.stats
+        }
@@ -0,0 +1,70 @@
+"""
+Cursor pagination for listing tools.
+
+Items are ordered by (sortOrder, id) and a cursor records the key of the last
+item returned, so pages stay stable when items are added or removed between
+calls. Cursors are opaque URL-safe strings.
+"""
+
+import json
+import base64
+from bisect import bisect_right
+from typing import Dict, List, Any, Optional, Tuple, Callable
+
+# Default number of items per page (overridable via TICKTICK_PAGE_SIZE)
+DEFAULT_PAGE_SIZE = 100
+
+def sort_key(item: Dict) -> Tuple[int, str]:
+    """Stable ordering key for projects and tasks."""
+    return (item.get('sortOrder') or 0, item.get('id') or '')
+
+def encode_cursor(key: Tuple[int, str]) -> str:
+    """Encode an ordering key as an opaque cursor."""
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_order, item_id = json.loads(raw)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(sort_order, int) or not isinstance(item_id, str):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return sort_order, item_id
+
+def paginate(items: List[Dict], limit: Optional[int], cursor: Optional[str] = None,
+             key: Callable[[Dict], Tuple[int, str]] = sort_key) -> Tuple[List[Dict], int, Optional[str]]:
+    """
+    Return the page of items following cursor.
+
+    Args:
+        items: Items to page through, in any order
+        limit: Maximum number of items per page (None or 0 returns everything after cursor)
+        cursor: Cursor returned with the previous page, or None for the first page
+        key: Ordering key of an item, an (int, str) pair (default: sort order and ID)
+
+    Returns:
+        A (page, offset, next_cursor) tuple, where offset is the position of the
+        first item of the page in the full ordering and next_cursor is None on
+        the last page
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    ordered = sorted(items, key=key)
+    start = 0
+    if cursor:
+        keys = [key(item) for item in ordered]
+        start = bisect_right(keys, decode_cursor(cursor))
+
+    end = len(ordered) if not limit else min(len(ordered), start + limit)
+    page = ordered[start:end]
+    next_cursor = encode_cursor(key(page[-1])) if page and end < len(ordered) else None
+    return page, start, next_cursor
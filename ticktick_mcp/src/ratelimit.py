@@ -0,0 +1,300 @@
+"""
+Rate limiting, retry policy and failure backoff for TickTick API requests, and
+concurrency limits for the requests the server handles.
+"""
+
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Default limits (overridable via environment variables)
+DEFAULT_RATE_LIMIT = 10.0
+DEFAULT_RATE_BURST = 20
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_BASE_DELAY = 0.5
+DEFAULT_RETRY_MAX_DELAY = 30.0
+DEFAULT_INIT_BACKOFF = 1.0
+DEFAULT_INIT_MAX_BACKOFF = 60.0
+DEFAULT_MAX_CONCURRENT_REQUESTS = 16
+DEFAULT_MAX_QUEUED_REQUESTS = 64
+
+# Methods that can be repeated without changing the outcome
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "PUT", "DELETE", "OPTIONS"])
+
+# Status codes worth retrying; 429 means the request was not processed
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter shared by threads and coroutines.
+
+    Callers reserve a token and then wait for it, so concurrent callers are
+    spaced out in arrival order instead of all retrying at once.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Tokens added per second (0 or less disables limiting)
+            capacity: Maximum burst size
+        """
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take a token, going into debt if none are available.
+
+        Returns:
+            Seconds the caller must wait before using the token
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self) -> float:
+        """Block until a token is available. Returns the time waited."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        """Wait asynchronously until a token is available. Returns the time waited."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+class RetryPolicy:
+    """
+    Decides whether a failed request is retried and how long to back off.
+
+    Idempotent requests are retried on connection failures, timeouts and
+    retryable status codes. Non-idempotent requests are only retried when the
+    server cannot have processed them: 429 responses and failures to connect.
+    """
+
+    def __init__(self, max_retries: int = DEFAULT_MAX_RETRIES,
+                 base_delay: float = DEFAULT_RETRY_BASE_DELAY,
+                 max_delay: float = DEFAULT_RETRY_MAX_DELAY):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, method: str, attempt: int, status: Optional[int] = None,
+                     request_sent: bool = True) -> bool:
+        """
+        Args:
+            method: HTTP method of the request
+            attempt: Number of retries already made
+            status: Response status code, or None for a transport failure
+            request_sent: Whether the request may have reached the server
+
+        Returns:
+            True if the request should be retried
+        """
+        if attempt >= self.max_retries:
+            return False
+        if status is not None:
+            if status not in RETRY_STATUSES:
+                return False
+            return status == 429 or method in IDEMPOTENT_METHODS
+        return not request_sent or method in IDEMPOTENT_METHODS
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None) -> Optional[float]:
+        """
+        Compute the delay before the next attempt.
+
+        Honours a Retry-After header (delta-seconds or HTTP date); otherwise uses
+        exponential backoff with full jitter.
+
+        Returns:
+            Seconds to wait, or None if Retry-After asks for longer than max_delay
+        """
+        if retry_after:
+            delay = parse_retry_after(retry_after)
+            if delay is not None:
+                return delay if delay <= self.max_delay else None
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+class FailureBackoff:
+    """
+    Remembers why an operation last failed and when it may be tried again.
+
+    The wait doubles with each consecutive failure, up to max_delay, and is
+    reset by the next success. Callers check remaining() to fail fast instead
+    of repeating an operation that is known to be failing.
+    """
+
+    def __init__(self, base_delay: float = DEFAULT_INIT_BACKOFF,
+                 max_delay: float = DEFAULT_INIT_MAX_BACKOFF):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failures = 0
+        self.reason: Optional[str] = None
+        self._retry_at = 0.0
+
+    @property
+    def failed(self) -> bool:
+        """Whether the last attempt failed."""
+        return self.reason is not None
+
+    def record_failure(self, reason: str) -> float:
+        """
+        Record a failed attempt.
+
+        Returns:
+            Seconds until the operation may be tried again
+        """
+        self.failures += 1
+        self.reason = reason
+        delay = min(self.max_delay, self.base_delay * (2 ** (self.failures - 1)))
+        self._retry_at = time.monotonic() + delay
+        return delay
+
+    def record_success(self) -> None:
+        """Record a successful attempt, clearing the failure and the backoff."""
+        self.failures = 0
+        self.reason = None
+        self._retry_at = 0.0
+
+    def remaining(self) -> float:
+        """Seconds left before the operation may be tried again (0 if it may be tried now)."""
+        if not self.failed:
+            return 0.0
+        return max(0.0, self._retry_at - time.monotonic())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the failure state for diagnostics."""
+        return {
+            "failed": self.failed,
+            "consecutive_failures": self.failures,
+            "reason": self.reason,
+            "retry_in": round(self.remaining(), 3)
+        }
+
+class LimitExceeded(Exception):
+    """Raised when a ConcurrencyLimiter has no free slot and its queue is full."""
+
+class ConcurrencyLimiter:
+    """
+    Caps how many operations run at once and how many may wait for a slot.
+
+    Callers arriving when every slot is busy and the queue is full are rejected
+    right away, so an overloaded server answers quickly instead of letting
+    latency grow without bound.
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+                 max_queue: int = DEFAULT_MAX_QUEUED_REQUESTS):
+        """
+        Args:
+            max_concurrency: Maximum number of operations running at once
+            max_queue: Maximum number of operations waiting for a slot
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Hold a slot for the duration of the block, waiting in the queue if needed.
+
+        Raises:
+            LimitExceeded: If every slot is busy and the queue is full
+        """
+        if self.active + self.waiting >= self.max_concurrency + self.max_queue:
+            self.rejected += 1
+            raise LimitExceeded(
+                f"Server busy: {self.active} requests running and {self.waiting} queued. "
+                "Try again shortly."
+            )
+
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the limits and the number of running, queued, completed and rejected operations."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
+
+def parse_retry_after(value: str) -> Optional[float]:
+    """Parse a Retry-After header into seconds from now."""
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def limiter_from_env() -> TokenBucket:
+    """Build the request rate limiter from TICKTICK_RATE_LIMIT and TICKTICK_RATE_BURST."""
+    return TokenBucket(
+        rate=float(os.getenv("TICKTICK_RATE_LIMIT", DEFAULT_RATE_LIMIT)),
+        capacity=float(os.getenv("TICKTICK_RATE_BURST", DEFAULT_RATE_BURST))
+    )
+
+def retry_policy_from_env() -> RetryPolicy:
+    """Build the retry policy from the TICKTICK_MAX_RETRIES and TICKTICK_RETRY_* variables."""
+    return RetryPolicy(
+        max_retries=int(os.getenv("TICKTICK_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+        base_delay=float(os.getenv("TICKTICK_RETRY_BASE_DELAY", DEFAULT_RETRY_BASE_DELAY)),
+        max_delay=float(os.getenv("TICKTICK_RETRY_MAX_DELAY", DEFAULT_RETRY_MAX_DELAY))
+    )
+
+def failure_backoff_from_env() -> FailureBackoff:
+    """Build the client initialization backoff from TICKTICK_INIT_BACKOFF and TICKTICK_INIT_MAX_BACKOFF."""
+    return FailureBackoff(
+        base_delay=float(os.getenv("TICKTICK_INIT_BACKOFF", DEFAULT_INIT_BACKOFF)),
+        max_delay=float(os.getenv("TICKTICK_INIT_MAX_BACKOFF", DEFAULT_INIT_MAX_BACKOFF))
+    )
+
+def concurrency_limiter_from_env() -> ConcurrencyLimiter:
+    """Build the request limiter from TICKTICK_MAX_CONCURRENT_REQUESTS and TICKTICK_MAX_QUEUED_REQUESTS."""
+    return ConcurrencyLimiter(
+        max_concurrency=int(os.getenv("TICKTICK_MAX_CONCURRENT_REQUESTS", DEFAULT_MAX_CONCURRENT_REQUESTS)),
+        max_queue=int(os.getenv("TICKTICK_MAX_QUEUED_REQUESTS", DEFAULT_MAX_QUEUED_REQUESTS))
+    )
@@ -1,33 +1,115 @@
 import asyncio
+import functools
 import json
 import os
+import time
+import weakref
 import logging
-from datetime import datetime, timezone
-from typing import Dict, List, Any, Optional
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple
 
+from mcp import types
 from mcp.server.fastmcp import FastMCP
 from dotenv import load_dotenv
 
-from .ticktick_client import TickTickClient
+from .async_ticktick_client import AsyncTickTickClient
+from .cache import CachedTickTickClient
+from .mirror import TaskMirror, DEFAULT_MAX_AGE
+from .paging import paginate, DEFAULT_PAGE_SIZE
+from .agenda import AgendaIndex, DEFAULT_AGENDA_MAX_AGE, parse_date, get_zone
+from .trigram import TrigramIndex, DEFAULT_TEXT_INDEX_MAX_AGE, DEFAULT_MIN_SIMILARITY
+from .names import NameIndex, DEFAULT_NAME_INDEX_MAX_AGE, looks_like_id
+from .write_journal import WriteBehindQueue, DEFAULT_WINDOW
+from .ratelimit import failure_backoff_from_env, concurrency_limiter_from_env, LimitExceeded
+from .tenants import tenant_pool_from_env, bearer_token, TenantAuthError
+from .metrics import REGISTRY, record_tool, start_metrics_server
+from .tracing import span, tracing_enabled, tracing_from_env, get_recent_traces, shutdown_tracing
+from .formatting import (
+    format_task, format_project, format_match, format_queued_update, format_unsent_updates,
+    render_items, render_item, resolve_output
+)
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# httpx logs every request at INFO level
+logging.getLogger("httpx").setLevel(logging.WARNING)
 
 # Create FastMCP server
 mcp = FastMCP("ticktick")
 
+# MCP transports served by serve()
+TRANSPORTS = ("stdio", "sse", "streamable-http")
+
+# Default number of projects fetched concurrently by cross-project tools
+DEFAULT_FETCH_CONCURRENCY = 8
+
+# Default number of batch operations in flight
+DEFAULT_BATCH_CONCURRENCY = 4
+
 # Create TickTick client
 ticktick = None
 
-def initialize_client():
-    global ticktick
+# Local SQLite mirror used as the read path (enabled by TICKTICK_MIRROR_PATH)
+mirror = None
+
+# Write-behind queue for task updates (enabled by TICKTICK_WRITE_BEHIND_PATH)
+write_queue = None
+
+# Background task filling the local mirror, and the summary of its last sync
+mirror_sync_task = None
+mirror_sync_summary = None
+
+# Per-account clients for tool calls that name a tenant (enabled by TICKTICK_TENANTS_DIR)
+tenant_pool = None
+
+# Client of the tenant the current tool call runs for, if any
+tenant_client: ContextVar = ContextVar("tenant_client", default=None)
+
+# Due-date index of each account's client, built on first use
+agendas = weakref.WeakKeyDictionary()
+
+# Full-text index of each account's client, built on first use
+text_indexes = weakref.WeakKeyDictionary()
+
+# Project and column names of each account's client, loaded on first use
+name_indexes = weakref.WeakKeyDictionary()
+
+# Background task that probes the API and warms the cache after startup
+warmup_task = None
+
+# Why initialization or the connectivity check last failed, and when to try again
+init_backoff = None
+
+# Limits the tool calls running at once and waiting, across every connected client
+request_limiter = None
+
+# When serve() started, and how long after that each startup milestone was reached
+startup_started = None
+startup_timings: Dict[str, float] = {}
+
+def mark_startup(milestone: str) -> Optional[float]:
+    """Record the seconds from startup until a milestone, the first time it is reached."""
+    if startup_started is None:
+        return None
+    return startup_timings.setdefault(milestone, round(time.perf_counter() - startup_started, 6))
+
+async def initialize_client():
+    """
+    Create the TickTick client and open the local mirror, if configured.
+    
+    Only local configuration is read here, so it returns immediately; the API
+    connectivity probe runs in the background (see warm_up).
+    """
+    global ticktick, mirror, write_queue
     try:
         # Check if .env file exists with access token
         from pathlib import Path
         env_path = Path('.env')
         if not env_path.exists():
             logger.error("No .env file found. Please run 'uv run -m ticktick_mcp.cli auth' to set up authentication.")
+            record_init_failure("no .env file found")
             return False
         
         # Check if we have valid credentials
@@ -35,226 +117,1083 @@ def initialize_client():
             content = f.read()
             if 'TICKTICK_ACCESS_TOKEN' not in content:
                 logger.error("No access token found in .env file. Please run 'uv run -m ticktick_mcp.cli auth' to authenticate.")
+                record_init_failure("no access token found in .env file")
                 return False
         
-        # Initialize the client
-        ticktick = TickTickClient()
+        # Initialize the client behind the read-through cache, sharing the tenants' connection pool
+        ticktick = CachedTickTickClient(
+            AsyncTickTickClient(http=tenant_pool.http if tenant_pool is not None else None))
         logger.info("TickTick client initialized successfully")
         
+        # Open the local mirror if configured
+        mirror_path = os.getenv("TICKTICK_MIRROR_PATH")
+        if mirror_path and mirror is None:
+            max_age = float(os.getenv("TICKTICK_MIRROR_MAX_AGE", DEFAULT_MAX_AGE))
+            mirror = TaskMirror(mirror_path, max_age=max_age)
+            logger.info(f"Using local mirror at {mirror_path} (max age {max_age:g}s)")
+        
+        # Open the write-behind journal if configured, resending updates left by an earlier run
+        journal_path = os.getenv("TICKTICK_WRITE_BEHIND_PATH")
+        if journal_path and write_queue is None:
+            window = float(os.getenv("TICKTICK_WRITE_BEHIND_WINDOW", DEFAULT_WINDOW))
+            write_queue = WriteBehindQueue(journal_path, lambda **update: ticktick.update_task(**update),
+                                           on_sent=record_task_saved, on_failed=record_update_failed,
+                                           window=window)
+            write_queue.start()
+            logger.info(f"Queueing task updates in {journal_path} (window {window:g}s)")
+        
+        mark_startup("client_ready")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to initialize TickTick client: {e}")
+        record_init_failure(str(e))
+        return False
+
+async def warm_up() -> bool:
+    """
+    Test API connectivity and warm the cache and mirror with the project list.
+    
+    Tool calls that need the project list while this runs join the same request.
+    
+    Returns:
+        True if the API answered, False otherwise
+    """
+    try:
         # Test API connectivity
-        projects = ticktick.get_projects()
+        projects = await ticktick.get_projects()
         if 'error' in projects:
             logger.error(f"Failed to access TickTick API: {projects['error']}")
             logger.error("Your access token may have expired. Please run 'uv run -m ticktick_mcp.cli auth' to refresh it.")
+            record_init_failure(projects['error'])
             return False
-            
+        
+        if mirror:
+            mirror.store_projects(projects, fetched_at(ticktick, "get_projects"))
+            start_mirror_sync()
+        
+        get_init_backoff().record_success()
+        mark_startup("warm_up")
         logger.info(f"Successfully connected to TickTick API with {len(projects)} projects")
         return True
     except Exception as e:
-        logger.error(f"Failed to initialize TickTick client: {e}")
+        logger.error(f"Failed to access TickTick API: {e}")
+        record_init_failure(str(e))
         return False
 
-# Format a task object from TickTick for better display
-def format_task(task: Dict) -> str:
-    """Format a task into a human-readable string."""
-    formatted = f"Title: {task.get('title', 'No title')}\n"
+def start_mirror_sync() -> None:
+    """Start filling the mirror in the background, unless that is already running."""
+    global mirror_sync_task
+    if mirror_sync_task is None or mirror_sync_task.done():
+        mirror_sync_task = asyncio.ensure_future(sync_mirror())
+
+async def sync_mirror() -> None:
+    """
+    Fetch every project's data into the mirror, then again every
+    TICKTICK_MIRROR_SYNC_INTERVAL seconds (if set), so reads stay local.
+    """
+    global mirror_sync_summary
+    interval = float(os.getenv("TICKTICK_MIRROR_SYNC_INTERVAL", 0))
+    while mirror and ticktick:
+        started = time.time()
+        with span("mirror.sync"):
+            try:
+                # Bypass the read cache, so the data is as fresh as its sync timestamp
+                summary = await mirror.sync(ticktick.client)
+            except Exception as e:
+                summary = {"error": str(e)}
+        if 'error' in summary:
+            logger.warning(f"Mirror sync failed: {summary['error']}")
+        else:
+            logger.info(f"Mirror synced {summary['projects_synced']} projects in {time.time() - started:.1f}s")
+        mirror_sync_summary = {**summary, "finished_at": time.time()}
+        if interval <= 0:
+            return
+        await asyncio.sleep(interval)
+
+def fetched_at(client, endpoint: str, *args: Any) -> float:
+    """When the answer a client just gave for a read was fetched from the API (now, unless it was cached)."""
+    return time.time() - (client.age(endpoint, *args) or 0.0)
+
+def get_init_backoff():
+    """Get the initialization backoff, configured from the environment on first use."""
+    global init_backoff
+    if init_backoff is None:
+        init_backoff = failure_backoff_from_env()
+    return init_backoff
+
+def record_init_failure(reason: str) -> None:
+    delay = get_init_backoff().record_failure(reason)
+    logger.warning(f"TickTick client unavailable ({reason}); tool calls fail fast for {delay:g}s")
+
+def get_request_limiter():
+    """Get the tool call limiter, configured from the environment on first use."""
+    global request_limiter
+    if request_limiter is None:
+        request_limiter = concurrency_limiter_from_env()
+    return request_limiter
+
+def current_client():
+    """The client of the current tool call's tenant, or the default client."""
+    return tenant_client.get() or ticktick
+
+def current_mirror():
+    """The local mirror, which only holds the default account's data."""
+    return mirror if tenant_client.get() is None else None
+
+def current_write_queue():
+    """The write-behind queue, which only sends for the default account."""
+    return write_queue if tenant_client.get() is None else None
+
+async def settle_writes(task_id: Optional[str] = None, project_id: Optional[str] = None) -> None:
+    """Send the queued updates of a task or project now, so a read or write that follows sees them."""
+    queue = current_write_queue()
+    if queue and queue.has_pending(task_id, project_id):
+        with span("write_behind.flush", task_id=task_id, project_id=project_id):
+            await queue.flush(task_id, project_id)
+
+def current_agenda() -> AgendaIndex:
+    """The due-date index of the current tool call's account, created on first use."""
+    client = current_client()
+    index = agendas.get(client)
+    if index is None:
+        max_age = float(os.getenv("TICKTICK_AGENDA_MAX_AGE", DEFAULT_AGENDA_MAX_AGE))
+        index = agendas[client] = AgendaIndex(max_age)
+    return index
+
+def current_text_index() -> TrigramIndex:
+    """The full-text index of the current tool call's account, created on first use."""
+    client = current_client()
+    index = text_indexes.get(client)
+    if index is None:
+        max_age = float(os.getenv("TICKTICK_TEXT_INDEX_MAX_AGE", DEFAULT_TEXT_INDEX_MAX_AGE))
+        index = text_indexes[client] = TrigramIndex(max_age)
+    return index
+
+def current_names() -> NameIndex:
+    """The project and column names of the current tool call's account, created on first use."""
+    client = current_client()
+    index = name_indexes.get(client)
+    if index is None:
+        max_age = float(os.getenv("TICKTICK_NAME_INDEX_MAX_AGE", DEFAULT_NAME_INDEX_MAX_AGE))
+        index = name_indexes[client] = NameIndex(max_age)
+    return index
+
+def task_indexes(client) -> List[Any]:
+    """The task indexes of a client that exist so far, which mutations keep up to date."""
+    return [indexes[client] for indexes in (agendas, text_indexes) if client in indexes]
+
+def request_headers() -> Optional[Any]:
+    """The headers of the HTTP request behind the current tool call, or None over stdio."""
+    try:
+        request = mcp.get_context().request_context.request
+    except ValueError:
+        return None
+    if request is None:
+        return None
+    return request.headers
+
+def tool():
+    """
+    Register an MCP tool that runs under the server's concurrency and queue limits.
     
-    # Add project ID
-    formatted += f"Project ID: {task.get('projectId', 'None')}\n"
+    Tool calls beyond both limits return a "Server busy" message without running.
+    When serving tenants, every call over HTTP must name a tenant and present
+    its secret as a bearer token, and runs against that tenant's client.
+    """
+    def decorator(func):
+        name = func.__name__
+        
+        @functools.wraps(func)
+        async def limited(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = "error"
+            record_first_call()
+            with span("tool", tool=name) as current:
+                try:
+                    async with get_request_limiter().slot():
+                        headers = request_headers() if tenant_pool is not None else None
+                        if headers is None:
+                            result = await func(*args, **kwargs)
+                        else:
+                            tenant = headers.get(tenant_pool.header)
+                            current.set(tenant=tenant)
+                            try:
+                                client = await tenant_pool.get(
+                                    tenant, bearer_token(headers.get("authorization")))
+                            except TenantAuthError as e:
+                                outcome = "unauthorized"
+                                return str(e)
+                            except ValueError as e:
+                                return str(e)
+                            token = tenant_client.set(client)
+                            try:
+                                result = await func(*args, **kwargs)
+                            finally:
+                                tenant_client.reset(token)
+                        outcome = "ok"
+                        return result
+                except LimitExceeded as e:
+                    outcome = "rejected"
+                    logger.warning(f"Rejected {name}: {e}")
+                    return str(e)
+                finally:
+                    current.set(outcome=outcome)
+                    record_tool(name, outcome, time.perf_counter() - started)
+        return mcp.tool()(limited)
+    return decorator
+
+def collect_metrics():
+    """Report the client, cache and tool call counters kept elsewhere as metric samples."""
+    if ticktick:
+        requests = ticktick.get_request_stats()
+        for key in ("retries", "rate_limited_responses", "throttled", "token_refreshes",
+                    "proactive_token_refreshes", "token_refresh_failures", "coalesced"):
+            yield (f"ticktick_client_{key}_total", "counter",
+                   f"TickTick client {key.replace('_', ' ')}.", {}, requests.get(key, 0))
+        cache = ticktick.get_cache_stats()
+        for key in ("hits", "misses", "evictions", "expirations", "invalidations"):
+            yield (f"ticktick_cache_{key}_total", "counter", f"Read cache {key}.", {}, cache[key])
+        for key in ("patches", "verified", "mismatches"):
+            yield (f"ticktick_cache_local_{key}_total", "counter",
+                   f"Task writes applied to cached reads: {key}.", {}, cache[key])
+        yield ("ticktick_cache_hit_ratio", "gauge", "Read cache hit ratio.", {}, cache["hit_ratio"])
+        yield ("ticktick_cache_entries", "gauge", "Entries in the read cache.", {}, cache["size"])
+    limiter = get_request_limiter()
+    yield ("ticktick_tool_calls_active", "gauge", "Tool calls running.", {}, limiter.active)
+    yield ("ticktick_tool_calls_queued", "gauge", "Tool calls waiting for a slot.", {}, limiter.waiting)
+
+REGISTRY.add_collector(collect_metrics)
+
+async def ensure_client() -> Optional[str]:
+    """
+    Make sure the client is ready before a tool call.
     
-    # Add dates if available
-    if task.get('startDate'):
-        formatted += f"Start Date: {task.get('startDate')}\n"
-    if task.get('dueDate'):
-        formatted += f"Due Date: {task.get('dueDate')}\n"
+    After a failed initialization or connectivity check, tool calls fail fast
+    with the cached reason until the backoff window ends. The first call after
+    that tries again (one check shared by concurrent callers), and a success
+    clears the failure.
     
-    # Add priority if available
-    priority_map = {0: "None", 1: "Low", 3: "Medium", 5: "High"}
-    priority = task.get('priority', 0)
-    formatted += f"Priority: {priority_map.get(priority, str(priority))}\n"
+    Returns:
+        None if the client is ready, otherwise the message the tool should return
+    """
+    global warmup_task
+    if tenant_client.get() is not None:
+        return None
     
-    # Add status if available
-    status = "Completed" if task.get('status') == 2 else "Active"
-    formatted += f"Status: {status}\n"
+    backoff = get_init_backoff()
+    if ticktick and not backoff.failed:
+        return None
     
-    # Add content if available
-    if task.get('content'):
-        formatted += f"\nContent:\n{task.get('content')}\n"
+    remaining = backoff.remaining()
+    if remaining > 0:
+        return f"TickTick client unavailable: {backoff.reason}. Retrying in {remaining:.1f}s."
     
-    # Add subtasks if available
-    items = task.get('items', [])
-    if items:
-        formatted += f"\nSubtasks ({len(items)}):\n"
-        for i, item in enumerate(items, 1):
-            status = "✓" if item.get('status') == 1 else "□"
-            formatted += f"{i}. [{status}] {item.get('title', 'No title')}\n"
+    if not ticktick:
+        if not await initialize_client():
+            return f"Failed to initialize TickTick client. Please check your API credentials. ({backoff.reason})"
     
-    return formatted
+    if backoff.failed:
+        # Check connectivity again before letting the call through
+        if warmup_task is None or warmup_task.done():
+            warmup_task = asyncio.ensure_future(warm_up())
+        if not await asyncio.shield(warmup_task):
+            return f"TickTick client unavailable: {backoff.reason}. Retrying in {backoff.remaining():.1f}s."
+    return None
+
+def record_handshake() -> None:
+    """Log how long after startup the first MCP client finished the handshake, once."""
+    if "handshake" in startup_timings:
+        return
+    elapsed = mark_startup("handshake")
+    if elapsed is not None:
+        logger.info(f"MCP handshake completed {elapsed * 1000:.1f} ms after startup")
 
-# Format a project object from TickTick for better display
-def format_project(project: Dict) -> str:
-    """Format a project into a human-readable string."""
-    formatted = f"Name: {project.get('name', 'No name')}\n"
-    formatted += f"ID: {project.get('id', 'No ID')}\n"
+def watch_handshake() -> None:
+    """
+    Call record_handshake when a client sends the initialized notification.
     
-    # Add color if available
-    if project.get('color'):
-        formatted += f"Color: {project.get('color')}\n"
+    FastMCP has no public hook for it, so this registers on the low-level
+    server's notification handlers, chaining to any handler already there.
+    Without them (another mcp version) handshake timing is simply not reported.
+    """
+    handlers = getattr(getattr(mcp, "_mcp_server", None), "notification_handlers", None)
+    if not isinstance(handlers, dict):
+        logger.debug("MCP server has no notification handlers; not timing the handshake")
+        return
+    previous = handlers.get(types.InitializedNotification)
+    if getattr(previous, "records_handshake", False):
+        return
     
-    # Add view mode if available
-    if project.get('viewMode'):
-        formatted += f"View Mode: {project.get('viewMode')}\n"
+    async def on_initialized(notification: types.InitializedNotification) -> None:
+        record_handshake()
+        if previous is not None:
+            await previous(notification)
     
-    # Add closed status if available
-    if 'closed' in project:
-        formatted += f"Closed: {'Yes' if project.get('closed') else 'No'}\n"
+    on_initialized.records_handshake = True
+    handlers[types.InitializedNotification] = on_initialized
+
+def record_first_call() -> None:
+    """Log how long after startup the first tool call arrived, once."""
+    if "first_call" in startup_timings:
+        return
+    elapsed = mark_startup("first_call")
+    if elapsed is not None:
+        logger.info(f"First tool call arrived {elapsed * 1000:.1f} ms after startup")
+
+# Read path: serve from the local mirror while it is fresh, otherwise fetch and mirror
+async def fetch_projects() -> List[Dict]:
+    """Get all projects, from the mirror when fresh."""
+    task_mirror = current_mirror()
+    if task_mirror:
+        projects = task_mirror.get_projects()
+        if projects is not None:
+            return projects
     
-    # Add kind if available
-    if project.get('kind'):
-        formatted += f"Kind: {project.get('kind')}\n"
+    client = current_client()
+    projects = await client.get_projects()
+    if task_mirror and 'error' not in projects:
+        task_mirror.store_projects(projects, fetched_at(client, "get_projects"))
+    return projects
+
+async def fetch_project(project_id: str) -> Dict:
+    """Get a project, from the mirror when fresh."""
+    task_mirror = current_mirror()
+    if task_mirror:
+        project = task_mirror.get_project(project_id)
+        if project is not None:
+            return project
     
-    return formatted
+    return await current_client().get_project(project_id)
 
-# MCP Tools
+async def fetch_project_data(project_id: str) -> Dict:
+    """Get a project with its tasks and columns, from the mirror when fresh."""
+    await settle_writes(project_id=project_id)
+    task_mirror = current_mirror()
+    if task_mirror:
+        project_data = task_mirror.get_project_data(project_id)
+        if project_data is not None:
+            return project_data
+    
+    client = current_client()
+    project_data = await client.get_project_with_data(project_id)
+    if task_mirror and 'error' not in project_data:
+        task_mirror.store_project_data(project_id, project_data,
+                                       fetched_at(client, "get_project_with_data", project_id))
+    return project_data
 
-@mcp.tool()
-async def get_projects() -> str:
-    """Get all projects from TickTick."""
+async def fetch_task(project_id: str, task_id: str) -> Dict:
+    """Get a task, from the mirror when fresh."""
+    await settle_writes(task_id=task_id)
+    task_mirror = current_mirror()
+    if task_mirror:
+        task = task_mirror.get_task(project_id, task_id)
+        if task is not None:
+            return task
+    
+    return await current_client().get_task(project_id, task_id)
+
+async def fetch_all_project_data(projects: List[Dict], max_concurrency: int = None) -> List[Dict]:
+    """
+    Fetch the data of many projects concurrently.
+    
+    Args:
+        projects: Projects to fetch
+        max_concurrency: Maximum number of projects fetched at once
+            (defaults to TICKTICK_FETCH_CONCURRENCY or 8)
+    
+    Returns:
+        ProjectData dictionaries (or error dictionaries) in the order of projects
+    """
+    if max_concurrency is None:
+        max_concurrency = int(os.getenv("TICKTICK_FETCH_CONCURRENCY", DEFAULT_FETCH_CONCURRENCY))
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    
+    async def fetch(project: Dict) -> Dict:
+        async with semaphore:
+            try:
+                return await fetch_project_data(project.get('id'))
+            except Exception as e:
+                return {"error": str(e)}
+    
+    return await asyncio.gather(*(fetch(project) for project in projects))
+
+async def resolve_project_id(reference: str) -> str:
+    """
+    Turn a project ID or name into a project ID.
+    
+    Names are matched case- and accent-insensitively. The project names are
+    refreshed when stale, and once more before a name is reported unknown.
+    References shaped like IDs (including the inbox) are returned as they are,
+    without looking at the project names; the API judges unknown IDs.
+    
+    Raises:
+        ValueError: If the name is unknown or matches more than one project
+    """
+    if looks_like_id(reference):
+        return reference
+    index = current_names()
+    
+    async def refresh() -> None:
+        with span("names.refresh"):
+            projects = await fetch_projects()
+        if 'error' in projects:
+            raise ValueError(f"Error fetching projects to resolve '{reference}': {projects['error']}")
+        index.set_projects(projects)
+    
+    refreshed = not index.is_fresh()
+    if refreshed:
+        await refresh()
+    project_id = index.project_id(reference)
+    if project_id is None and not refreshed:
+        # The project may have been created or renamed elsewhere since the last refresh
+        await refresh()
+        project_id = index.project_id(reference)
+    
+    if project_id is not None:
+        return project_id
+    raise ValueError(index.unknown_project(reference))
+
+def validate_task_fields(priority: Optional[int] = None, start_date: Optional[str] = None,
+                         due_date: Optional[str] = None, priority_required: bool = False) -> Optional[str]:
+    """
+    Validate task priority and dates.
+    
+    Returns:
+        An error message, or None if the fields are valid
+    """
+    with span("validate") as current:
+        if (priority is not None or priority_required) and priority not in [0, 1, 3, 5]:
+            current.set(valid=False)
+            return "Invalid priority. Must be 0 (None), 1 (Low), 3 (Medium), or 5 (High)."
+        
+        for date_str, date_name in [(start_date, "start_date"), (due_date, "due_date")]:
+            if date_str:
+                try:
+                    # Try to parse the date to validate it
+                    parse_date(date_str)
+                except ValueError:
+                    current.set(valid=False)
+                    return f"Invalid {date_name} format. Use ISO format: YYYY-MM-DDThh:mm:ss+0000"
+        current.set(valid=True)
+        return None
+
+async def refresh_task_index(index, name: str) -> List[str]:
+    """
+    Build a task index (AgendaIndex or TrigramIndex) from every project.
+    
+    Args:
+        index: The index to build
+        name: Name of the tracing span
+    
+    Returns:
+        The names of projects that could not be read (their tasks are kept
+        from the previous build)
+    
+    Raises:
+        RuntimeError: If the project list cannot be fetched
+    """
+    with span(name) as current:
+        projects = await fetch_projects()
+        if 'error' in projects:
+            raise RuntimeError(f"Error fetching projects: {projects['error']}")
+        
+        results = await fetch_all_project_data(projects)
+        loaded = []
+        failed = []
+        for project, project_data in zip(projects, results):
+            if 'error' in project_data:
+                failed.append(project.get('name', project.get('id')))
+            else:
+                loaded.append((project.get('id'), project_data.get('tasks', [])))
+        
+        # Drop projects that no longer exist
+        index.retain_projects({project.get('id') for project in projects})
+        index.build(loaded)
+        current.set(projects=len(projects), failed=len(failed), tasks=len(index))
+    return failed
+
+async def load_agenda() -> Tuple[AgendaIndex, List[str]]:
+    """
+    Get the current account's due-date index, rebuilding it from every project when stale.
+    
+    Returns:
+        The index and the names of projects that could not be read
+    
+    Raises:
+        RuntimeError: If the project list cannot be fetched
+    """
+    index = current_agenda()
+    if index.is_fresh():
+        return index, []
+    return index, await refresh_task_index(index, "agenda.build")
+
+async def load_text_index() -> Tuple[TrigramIndex, List[str]]:
+    """
+    Get the current account's full-text index, refreshing it from every project when stale.
+    
+    Only tasks whose text changed since the last refresh are re-indexed.
+    
+    Returns:
+        The index and the names of projects that could not be read
+    
+    Raises:
+        RuntimeError: If the project list cannot be fetched
+    """
+    index = current_text_index()
+    if index.is_fresh():
+        return index, []
+    return index, await refresh_task_index(index, "text_index.build")
+
+# Local state maintenance after successful mutations
+def record_task_saved(task: Dict) -> None:
+    """Apply a created or updated task to local state."""
+    task_mirror = current_mirror()
+    if task_mirror:
+        task_mirror.upsert_task(task)
+    for index in task_indexes(current_client()):
+        index.upsert(task)
+
+def record_task_removed(project_id: str, task_id: str) -> None:
+    """Apply a completed or deleted task to local state (project data only lists undone tasks)."""
+    task_mirror = current_mirror()
+    if task_mirror:
+        task_mirror.remove_task(project_id, task_id)
+    for index in task_indexes(current_client()):
+        index.remove(task_id)
+
+def forget_project_state(project_id: str) -> None:
+    """
+    Drop the local copies of a project's data, so the next read fetches it from the API.
+    
+    Used when a write may or may not have taken effect (it failed, or was given up on).
+    """
+    client = current_client()
+    client.invalidate_project(project_id)
+    task_mirror = current_mirror()
+    if task_mirror:
+        task_mirror.invalidate(project_id)
+    for index in task_indexes(client):
+        index.invalidate()
+
+def record_update_failed(entry: Dict) -> None:
+    """Undo local state that may reflect a queued update TickTick never applied."""
+    forget_project_state(entry["project_id"])
+
+def unsent_updates(task_id: str) -> List[Dict]:
+    """The queued updates of a task that were given up on, with API field names."""
+    queue = current_write_queue()
+    if not queue:
+        return []
+    return [{"changes": {QUEUED_FIELD_NAMES[name]: value for name, value in failure["fields"].items()},
+             "error": failure["error"], "attempts": failure["attempts"]}
+            for failure in queue.failures(task_id)]
+
+def page_size(limit: Optional[int]) -> int:
+    """Resolve a tool's limit argument, defaulting to TICKTICK_PAGE_SIZE."""
+    if limit is None:
+        return int(os.getenv("TICKTICK_PAGE_SIZE", DEFAULT_PAGE_SIZE))
+    return limit
+
+# MCP Resources
+
+@mcp.resource("ticktick://stats", mime_type="application/json")
+async def get_stats() -> str:
+    """Connection pool, request throttling/retry, cache, tool concurrency and startup statistics, as JSON."""
     if not ticktick:
-        if not initialize_client():
-            return "Failed to initialize TickTick client. Please check your API credentials."
+        return json.dumps({"error": "TickTick client is not initialized."})
+    
+    return json.dumps({
+        "pool": ticktick.get_pool_stats(),
+        "requests": ticktick.get_request_stats(),
+        "cache": ticktick.get_cache_stats(),
+        "tool_calls": get_request_limiter().get_stats(),
+        "tenants": tenant_pool.get_stats() if tenant_pool is not None else None,
+        "agenda": agendas[ticktick].get_stats() if ticktick in agendas else None,
+        "text_index": text_indexes[ticktick].get_stats() if ticktick in text_indexes else None,
+        "names": name_indexes[ticktick].get_stats() if ticktick in name_indexes else None,
+        "write_behind": write_queue.get_stats() if write_queue else None,
+        "mirror": {"path": mirror.path, "max_age": mirror.max_age, "projects_age_seconds": round(mirror.age(), 1) if mirror.age() is not None else None,
+                   "last_sync": mirror_sync_summary} if mirror else None,
+        "startup": startup_timings,
+        "initialization": get_init_backoff().get_stats()
+    }, indent=2)
+
+@mcp.resource("ticktick://metrics", mime_type="application/json")
+async def get_metrics() -> str:
+    """Per-endpoint and per-tool latency histograms, status codes, bytes, retries and cache counters, as JSON."""
+    return json.dumps(REGISTRY.snapshot(), indent=2)
+
+@mcp.resource("ticktick://metrics/prometheus", mime_type="text/plain")
+async def get_prometheus_metrics() -> str:
+    """The same metrics as ticktick://metrics, in the Prometheus text format."""
+    return REGISTRY.render_prometheus()
+
+@mcp.resource("ticktick://traces", mime_type="application/json")
+async def get_traces() -> str:
+    """The most recent trace spans, as JSON (requires the memory trace exporter)."""
+    traces = get_recent_traces()
+    if traces is None:
+        return json.dumps({"error": "The memory trace exporter is not enabled. Run with --trace memory."})
+    return json.dumps(traces, indent=2, default=str)
+
+# MCP Tools
+
+@tool()
+async def get_projects(limit: int = None, cursor: str = None,
+                       output_format: str = None, fields: str = None) -> str:
+    """
+    Get projects from TickTick, a page at a time.
+    
+    Args:
+        limit: Maximum number of projects to return (optional, 0 for all)
+        cursor: Continuation cursor returned by a previous call (optional)
+        output_format: "text", "json" or "tsv" (optional, defaults to the server setting)
+        fields: Comma-separated project fields to return in json/tsv output (optional)
+    """
+    error = await ensure_client()
+    if error:
+        return error
+    
+    if limit is not None and limit < 0:
+        return "Invalid limit. Must be 0 or greater."
+    try:
+        output_format, fields = resolve_output(output_format, fields, "project")
+    except ValueError as e:
+        return str(e)
     
     try:
-        projects = ticktick.get_projects()
+        projects = await fetch_projects()
         if 'error' in projects:
             return f"Error fetching projects: {projects['error']}"
         
-        if not projects:
+        if not projects and output_format == "text":
             return "No projects found."
         
-        result = f"Found {len(projects)} projects:\n\n"
-        for i, project in enumerate(projects, 1):
-            result += f"Project {i}:\n" + format_project(project) + "\n"
+        try:
+            page, offset, next_cursor = paginate(projects, page_size(limit), cursor)
+        except ValueError as e:
+            return str(e)
         
-        return result
+        return render_items("project", page, format_project, len(projects), offset,
+                            next_cursor, "get_projects", output_format=output_format,
+                            fields=fields)
     except Exception as e:
         logger.error(f"Error in get_projects: {e}")
         return f"Error retrieving projects: {str(e)}"
 
-@mcp.tool()
-async def get_project(project_id: str) -> str:
+@tool()
+async def get_project(project_id: str, output_format: str = None, fields: str = None) -> str:
     """
     Get details about a specific project.
     
     Args:
-        project_id: ID of the project
+        project_id: ID or name of the project
+        output_format: "text", "json" or "tsv" (optional, defaults to the server setting)
+        fields: Comma-separated project fields to return in json/tsv output (optional)
     """
-    if not ticktick:
-        if not initialize_client():
-            return "Failed to initialize TickTick client. Please check your API credentials."
+    error = await ensure_client()
+    if error:
+        return error
+    
+    try:
+        output_format, fields = resolve_output(output_format, fields, "project")
+        project_id = await resolve_project_id(project_id)
+    except ValueError as e:
+        return str(e)
     
     try:
-        project = ticktick.get_project(project_id)
+        project = await fetch_project(project_id)
         if 'error' in project:
             return f"Error fetching project: {project['error']}"
         
-        return format_project(project)
+        return render_item(project, format_project, output_format, fields)
     except Exception as e:
         logger.error(f"Error in get_project: {e}")
         return f"Error retrieving project: {str(e)}"
 
-@mcp.tool()
-async def get_project_tasks(project_id: str) -> str:
+@tool()
+async def get_project_tasks(project_id: str, column: str = None, limit: int = None,
+                            cursor: str = None, output_format: str = None, fields: str = None) -> str:
     """
-    Get all tasks in a specific project.
+    Get tasks in a specific project, ordered by sort order, a page at a time.
     
     Args:
-        project_id: ID of the project
+        project_id: ID or name of the project
+        column: ID or name of a kanban column, to list only its tasks (optional)
+        limit: Maximum number of tasks to return (optional, 0 for all)
+        cursor: Continuation cursor returned by a previous call (optional)
+        output_format: "text", "json" or "tsv" (optional, defaults to the server setting)
+        fields: Comma-separated task fields to return in json/tsv output (optional)
     """
-    if not ticktick:
-        if not initialize_client():
-            return "Failed to initialize TickTick client. Please check your API credentials."
+    error = await ensure_client()
+    if error:
+        return error
     
+    if limit is not None and limit < 0:
+        return "Invalid limit. Must be 0 or greater."
     try:
-        project_data = ticktick.get_project_with_data(project_id)
+        output_format, fields = resolve_output(output_format, fields, "task")
+        project_id = await resolve_project_id(project_id)
+    except ValueError as e:
+        return str(e)
+    
+    try:
+        project_data = await fetch_project_data(project_id)
         if 'error' in project_data:
             return f"Error fetching project data: {project_data['error']}"
         
         tasks = project_data.get('tasks', [])
-        if not tasks:
+        names = current_names()
+        names.set_columns(project_id, project_data.get('columns') or [])
+        if column:
+            try:
+                column_id = names.column_id(project_id, column)
+            except ValueError as e:
+                return str(e)
+            if column_id is None and not looks_like_id(column):
+                return names.unknown_column(project_id, column)
+            tasks = [task for task in tasks if task.get('columnId') == (column_id or column)]
+        
+        if not tasks and output_format == "text":
             return f"No tasks found in project '{project_data.get('project', {}).get('name', project_id)}'."
         
-        result = f"Found {len(tasks)} tasks in project '{project_data.get('project', {}).get('name', project_id)}':\n\n"
-        for i, task in enumerate(tasks, 1):
-            result += f"Task {i}:\n" + format_task(task) + "\n"
+        try:
+            page, offset, next_cursor = paginate(tasks, page_size(limit), cursor)
+        except ValueError as e:
+            return str(e)
         
-        return result
+        scope = f" in project '{project_data.get('project', {}).get('name', project_id)}'"
+        return render_items("task", page, format_task, len(tasks), offset,
+                            next_cursor, "get_project_tasks", scope,
+                            output_format=output_format, fields=fields)
     except Exception as e:
         logger.error(f"Error in get_project_tasks: {e}")
         return f"Error retrieving project tasks: {str(e)}"
 
-@mcp.tool()
-async def get_task(project_id: str, task_id: str) -> str:
+@tool()
+async def get_task(project_id: str, task_id: str, output_format: str = None,
+                   fields: str = None) -> str:
     """
     Get details about a specific task.
     
     Args:
-        project_id: ID of the project
+        project_id: ID or name of the project
         task_id: ID of the task
+        output_format: "text", "json" or "tsv" (optional, defaults to the server setting)
+        fields: Comma-separated task fields to return in json/tsv output (optional)
     """
-    if not ticktick:
-        if not initialize_client():
-            return "Failed to initialize TickTick client. Please check your API credentials."
+    error = await ensure_client()
+    if error:
+        return error
     
     try:
-        task = ticktick.get_task(project_id, task_id)
+        output_format, fields = resolve_output(output_format, fields, "task")
+        project_id = await resolve_project_id(project_id)
+    except ValueError as e:
+        return str(e)
+    
+    try:
+        task = await fetch_task(project_id, task_id)
         if 'error' in task:
             return f"Error fetching task: {task['error']}"
         
-        return format_task(task)
+        failures = unsent_updates(task_id)
+        if failures:
+            task = {**task, "unsentUpdates": failures}
+            fields = fields + ["unsentUpdates"] if fields and "unsentUpdates" not in fields else fields
+            if output_format == "text":
+                return render_item(task, format_task, output_format, fields) + "\n" + format_unsent_updates(failures)
+        
+        return render_item(task, format_task, output_format, fields)
     except Exception as e:
         logger.error(f"Error in get_task: {e}")
         return f"Error retrieving task: {str(e)}"
 
-@mcp.tool()
+@tool()
+async def search_tasks(
+    query: str = None,
+    priority: int = None,
+    status: str = None,
+    due_after: str = None,
+    due_before: str = None,
+    max_concurrency: int = None,
+    limit: int = None,
+    cursor: str = None,
+    output_format: str = None,
+    fields: str = None
+) -> str:
+    """
+    Search undone tasks across all projects, ordered by sort order, a page at a time.
+    
+    Args:
+        query: Case-insensitive text to find in the task title or content (optional)
+        priority: Only tasks with this priority (0: None, 1: Low, 3: Medium, 5: High) (optional)
+        status: Only "active" tasks; completed tasks are not listed by the TickTick API
+            and cannot be searched (optional)
+        due_after: Only tasks due at or after this ISO date/time (optional)
+        due_before: Only tasks due at or before this ISO date/time (optional)
+        max_concurrency: Maximum number of projects fetched at once (optional)
+        limit: Maximum number of tasks to return (optional, 0 for all)
+        cursor: Continuation cursor returned by a previous call with the same filters (optional)
+        output_format: "text", "json" or "tsv" (optional, defaults to the server setting)
+        fields: Comma-separated task fields to return in json/tsv output (optional)
+    """
+    error = await ensure_client()
+    if error:
+        return error
+    
+    if priority is not None and priority not in [0, 1, 3, 5]:
+        return "Invalid priority. Must be 0 (None), 1 (Low), 3 (Medium), or 5 (High)."
+    if status == "completed":
+        return "Completed tasks cannot be searched: the TickTick API only lists undone tasks."
+    if status is not None and status != "active":
+        return "Invalid status. Must be: active."
+    if limit is not None and limit < 0:
+        return "Invalid limit. Must be 0 or greater."
+    try:
+        output_format, fields = resolve_output(output_format, fields, "task")
+    except ValueError as e:
+        return str(e)
+    
+    try:
+        # Validate the due date range if provided
+        bounds = {}
+        for date_str, date_name in [(due_after, "due_after"), (due_before, "due_before")]:
+            if date_str:
+                try:
+                    bounds[date_name] = parse_date(date_str)
+                except ValueError:
+                    return f"Invalid {date_name} format. Use ISO format: YYYY-MM-DDThh:mm:ss+0000"
+        
+        projects = await fetch_projects()
+        if 'error' in projects:
+            return f"Error fetching projects: {projects['error']}"
+        
+        needle = query.lower() if query else None
+        
+        def matches(task: Dict) -> bool:
+            if needle and needle not in (task.get('title') or '').lower() \
+                    and needle not in (task.get('content') or '').lower():
+                return False
+            if priority is not None and task.get('priority', 0) != priority:
+                return False
+            if bounds:
+                if not task.get('dueDate'):
+                    return False
+                try:
+                    due = parse_date(task['dueDate'])
+                except ValueError:
+                    return False
+                if 'due_after' in bounds and due < bounds['due_after']:
+                    return False
+                if 'due_before' in bounds and due > bounds['due_before']:
+                    return False
+            return True
+        
+        results = await fetch_all_project_data(projects, max_concurrency)
+        
+        matched = []
+        failed = []
+        for project, project_data in zip(projects, results):
+            if 'error' in project_data:
+                failed.append(project.get('name', project.get('id')))
+                continue
+            matched.extend(task for task in project_data.get('tasks', []) if matches(task))
+        
+        try:
+            page, offset, next_cursor = paginate(matched, page_size(limit), cursor)
+        except ValueError as e:
+            return str(e)
+        
+        result = render_items("task", page, format_task, len(matched), offset, next_cursor,
+                              "search_tasks",
+                              f" matching the search across {len(projects) - len(failed)} projects",
+                              output_format=output_format, fields=fields,
+                              notes={"failed_projects": failed})
+        if failed and output_format == "text":
+            result += f"Could not search {len(failed)} projects: {', '.join(failed)}\n"
+        
+        return result
+    except Exception as e:
+        logger.error(f"Error in search_tasks: {e}")
+        return f"Error searching tasks: {str(e)}"
+
+@tool()
+async def find_tasks(
+    query: str,
+    project_id: str = None,
+    limit: int = 10,
+    min_similarity: float = None,
+    output_format: str = None,
+    fields: str = None
+) -> str:
+    """
+    Find undone tasks by approximate text, ranked by relevance, across all projects.
+    
+    Matches the title, content, description and checklist items, tolerating typos
+    and partial words. Returns task and project IDs for use with the other tools.
+    
+    Args:
+        query: Words to look for
+        project_id: ID or name of a project, to find only its tasks (optional)
+        limit: Maximum number of matches to return (optional, defaults to 10, 0 for all)
+        min_similarity: Minimum fraction of the query matched, from 0 to 1 (optional,
+            defaults to 0.4)
+        output_format: "text", "json" or "tsv" (optional, defaults to the server setting)
+        fields: Comma-separated match fields (id, projectId, title, score, similarity)
+            to return in json/tsv output (optional)
+    """
+    error = await ensure_client()
+    if error:
+        return error
+    
+    if not query or not query.strip():
+        return "Invalid query. Must contain at least one word."
+    if limit is None or limit < 0:
+        return "Invalid limit. Must be 0 or greater."
+    if min_similarity is None:
+        min_similarity = DEFAULT_MIN_SIMILARITY
+    if not 0 <= min_similarity <= 1:
+        return "Invalid min_similarity. Must be between 0 and 1."
+    try:
+        output_format, fields = resolve_output(output_format, fields, "match")
+        if project_id:
+            project_id = await resolve_project_id(project_id)
+    except ValueError as e:
+        return str(e)
+    
+    try:
+        index, failed = await load_text_index()
+        with span("text_index.search", tasks=len(index)) as current:
+            matches = index.search(query, limit, min_similarity, project_id)
+            current.set(matches=len(matches))
+        
+        result = render_items("task", matches, format_match, len(matches),
+                              scope=f" matching '{query}'", output_format=output_format,
+                              fields=fields, notes={"failed_projects": failed})
+        if failed and output_format == "text":
+            result += f"Could not read {len(failed)} projects: {', '.join(failed)}\n"
+        return result
+    except Exception as e:
+        logger.error(f"Error in find_tasks: {e}")
+        return f"Error finding tasks: {str(e)}"
+
+@tool()
+async def get_agenda(
+    view: str = "today",
+    days: int = 7,
+    time_zone: str = None,
+    limit: int = None,
+    cursor: str = None,
+    output_format: str = None,
+    fields: str = None
+) -> str:
+    """
+    Get undone tasks due today, overdue or coming up, across all projects, in due order.
+    
+    Args:
+        view: "today" (due today), "overdue" (due before now) or "upcoming" (due from
+            today through the next `days` days) (optional, defaults to "today")
+        days: Number of days covered by "upcoming", including today (optional, defaults to 7)
+        time_zone: IANA time zone that defines "today", e.g. "Europe/Berlin" (optional,
+            defaults to TICKTICK_TIMEZONE or the server's local time zone)
+        limit: Maximum number of tasks to return (optional, 0 for all)
+        cursor: Continuation cursor returned by a previous call (optional)
+        output_format: "text", "json" or "tsv" (optional, defaults to the server setting)
+        fields: Comma-separated task fields to return in json/tsv output (optional)
+    """
+    error = await ensure_client()
+    if error:
+        return error
+    
+    if view not in ("today", "overdue", "upcoming"):
+        return "Invalid view. Must be one of: today, overdue, upcoming."
+    if days < 1:
+        return "Invalid days. Must be 1 or greater."
+    if limit is not None and limit < 0:
+        return "Invalid limit. Must be 0 or greater."
+    time_zone = time_zone or os.getenv("TICKTICK_TIMEZONE")
+    zone = get_zone(time_zone) if time_zone else datetime.now().astimezone().tzinfo
+    if zone is None:
+        return f"Invalid time_zone: {time_zone}. Use an IANA name such as Europe/Berlin."
+    try:
+        output_format, fields = resolve_output(output_format, fields, "task")
+    except ValueError as e:
+        return str(e)
+    
+    try:
+        index, failed = await load_agenda()
+        
+        now = datetime.now(zone)
+        today = datetime.combine(now.date(), datetime.min.time(), zone)
+        if view == "today":
+            start, end, scope = today, today + timedelta(days=1), " due today"
+        elif view == "overdue":
+            start, end, scope = None, now, " overdue"
+        else:
+            start, end = today, today + timedelta(days=days)
+            scope = f" due in the next {days} days"
+        
+        matches = index.query(start, end, zone)
+        due = {task.get('id'): int(timestamp) for timestamp, task in matches}
+        try:
+            page, offset, next_cursor = paginate(
+                [task for _, task in matches], page_size(limit), cursor,
+                key=lambda task: (due[task.get('id')], task.get('id') or ''))
+        except ValueError as e:
+            return str(e)
+        
+        result = render_items("task", page, format_task, len(matches), offset, next_cursor,
+                              "get_agenda", f"{scope} ({now.tzname()})",
+                              output_format=output_format, fields=fields,
+                              notes={"failed_projects": failed})
+        if failed and output_format == "text":
+            result += f"Could not read {len(failed)} projects: {', '.join(failed)}\n"
+        return result
+    except Exception as e:
+        logger.error(f"Error in get_agenda: {e}")
+        return f"Error building agenda: {str(e)}"
+
+@tool()
 async def create_task(
     title: str, 
     project_id: str, 
     content: str = None, 
     start_date: str = None, 
     due_date: str = None, 
-    priority: int = 0
+    priority: int = 0,
+    output_format: str = None,
+    fields: str = None
 ) -> str:
     """
     Create a new task in TickTick.
     
     Args:
         title: Task title
-        project_id: ID of the project to add the task to
+        project_id: ID or name of the project to add the task to
         content: Task description/content (optional)
         start_date: Start date in ISO format YYYY-MM-DDThh:mm:ss+0000 (optional)
         due_date: Due date in ISO format YYYY-MM-DDThh:mm:ss+0000 (optional)
         priority: Priority level (0: None, 1: Low, 3: Medium, 5: High) (optional)
+        output_format: "text", "json" or "tsv" (optional, defaults to the server setting)
+        fields: Comma-separated task fields to return in json/tsv output (optional)
     """
-    if not ticktick:
-        if not initialize_client():
-            return "Failed to initialize TickTick client. Please check your API credentials."
+    error = await ensure_client()
+    if error:
+        return error
     
-    # Validate priority
-    if priority not in [0, 1, 3, 5]:
-        return "Invalid priority. Must be 0 (None), 1 (Low), 3 (Medium), or 5 (High)."
+    # Validate priority and dates
+    error = validate_task_fields(priority, start_date, due_date, priority_required=True)
+    if error:
+        return error
+    try:
+        output_format, fields = resolve_output(output_format, fields, "task")
+        project_id = await resolve_project_id(project_id)
+    except ValueError as e:
+        return str(e)
     
     try:
-        # Validate dates if provided
-        for date_str, date_name in [(start_date, "start_date"), (due_date, "due_date")]:
-            if date_str:
-                try:
-                    # Try to parse the date to validate it
-                    datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-                except ValueError:
-                    return f"Invalid {date_name} format. Use ISO format: YYYY-MM-DDThh:mm:ss+0000"
-        
-        task = ticktick.create_task(
+        task = await current_client().create_task(
             title=title,
             project_id=project_id,
             content=content,
@@ -264,14 +1203,36 @@ async def create_task(
         )
         
         if 'error' in task:
+            forget_project_state(project_id)
             return f"Error creating task: {task['error']}"
         
-        return f"Task created successfully:\n\n" + format_task(task)
+        record_task_saved(task)
+        
+        return render_item(task, format_task, output_format, fields,
+                           heading="Task created successfully:\n\n")
     except Exception as e:
         logger.error(f"Error in create_task: {e}")
         return f"Error creating task: {str(e)}"
 
-@mcp.tool()
+# API names of the update_task fields, for acknowledging queued updates
+QUEUED_FIELD_NAMES = {"title": "title", "content": "content", "start_date": "startDate",
+                      "due_date": "dueDate", "priority": "priority"}
+
+def queue_update(queue: WriteBehindQueue, task_id: str, project_id: str, **fields) -> Dict:
+    """
+    Queue an update_task call.
+    
+    Returns:
+        An acknowledgement record with the task, every change pending for it
+        and the number of updates merged into one request
+    """
+    entry = queue.enqueue(task_id, project_id,
+                          {name: value for name, value in fields.items() if value is not None})
+    record = {"id": task_id, "projectId": project_id, "queued": True, "updates": entry["updates"]}
+    record.update((QUEUED_FIELD_NAMES[name], value) for name, value in entry["fields"].items())
+    return record
+
+@tool()
 async def update_task(
     task_id: str,
     project_id: str,
@@ -279,39 +1240,55 @@ async def update_task(
     content: str = None,
     start_date: str = None,
     due_date: str = None,
-    priority: int = None
+    priority: int = None,
+    output_format: str = None,
+    fields: str = None
 ) -> str:
     """
     Update an existing task in TickTick.
     
+    With write-behind enabled, the update is queued and acknowledged at once,
+    and quick successive updates of the same task are sent as one request.
+    The acknowledgement holds the fields pending for the task; unless fields
+    is given, json/tsv output also includes "queued" and "updates" (the number
+    of updates merged into one request).
+    
     Args:
         task_id: ID of the task to update
-        project_id: ID of the project the task belongs to
+        project_id: ID or name of the project the task belongs to
         title: New task title (optional)
         content: New task description/content (optional)
         start_date: New start date in ISO format YYYY-MM-DDThh:mm:ss+0000 (optional)
         due_date: New due date in ISO format YYYY-MM-DDThh:mm:ss+0000 (optional)
         priority: New priority level (0: None, 1: Low, 3: Medium, 5: High) (optional)
+        output_format: "text", "json" or "tsv" (optional, defaults to the server setting)
+        fields: Comma-separated task fields to return in json/tsv output (optional)
     """
-    if not ticktick:
-        if not initialize_client():
-            return "Failed to initialize TickTick client. Please check your API credentials."
+    error = await ensure_client()
+    if error:
+        return error
     
-    # Validate priority if provided
-    if priority is not None and priority not in [0, 1, 3, 5]:
-        return "Invalid priority. Must be 0 (None), 1 (Low), 3 (Medium), or 5 (High)."
+    # Validate priority and dates if provided
+    error = validate_task_fields(priority, start_date, due_date)
+    if error:
+        return error
+    try:
+        fields_given = bool(fields)
+        output_format, fields = resolve_output(output_format, fields, "task")
+        project_id = await resolve_project_id(project_id)
+    except ValueError as e:
+        return str(e)
     
     try:
-        # Validate dates if provided
-        for date_str, date_name in [(start_date, "start_date"), (due_date, "due_date")]:
-            if date_str:
-                try:
-                    # Try to parse the date to validate it
-                    datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-                except ValueError:
-                    return f"Invalid {date_name} format. Use ISO format: YYYY-MM-DDThh:mm:ss+0000"
+        queue = current_write_queue()
+        if queue:
+            entry = queue_update(queue, task_id, project_id, title=title, content=content,
+                                 start_date=start_date, due_date=due_date, priority=priority)
+            heading = f"Task update queued; it will be sent to TickTick within {queue.window:g}s:\n\n"
+            projection = fields if fields_given else fields + ["queued", "updates"]
+            return render_item(entry, format_queued_update, output_format, projection, heading=heading)
         
-        task = ticktick.update_task(
+        task = await current_client().update_task(
             task_id=task_id,
             project_id=project_id,
             title=title,
@@ -322,64 +1299,328 @@ async def update_task(
         )
         
         if 'error' in task:
+            forget_project_state(project_id)
             return f"Error updating task: {task['error']}"
         
-        return f"Task updated successfully:\n\n" + format_task(task)
+        record_task_saved(task)
+        
+        return render_item(task, format_task, output_format, fields,
+                           heading="Task updated successfully:\n\n")
     except Exception as e:
         logger.error(f"Error in update_task: {e}")
         return f"Error updating task: {str(e)}"
 
-@mcp.tool()
+@tool()
 async def complete_task(project_id: str, task_id: str) -> str:
     """
     Mark a task as complete.
     
     Args:
-        project_id: ID of the project
+        project_id: ID or name of the project
         task_id: ID of the task
     """
-    if not ticktick:
-        if not initialize_client():
-            return "Failed to initialize TickTick client. Please check your API credentials."
+    error = await ensure_client()
+    if error:
+        return error
+    
+    try:
+        project_id = await resolve_project_id(project_id)
+    except ValueError as e:
+        return str(e)
     
     try:
-        result = ticktick.complete_task(project_id, task_id)
+        await settle_writes(task_id=task_id)
+        result = await current_client().complete_task(project_id, task_id)
         if 'error' in result:
+            forget_project_state(project_id)
             return f"Error completing task: {result['error']}"
         
+        record_task_removed(project_id, task_id)
+        
         return f"Task {task_id} marked as complete."
     except Exception as e:
         logger.error(f"Error in complete_task: {e}")
         return f"Error completing task: {str(e)}"
 
-@mcp.tool()
+@tool()
 async def delete_task(project_id: str, task_id: str) -> str:
     """
     Delete a task.
     
     Args:
-        project_id: ID of the project
+        project_id: ID or name of the project
         task_id: ID of the task
     """
-    if not ticktick:
-        if not initialize_client():
-            return "Failed to initialize TickTick client. Please check your API credentials."
+    error = await ensure_client()
+    if error:
+        return error
+    
+    try:
+        project_id = await resolve_project_id(project_id)
+    except ValueError as e:
+        return str(e)
     
     try:
-        result = ticktick.delete_task(project_id, task_id)
+        queue = current_write_queue()
+        if queue:
+            await queue.discard(task_id=task_id)
+        result = await current_client().delete_task(project_id, task_id)
         if 'error' in result:
+            forget_project_state(project_id)
             return f"Error deleting task: {result['error']}"
         
+        record_task_removed(project_id, task_id)
+        
         return f"Task {task_id} deleted successfully."
     except Exception as e:
         logger.error(f"Error in delete_task: {e}")
         return f"Error deleting task: {str(e)}"
 
-@mcp.tool()
+# Batch task tools
+
+# Fields accepted by each batch operation, mapped to whether they are required
+BATCH_CREATE_FIELDS = {"title": True, "project_id": True, "content": False,
+                       "start_date": False, "due_date": False, "priority": False}
+BATCH_UPDATE_FIELDS = {"task_id": True, "project_id": True, "title": False, "content": False,
+                       "start_date": False, "due_date": False, "priority": False}
+BATCH_TASK_REF_FIELDS = {"task_id": True, "project_id": True}
+
+def validate_batch_item(item: Any, fields: Dict[str, bool]) -> Optional[str]:
+    """
+    Validate one batch operation against the accepted fields.
+    
+    Returns:
+        An error message, or None if the item is valid
+    """
+    if not isinstance(item, dict):
+        return "Each item must be an object."
+    unknown = sorted(set(item) - set(fields))
+    if unknown:
+        return f"Unknown fields: {', '.join(unknown)}."
+    missing = [name for name, required in fields.items() if required and not item.get(name)]
+    if missing:
+        return f"Missing required fields: {', '.join(missing)}."
+    return validate_task_fields(item.get('priority'), item.get('start_date'), item.get('due_date'))
+
+async def run_batch(items: List[Any], fields: Dict[str, bool], operation,
+                    max_concurrency: Optional[int] = None) -> List[Tuple[bool, str, str]]:
+    """
+    Validate every item up front, then run the valid ones concurrently.
+    
+    Args:
+        items: Batch operations
+        fields: Accepted fields for each operation
+        operation: Coroutine function taking an item, with its project_id resolved from
+            a name if needed, and returning (ok, task_id, detail)
+        max_concurrency: Maximum number of operations in flight
+            (defaults to TICKTICK_BATCH_CONCURRENCY or 4)
+    
+    Returns:
+        A (ok, task_id, detail) tuple per item, in input order
+    """
+    if max_concurrency is None:
+        max_concurrency = int(os.getenv("TICKTICK_BATCH_CONCURRENCY", DEFAULT_BATCH_CONCURRENCY))
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    errors = [validate_batch_item(item, fields) for item in items]
+    
+    async def run(item: Dict, error: Optional[str]) -> Tuple[bool, str, str]:
+        task_id = item.get('task_id', '') if isinstance(item, dict) else ''
+        if error:
+            return False, task_id, error
+        async with semaphore:
+            try:
+                item = dict(item, project_id=await resolve_project_id(item['project_id']))
+            except ValueError as e:
+                return False, task_id, str(e)
+            try:
+                return await operation(item)
+            except Exception as e:
+                logger.error(f"Batch operation failed: {e}")
+                return False, task_id, str(e)
+    
+    return await asyncio.gather(*(run(item, error) for item, error in zip(items, errors)))
+
+def format_batch_results(action: str, results: List[Tuple[bool, str, str]],
+                         output_format: str = "text") -> str:
+    """Render batch results as a per-item table, or as compact json/tsv records."""
+    succeeded = sum(1 for ok, _, _ in results if ok)
+    if output_format != "text":
+        items = [{"ok": ok, "taskId": task_id, "detail": detail} for ok, task_id, detail in results]
+        return render_items("result", items, None, len(items), output_format=output_format,
+                            fields=["ok", "taskId", "detail"],
+                            notes={"succeeded": succeeded, "failed": len(results) - succeeded})
+    lines = [
+        f"{action}: {succeeded} succeeded, {len(results) - succeeded} failed.",
+        "",
+        "| # | Result | Task ID | Detail |",
+        "|---|--------|---------|--------|"
+    ]
+    for i, (ok, task_id, detail) in enumerate(results, 1):
+        detail = detail.replace("|", "\\|").replace("\n", " ")
+        lines.append(f"| {i} | {'ok' if ok else 'error'} | {task_id or '-'} | {detail} |")
+    return "\n".join(lines) + "\n"
+
+@tool()
+async def batch_create_tasks(tasks: List[Dict[str, Any]], max_concurrency: int = None,
+                             output_format: str = None) -> str:
+    """
+    Create many tasks at once. Each item is validated up front, valid items are
+    created concurrently and failures are reported per item.
+    
+    Args:
+        tasks: Tasks to create, each with title and project_id (ID or name) and optionally content,
+            start_date, due_date (ISO format YYYY-MM-DDThh:mm:ss+0000) and priority (0, 1, 3, 5)
+        max_concurrency: Maximum number of requests in flight (optional)
+        output_format: "text", "json" or "tsv" (optional, defaults to the server setting)
+    """
+    error = await ensure_client()
+    if error:
+        return error
+    
+    try:
+        output_format, _ = resolve_output(output_format, None, "result")
+    except ValueError as e:
+        return str(e)
+    
+    async def create(item: Dict) -> Tuple[bool, str, str]:
+        task = await current_client().create_task(
+            title=item['title'],
+            project_id=item['project_id'],
+            content=item.get('content'),
+            start_date=item.get('start_date'),
+            due_date=item.get('due_date'),
+            priority=item.get('priority', 0)
+        )
+        if 'error' in task:
+            forget_project_state(item['project_id'])
+            return False, '', task['error']
+        record_task_saved(task)
+        return True, task.get('id', ''), f"Created '{task.get('title', item['title'])}'"
+    
+    results = await run_batch(tasks, BATCH_CREATE_FIELDS, create, max_concurrency)
+    return format_batch_results("Batch create", results, output_format)
+
+@tool()
+async def batch_update_tasks(tasks: List[Dict[str, Any]], max_concurrency: int = None,
+                             output_format: str = None) -> str:
+    """
+    Update many tasks at once. Each item is validated up front, valid items are
+    updated concurrently and failures are reported per item.
+    
+    Args:
+        tasks: Updates, each with task_id and project_id (ID or name) and optionally title, content,
+            start_date, due_date (ISO format YYYY-MM-DDThh:mm:ss+0000) and priority (0, 1, 3, 5)
+        max_concurrency: Maximum number of requests in flight (optional)
+        output_format: "text", "json" or "tsv" (optional, defaults to the server setting)
+    """
+    error = await ensure_client()
+    if error:
+        return error
+    
+    try:
+        output_format, _ = resolve_output(output_format, None, "result")
+    except ValueError as e:
+        return str(e)
+    
+    async def update(item: Dict) -> Tuple[bool, str, str]:
+        queue = current_write_queue()
+        if queue:
+            record = queue_update(queue, item['task_id'], item['project_id'], title=item.get('title'),
+                                  content=item.get('content'), start_date=item.get('start_date'),
+                                  due_date=item.get('due_date'), priority=item.get('priority'))
+            merged = record['updates'] - 1
+            return True, item['task_id'], f"Queued, merged with {merged} earlier updates" if merged else "Queued"
+        task = await current_client().update_task(
+            task_id=item['task_id'],
+            project_id=item['project_id'],
+            title=item.get('title'),
+            content=item.get('content'),
+            start_date=item.get('start_date'),
+            due_date=item.get('due_date'),
+            priority=item.get('priority')
+        )
+        if 'error' in task:
+            forget_project_state(item['project_id'])
+            return False, item['task_id'], task['error']
+        record_task_saved(task)
+        return True, item['task_id'], "Updated"
+    
+    results = await run_batch(tasks, BATCH_UPDATE_FIELDS, update, max_concurrency)
+    return format_batch_results("Batch update", results, output_format)
+
+@tool()
+async def batch_complete_tasks(tasks: List[Dict[str, Any]], max_concurrency: int = None,
+                             output_format: str = None) -> str:
+    """
+    Mark many tasks as complete at once. Failures are reported per item.
+    
+    Args:
+        tasks: Tasks to complete, each with task_id and project_id (ID or name)
+        max_concurrency: Maximum number of requests in flight (optional)
+        output_format: "text", "json" or "tsv" (optional, defaults to the server setting)
+    """
+    error = await ensure_client()
+    if error:
+        return error
+    
+    try:
+        output_format, _ = resolve_output(output_format, None, "result")
+    except ValueError as e:
+        return str(e)
+    
+    async def complete(item: Dict) -> Tuple[bool, str, str]:
+        await settle_writes(task_id=item['task_id'])
+        result = await current_client().complete_task(item['project_id'], item['task_id'])
+        if 'error' in result:
+            forget_project_state(item['project_id'])
+            return False, item['task_id'], result['error']
+        record_task_removed(item['project_id'], item['task_id'])
+        return True, item['task_id'], "Completed"
+    
+    results = await run_batch(tasks, BATCH_TASK_REF_FIELDS, complete, max_concurrency)
+    return format_batch_results("Batch complete", results, output_format)
+
+@tool()
+async def batch_delete_tasks(tasks: List[Dict[str, Any]], max_concurrency: int = None,
+                             output_format: str = None) -> str:
+    """
+    Delete many tasks at once. Failures are reported per item.
+    
+    Args:
+        tasks: Tasks to delete, each with task_id and project_id (ID or name)
+        max_concurrency: Maximum number of requests in flight (optional)
+        output_format: "text", "json" or "tsv" (optional, defaults to the server setting)
+    """
+    error = await ensure_client()
+    if error:
+        return error
+    
+    try:
+        output_format, _ = resolve_output(output_format, None, "result")
+    except ValueError as e:
+        return str(e)
+    
+    async def delete(item: Dict) -> Tuple[bool, str, str]:
+        queue = current_write_queue()
+        if queue:
+            await queue.discard(task_id=item['task_id'])
+        result = await current_client().delete_task(item['project_id'], item['task_id'])
+        if 'error' in result:
+            forget_project_state(item['project_id'])
+            return False, item['task_id'], result['error']
+        record_task_removed(item['project_id'], item['task_id'])
+        return True, item['task_id'], "Deleted"
+    
+    results = await run_batch(tasks, BATCH_TASK_REF_FIELDS, delete, max_concurrency)
+    return format_batch_results("Batch delete", results, output_format)
+
+@tool()
 async def create_project(
     name: str,
     color: str = "#F18181",
-    view_mode: str = "list"
+    view_mode: str = "list",
+    output_format: str = None,
+    fields: str = None
 ) -> str:
     """
     Create a new project in TickTick.
@@ -388,61 +1629,168 @@ async def create_project(
         name: Project name
         color: Color code (hex format) (optional)
         view_mode: View mode - one of list, kanban, or timeline (optional)
+        output_format: "text", "json" or "tsv" (optional, defaults to the server setting)
+        fields: Comma-separated project fields to return in json/tsv output (optional)
     """
-    if not ticktick:
-        if not initialize_client():
-            return "Failed to initialize TickTick client. Please check your API credentials."
+    error = await ensure_client()
+    if error:
+        return error
     
     # Validate view_mode
     if view_mode not in ["list", "kanban", "timeline"]:
         return "Invalid view_mode. Must be one of: list, kanban, timeline."
+    try:
+        output_format, fields = resolve_output(output_format, fields, "project")
+    except ValueError as e:
+        return str(e)
     
     try:
-        project = ticktick.create_project(
+        project = await current_client().create_project(
             name=name,
             color=color,
             view_mode=view_mode
         )
         
         if 'error' in project:
+            # The project may have been created anyway (e.g. after a timeout)
+            task_mirror = current_mirror()
+            if task_mirror:
+                task_mirror.invalidate()
             return f"Error creating project: {project['error']}"
         
-        return f"Project created successfully:\n\n" + format_project(project)
+        task_mirror = current_mirror()
+        if task_mirror:
+            task_mirror.upsert_project(project)
+        current_names().invalidate()
+        
+        return render_item(project, format_project, output_format, fields,
+                           heading="Project created successfully:\n\n")
     except Exception as e:
         logger.error(f"Error in create_project: {e}")
         return f"Error creating project: {str(e)}"
 
-@mcp.tool()
+@tool()
 async def delete_project(project_id: str) -> str:
     """
     Delete a project.
     
     Args:
-        project_id: ID of the project
+        project_id: ID or name of the project
     """
-    if not ticktick:
-        if not initialize_client():
-            return "Failed to initialize TickTick client. Please check your API credentials."
+    error = await ensure_client()
+    if error:
+        return error
     
     try:
-        result = ticktick.delete_project(project_id)
+        project_id = await resolve_project_id(project_id)
+    except ValueError as e:
+        return str(e)
+    
+    try:
+        queue = current_write_queue()
+        if queue:
+            await queue.discard(project_id=project_id)
+        result = await current_client().delete_project(project_id)
         if 'error' in result:
+            # The project may have been deleted anyway (e.g. after a timeout)
+            forget_project_state(project_id)
+            task_mirror = current_mirror()
+            if task_mirror:
+                task_mirror.invalidate()
             return f"Error deleting project: {result['error']}"
         
+        task_mirror = current_mirror()
+        if task_mirror:
+            task_mirror.remove_project(project_id)
+        for index in task_indexes(current_client()):
+            index.remove_project(project_id)
+        current_names().invalidate()
+        
         return f"Project {project_id} deleted successfully."
     except Exception as e:
         logger.error(f"Error in delete_project: {e}")
         return f"Error deleting project: {str(e)}"
 
-def main():
-    """Main entry point for the MCP server."""
-    # Initialize the TickTick client
-    if not initialize_client():
+async def serve(transport: str = "stdio", metrics_port: Optional[int] = None):
+    """
+    Initialize the client and serve MCP on the same event loop.
+    
+    The server starts answering immediately; the API connectivity probe and
+    cache warm-up run in the background. With the sse and streamable-http
+    transports one process serves every connected client, sharing the client,
+    its connection pool and the cache.
+    
+    Args:
+        transport: One of "stdio", "sse" or "streamable-http"
+        metrics_port: Port to serve Prometheus metrics on at /metrics
+            (defaults to TICKTICK_METRICS_PORT; unset disables it)
+    """
+    global startup_started, warmup_task, tenant_pool
+    startup_started = time.perf_counter()
+    if not tracing_enabled():
+        tracing_from_env()
+    tenant_pool = tenant_pool_from_env()
+    
+    # Initialize the TickTick client (optional when serving tenants)
+    if not await initialize_client():
         logger.error("Failed to initialize TickTick client. Please check your API credentials.")
-        return
+        if tenant_pool is None:
+            return
+        logger.info(f"Serving tenants from {tenant_pool.tenants_dir} only")
+    
+    watch_handshake()
+    if ticktick:
+        warmup_task = asyncio.ensure_future(warm_up())
+    
+    metrics_server = None
+    metrics_port = metrics_port or int(os.getenv("TICKTICK_METRICS_PORT", 0))
+    if metrics_port:
+        metrics_server = await start_metrics_server(
+            os.getenv("TICKTICK_METRICS_HOST", "127.0.0.1"), metrics_port)
+    
+    try:
+        # Run the server
+        if transport == "sse":
+            await mcp.run_sse_async()
+        elif transport == "streamable-http":
+            await mcp.run_streamable_http_async()
+        else:
+            await mcp.run_stdio_async()
+    finally:
+        if metrics_server:
+            metrics_server.close()
+        if warmup_task:
+            warmup_task.cancel()
+        if mirror_sync_task:
+            mirror_sync_task.cancel()
+        if write_queue:
+            await write_queue.close()
+        if ticktick:
+            await ticktick.close()
+        if tenant_pool is not None:
+            await tenant_pool.close()
+        if mirror:
+            mirror.close()
+        shutdown_tracing()
+
+def main(transport: str = "stdio", host: Optional[str] = None, port: Optional[int] = None,
+         metrics_port: Optional[int] = None):
+    """
+    Main entry point for the MCP server.
     
-    # Run the server
-    mcp.run(transport='stdio')
+    Args:
+        transport: One of "stdio", "sse" or "streamable-http"
+        host: Interface the HTTP transports listen on (defaults to 127.0.0.1)
+        port: Port the HTTP transports listen on (defaults to 8000)
+        metrics_port: Port to serve Prometheus metrics on (optional)
+    """
+    if transport not in TRANSPORTS:
+        raise ValueError(f"Unsupported transport: {transport}")
+    if host:
+        mcp.settings.host = host
+    if port:
+        mcp.settings.port = port
+    asyncio.run(serve(transport, metrics_port))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
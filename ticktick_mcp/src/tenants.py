@@ -0,0 +1,195 @@
+"""
+Per-account TickTick clients for serving many accounts from one server.
+
+Each tenant's tokens live in their own .env-style file (<tenant>.env in the
+tenants directory) and are refreshed and saved back independently. The file
+also holds the tenant's TICKTICK_TENANT_SECRET, which every request for the
+tenant must present as a bearer token before its client is used. Every
+tenant's client sends its requests over one shared HTTP connection pool, so
+adding accounts does not multiply sockets, and the least recently used
+clients are closed once more than max_clients are open.
+"""
+
+import os
+import re
+import hmac
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from dotenv import dotenv_values
+
+from .async_ticktick_client import AsyncTickTickClient, http_limits_from_env, create_http_client
+from .cache import CachedTickTickClient
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Default pool settings (overridable via environment variables)
+DEFAULT_MAX_TENANT_CLIENTS = 32
+DEFAULT_TENANT_HEADER = "X-TickTick-Tenant"
+
+# Tenant names map to file names, so keep them to a safe character set
+TENANT_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,127}$")
+
+# Setting in a tenant's token file holding the secret its requests must present
+TENANT_SECRET_VAR = "TICKTICK_TENANT_SECRET"
+
+class TenantAuthError(ValueError):
+    """A request did not name a known tenant together with that tenant's secret."""
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    """The token of an "Authorization: Bearer <token>" header value, if any."""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        return None
+    return token.strip()
+
+class TenantClientPool:
+    """
+    Cached per-tenant clients sharing one HTTP connection pool, with LRU eviction.
+    """
+
+    def __init__(self, tenants_dir: str, max_clients: int = DEFAULT_MAX_TENANT_CLIENTS,
+                 header: str = DEFAULT_TENANT_HEADER):
+        """
+        Args:
+            tenants_dir: Directory holding one <tenant>.env token file per account
+            max_clients: Maximum number of tenant clients kept open
+            header: HTTP request header naming the tenant of a tool call
+        """
+        self.tenants_dir = Path(tenants_dir)
+        self.max_clients = max(1, max_clients)
+        self.header = header
+        self.max_connections, self.max_keepalive_connections, self.timeout = http_limits_from_env()
+        self.http = create_http_client(self.max_connections, self.max_keepalive_connections,
+                                       self.timeout)
+        self._clients: "OrderedDict[str, CachedTickTickClient]" = OrderedDict()
+        # Secrets of the tenants with an open client, read when the client was created
+        self._secrets: Dict[str, str] = {}
+        self.created = 0
+        self.evictions = 0
+        self.rejected = 0
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def env_path(self, tenant: str) -> Path:
+        """
+        Get the token file of a tenant.
+
+        Raises:
+            ValueError: If the tenant name is invalid or the tenant has no token file
+        """
+        if not TENANT_NAME.match(tenant):
+            raise ValueError(f"Invalid tenant: {tenant!r}")
+        path = self.tenants_dir / f"{tenant}.env"
+        if not path.is_file():
+            raise ValueError(f"Unknown tenant: {tenant}")
+        return path
+
+    def authenticate(self, tenant: Optional[str], secret: Optional[str]) -> str:
+        """
+        Check that a request names a known tenant and presents its secret.
+
+        Unknown tenants, tenants without a secret and wrong secrets are all
+        rejected with the same message, so callers cannot probe tenant names.
+
+        Returns:
+            The tenant's secret
+
+        Raises:
+            TenantAuthError: If the request is not authenticated for the tenant
+        """
+        if not tenant:
+            self.rejected += 1
+            raise TenantAuthError(f"Unauthorized: requests must name a tenant in the {self.header} header.")
+        expected = self._secrets.get(tenant) if tenant in self._clients else None
+        if expected is None:
+            try:
+                expected = dotenv_values(self.env_path(tenant)).get(TENANT_SECRET_VAR) or None
+            except ValueError:
+                expected = None
+            if expected is None:
+                logger.warning(f"Rejected request for unknown tenant or tenant without "
+                               f"{TENANT_SECRET_VAR}: {tenant!r}")
+        if expected is None or secret is None or not hmac.compare_digest(secret.encode(), expected.encode()):
+            self.rejected += 1
+            raise TenantAuthError(f"Unauthorized: invalid tenant or credentials for {tenant!r}.")
+        return expected
+
+    async def get(self, tenant: Optional[str], secret: Optional[str]) -> CachedTickTickClient:
+        """
+        Get the client of a tenant after checking its secret, creating the client on first use.
+
+        Args:
+            tenant: Tenant named by the request
+            secret: Bearer token presented by the request
+
+        Raises:
+            TenantAuthError: If the request is not authenticated for the tenant
+            ValueError: If the tenant's token file has no access token
+        """
+        expected = self.authenticate(tenant, secret)
+        client = self._clients.get(tenant)
+        if client is not None:
+            self._clients.move_to_end(tenant)
+            return client
+
+        client = CachedTickTickClient(
+            AsyncTickTickClient(env_path=str(self.env_path(tenant)), http=self.http))
+        self._clients[tenant] = client
+        self._secrets[tenant] = expected
+        self.created += 1
+        logger.info(f"Opened TickTick client for tenant {tenant}")
+
+        while len(self._clients) > self.max_clients:
+            evicted, evicted_client = self._clients.popitem(last=False)
+            self._secrets.pop(evicted, None)
+            self.evictions += 1
+            logger.info(f"Closing idle TickTick client for tenant {evicted}")
+            await evicted_client.close()
+        return client
+
+    async def close(self) -> None:
+        """Close every tenant client and the shared HTTP connection pool."""
+        while self._clients:
+            _, client = self._clients.popitem()
+            await client.close()
+        self._secrets.clear()
+        await self.http.aclose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the number of open, created and evicted tenant clients, rejected requests and the shared pool size."""
+        connections = []
+        pool = getattr(getattr(self.http, "_transport", None), "_pool", None)
+        if pool is not None:
+            connections = list(getattr(pool, "connections", []))
+
+        return {
+            "clients": len(self._clients),
+            "max_clients": self.max_clients,
+            "created": self.created,
+            "evictions": self.evictions,
+            "rejected": self.rejected,
+            "max_connections": self.max_connections,
+            "open_connections": len(connections)
+        }
+
+def tenant_pool_from_env() -> Optional[TenantClientPool]:
+    """
+    Build the tenant pool from TICKTICK_TENANTS_DIR, TICKTICK_MAX_TENANT_CLIENTS
+    and TICKTICK_TENANT_HEADER.
+
+    Returns:
+        The pool, or None if TICKTICK_TENANTS_DIR is not set
+    """
+    tenants_dir = os.getenv("TICKTICK_TENANTS_DIR")
+    if not tenants_dir:
+        return None
+    return TenantClientPool(
+        tenants_dir,
+        max_clients=int(os.getenv("TICKTICK_MAX_TENANT_CLIENTS", DEFAULT_MAX_TENANT_CLIENTS)),
+        header=os.getenv("TICKTICK_TENANT_HEADER", DEFAULT_TENANT_HEADER)
+    )
@@ -1,53 +1,147 @@
 import os
 import json
 import base64
+import time
 import requests
 import logging
+import threading
+from collections import Counter
+from requests.adapters import HTTPAdapter
 from pathlib import Path
-from dotenv import load_dotenv
+from dotenv import load_dotenv, dotenv_values
 from typing import Dict, List, Any, Optional, Tuple
 
+from .ratelimit import limiter_from_env, retry_policy_from_env
+from .metrics import record_http
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
-class TickTickClient:
+# Default connection pool settings (overridable via environment variables)
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE = 10
+
+# Refresh the access token this many seconds before it expires
+DEFAULT_REFRESH_MARGIN = 300.0
+
+# TickTick Open API and OAuth token endpoints (overridable via environment variables)
+DEFAULT_BASE_URL = "https://api.ticktick.com/open/v1"
+DEFAULT_TOKEN_URL = "https://ticktick.com/oauth/token"
+
+class BaseTickTickClient:
     """
-    Client for the TickTick API using OAuth2 authentication.
+    Transport-independent parts of the TickTick API client.
+    
+    Holds the OAuth2 credentials and their expiry, the rate limiter and retry
+    policy, builds request payloads and persists refreshed tokens. Subclasses
+    provide the actual HTTP transport.
     """
     
-    def __init__(self):
+    def __init__(self, env_path: Optional[str] = None):
+        """
+        Args:
+            env_path: .env-style file holding the tokens of one account. By default
+                the tokens come from the environment and .env, and refreshed tokens
+                are saved to .env. With env_path, the tokens come only from that
+                file and are saved back to it, while the OAuth client ID and secret
+                may still come from the environment.
+        """
         load_dotenv()
-        self.client_id = os.getenv("TICKTICK_CLIENT_ID")
-        self.client_secret = os.getenv("TICKTICK_CLIENT_SECRET")
-        self.access_token = os.getenv("TICKTICK_ACCESS_TOKEN")
-        self.refresh_token = os.getenv("TICKTICK_REFRESH_TOKEN")
+        if env_path is None:
+            settings = os.environ
+        else:
+            settings = {key: value for key, value in dotenv_values(env_path).items() if value}
+            for key in ("TICKTICK_CLIENT_ID", "TICKTICK_CLIENT_SECRET"):
+                if key not in settings and os.getenv(key):
+                    settings[key] = os.getenv(key)
+        self.env_path = Path(env_path or '.env')
+        
+        self.client_id = settings.get("TICKTICK_CLIENT_ID")
+        self.client_secret = settings.get("TICKTICK_CLIENT_SECRET")
+        self.access_token = settings.get("TICKTICK_ACCESS_TOKEN")
+        self.refresh_token = settings.get("TICKTICK_REFRESH_TOKEN")
+        
+        # Expiry of the access token (epoch seconds), recorded from the OAuth expires_in
+        expires_at = settings.get("TICKTICK_TOKEN_EXPIRES_AT")
+        self.token_expires_at = float(expires_at) if expires_at else None
+        self.refresh_margin = float(os.getenv("TICKTICK_REFRESH_MARGIN", DEFAULT_REFRESH_MARGIN))
         
         if not self.access_token:
+            if env_path is not None:
+                raise ValueError(f"TICKTICK_ACCESS_TOKEN is not set in {env_path}.")
             raise ValueError("TICKTICK_ACCESS_TOKEN environment variable is not set. "
                             "Please run 'uv run -m ticktick_mcp.authenticate' to set up your credentials.")
-            
-        self.base_url = "https://api.ticktick.com/open/v1"
-        self.token_url = "https://ticktick.com/oauth/token"
+        
+        # Overridable to point the client at another deployment, e.g. the fake API
+        self.base_url = os.getenv("TICKTICK_BASE_URL", DEFAULT_BASE_URL).rstrip("/")
+        self.token_url = os.getenv("TICKTICK_TOKEN_URL", DEFAULT_TOKEN_URL)
         self.headers = {
             "Authorization": f"Bearer {self.access_token}",
             "Content-Type": "application/json"
         }
+        
+        # Client-side throttling and retries (configured via TICKTICK_RATE_* / TICKTICK_*RETR*)
+        self.rate_limiter = limiter_from_env()
+        self.retry_policy = retry_policy_from_env()
+        self.request_stats = Counter()
     
-    def _refresh_access_token(self) -> bool:
+    def get_request_stats(self) -> Dict[str, Any]:
         """
-        Refresh the access token using the refresh token.
+        Get request, throttling and retry counters.
         
         Returns:
-            True if successful, False otherwise
+            A dictionary with the number of requests sent, requests delayed by the
+            rate limiter, total seconds spent throttled, retries, 429 responses,
+            token refreshes and the seconds until the access token expires
+        """
+        stats = {
+            "requests": 0,
+            "throttled": 0,
+            "throttle_wait_seconds": 0.0,
+            "retries": 0,
+            "rate_limited_responses": 0,
+            "token_refreshes": 0,
+            "proactive_token_refreshes": 0,
+            "token_refresh_failures": 0
+        }
+        stats.update(self.request_stats)
+        stats["rate_limit"] = self.rate_limiter.rate
+        stats["max_retries"] = self.retry_policy.max_retries
+        stats["token_expires_in"] = (self.token_expires_at - time.time()
+                                     if self.token_expires_at is not None else None)
+        return stats
+    
+    def _token_refresh_due(self) -> bool:
+        """Whether the access token is known to expire within the refresh margin."""
+        return (self.token_expires_at is not None
+                and time.time() >= self.token_expires_at - self.refresh_margin)
+    
+    def _record_throttle(self, waited: float) -> None:
+        """Count a request delayed by the rate limiter."""
+        if waited > 0:
+            self.request_stats["throttled"] += 1
+            self.request_stats["throttle_wait_seconds"] += waited
+    
+    def _record_retry(self, method: str, endpoint: str, reason: Any, delay: float) -> None:
+        """Count and log a retry."""
+        self.request_stats["retries"] += 1
+        logger.warning(f"Retrying {method} {endpoint} in {delay:.2f}s after {reason}")
+    
+    def _build_refresh_request(self) -> Optional[Tuple[Dict[str, str], Dict[str, str]]]:
+        """
+        Build the form data and headers for a refresh token request.
+        
+        Returns:
+            A (data, headers) tuple, or None if the token cannot be refreshed
         """
         if not self.refresh_token:
             logger.warning("No refresh token available. Cannot refresh access token.")
-            return False
-            
+            return None
+        
         if not self.client_id or not self.client_secret:
             logger.warning("Client ID or Client Secret missing. Cannot refresh access token.")
-            return False
-            
+            return None
+        
         # Prepare the token request
         token_data = {
             "grant_type": "refresh_token",
@@ -64,41 +158,41 @@ class TickTickClient:
             "Content-Type": "application/x-www-form-urlencoded"
         }
         
-        try:
-            # Send the token request
-            response = requests.post(self.token_url, data=token_data, headers=headers)
-            response.raise_for_status()
-            
-            # Parse the response
-            tokens = response.json()
-            
-            # Update the tokens
-            self.access_token = tokens.get('access_token')
-            if 'refresh_token' in tokens:
-                self.refresh_token = tokens.get('refresh_token')
-                
-            # Update the headers
-            self.headers["Authorization"] = f"Bearer {self.access_token}"
-            
-            # Save the tokens to the .env file
-            self._save_tokens_to_env(tokens)
-            
-            logger.info("Access token refreshed successfully.")
-            return True
-            
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error refreshing access token: {e}")
-            return False
+        return token_data, headers
+    
+    def _apply_tokens(self, tokens: Dict[str, Any]) -> None:
+        """
+        Update the client with a token response and persist it.
+        
+        Args:
+            tokens: The parsed OAuth token response
+        """
+        # Update the tokens
+        self.access_token = tokens.get('access_token')
+        if 'refresh_token' in tokens:
+            self.refresh_token = tokens.get('refresh_token')
+        if tokens.get('expires_in'):
+            self.token_expires_at = time.time() + float(tokens['expires_in'])
+        else:
+            self.token_expires_at = None
+        
+        # Update the headers
+        self.headers["Authorization"] = f"Bearer {self.access_token}"
+        
+        # Save the tokens to the .env file
+        self._save_tokens_to_env(tokens)
+        
+        logger.info("Access token refreshed successfully.")
     
     def _save_tokens_to_env(self, tokens: Dict[str, str]) -> None:
         """
-        Save the tokens to the .env file.
+        Save the tokens to the .env file (or the account's env_path).
         
         Args:
             tokens: A dictionary containing the access_token and optionally refresh_token
         """
         # Load existing .env file content
-        env_path = Path('.env')
+        env_path = self.env_path
         env_content = {}
         
         if env_path.exists():
@@ -113,6 +207,10 @@ class TickTickClient:
         env_content["TICKTICK_ACCESS_TOKEN"] = tokens.get('access_token', '')
         if 'refresh_token' in tokens:
             env_content["TICKTICK_REFRESH_TOKEN"] = tokens.get('refresh_token', '')
+        if self.token_expires_at is not None:
+            env_content["TICKTICK_TOKEN_EXPIRES_AT"] = str(int(self.token_expires_at))
+        else:
+            env_content.pop("TICKTICK_TOKEN_EXPIRES_AT", None)
         
         # Make sure client credentials are saved as well
         if self.client_id and "TICKTICK_CLIENT_ID" not in env_content:
@@ -127,6 +225,210 @@ class TickTickClient:
         
         logger.debug("Tokens saved to .env file")
     
+    # Request payload builders
+    @staticmethod
+    def _project_data(name: str = None, color: str = None,
+                      view_mode: str = None, kind: str = None) -> Dict:
+        """Builds the request body for creating or updating a project."""
+        data = {}
+        if name:
+            data["name"] = name
+        if color:
+            data["color"] = color
+        if view_mode:
+            data["viewMode"] = view_mode
+        if kind:
+            data["kind"] = kind
+        return data
+    
+    @staticmethod
+    def _create_task_data(title: str, project_id: str, content: str = None,
+                          start_date: str = None, due_date: str = None,
+                          priority: int = 0, is_all_day: bool = False) -> Dict:
+        """Builds the request body for creating a task."""
+        data = {
+            "title": title,
+            "projectId": project_id
+        }
+        
+        if content:
+            data["content"] = content
+        if start_date:
+            data["startDate"] = start_date
+        if due_date:
+            data["dueDate"] = due_date
+        if priority is not None:
+            data["priority"] = priority
+        if is_all_day is not None:
+            data["isAllDay"] = is_all_day
+        return data
+    
+    @staticmethod
+    def _update_task_data(task_id: str, project_id: str, title: str = None,
+                          content: str = None, priority: int = None,
+                          start_date: str = None, due_date: str = None) -> Dict:
+        """Builds the request body for updating a task."""
+        data = {
+            "id": task_id,
+            "projectId": project_id
+        }
+        
+        if title:
+            data["title"] = title
+        if content:
+            data["content"] = content
+        if priority is not None:
+            data["priority"] = priority
+        if start_date:
+            data["startDate"] = start_date
+        if due_date:
+            data["dueDate"] = due_date
+        return data
+
+class TickTickClient(BaseTickTickClient):
+    """
+    Client for the TickTick API using OAuth2 authentication.
+    
+    All requests, including token refreshes, go through a single pooled
+    keep-alive session so TCP/TLS connections are reused between calls.
+    """
+    
+    def __init__(self, pool_connections: Optional[int] = None,
+                 pool_maxsize: Optional[int] = None, pool_block: Optional[bool] = None):
+        """
+        Initialize the TickTick client.
+        
+        Args:
+            pool_connections: Number of per-host connection pools to keep
+                (defaults to TICKTICK_POOL_CONNECTIONS or 4)
+            pool_maxsize: Maximum number of connections kept per host
+                (defaults to TICKTICK_POOL_MAXSIZE or 10)
+            pool_block: Whether to block instead of opening extra connections
+                once a host's pool is exhausted (defaults to TICKTICK_POOL_BLOCK)
+        """
+        super().__init__()
+        
+        self.pool_connections = pool_connections or int(
+            os.getenv("TICKTICK_POOL_CONNECTIONS", DEFAULT_POOL_CONNECTIONS))
+        self.pool_maxsize = pool_maxsize or int(
+            os.getenv("TICKTICK_POOL_MAXSIZE", DEFAULT_POOL_MAXSIZE))
+        if pool_block is None:
+            pool_block = os.getenv("TICKTICK_POOL_BLOCK", "").lower() in ("1", "true", "yes")
+        self.pool_block = pool_block
+        self.session = self._create_session()
+        
+        # Serializes token refreshes across threads
+        self._refresh_lock = threading.Lock()
+    
+    def _create_session(self) -> requests.Session:
+        """
+        Create the pooled keep-alive session shared by all requests.
+        
+        Returns:
+            A requests session with a sized connection pool mounted for HTTPS and HTTP
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        Get connection pool statistics for tuning the pool size.
+        
+        Returns:
+            A dictionary with the pool configuration and, for each host pool,
+            the number of connections opened, requests served and idle connections
+        """
+        hosts = []
+        seen = set()
+        for adapter in self.session.adapters.values():
+            if id(adapter) in seen:
+                continue
+            seen.add(id(adapter))
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                idle = sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0
+                hosts.append({
+                    "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                    "connections_opened": pool.num_connections,
+                    "requests": pool.num_requests,
+                    "idle_connections": idle
+                })
+        
+        return {
+            "pool_connections": self.pool_connections,
+            "pool_maxsize": self.pool_maxsize,
+            "pool_block": self.pool_block,
+            "hosts": hosts
+        }
+    
+    def close(self) -> None:
+        """Close the underlying session and release pooled connections."""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def _refresh_access_token(self) -> bool:
+        """
+        Refresh the access token using the refresh token.
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        refresh_request = self._build_refresh_request()
+        if not refresh_request:
+            return False
+        token_data, headers = refresh_request
+        
+        try:
+            # Send the token request
+            response = self.session.post(self.token_url, data=token_data, headers=headers)
+            response.raise_for_status()
+            
+            # Parse the response and update the tokens
+            self._apply_tokens(response.json())
+            return True
+        
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error refreshing access token: {e}")
+            return False
+    
+    def _refresh_token_once(self, stale_token: str) -> bool:
+        """
+        Refresh the access token unless another thread already replaced stale_token.
+        
+        Only one refresh runs at a time; threads waiting on the lock reuse its result.
+        
+        Args:
+            stale_token: The access token the caller found expired
+        
+        Returns:
+            True if a fresh access token is available
+        """
+        with self._refresh_lock:
+            if self.access_token != stale_token:
+                return True
+            self.request_stats["token_refreshes"] += 1
+            if self._refresh_access_token():
+                return True
+            # Stop refreshing ahead of time until a refresh succeeds again
+            self.request_stats["token_refresh_failures"] += 1
+            self.token_expires_at = None
+            return False
+    
     def _make_request(self, method: str, endpoint: str, data=None) -> Dict:
         """
         Makes a request to the TickTick API.
@@ -141,36 +443,65 @@ class TickTickClient:
         """
         url = f"{self.base_url}{endpoint}"
         
+        if method not in ("GET", "POST", "DELETE"):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        
+        # Refresh ahead of expiry instead of waiting for a 401
+        if self._token_refresh_due():
+            self.request_stats["proactive_token_refreshes"] += 1
+            self._refresh_token_once(self.access_token)
+        
+        attempt = 0
+        refreshed = False
         try:
-            # Make the request
-            if method == "GET":
-                response = requests.get(url, headers=self.headers)
-            elif method == "POST":
-                response = requests.post(url, headers=self.headers, json=data)
-            elif method == "DELETE":
-                response = requests.delete(url, headers=self.headers)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-            
-            # Check if the request was unauthorized (401)
-            if response.status_code == 401:
-                logger.info("Access token expired. Attempting to refresh...")
+            while True:
+                self._record_throttle(self.rate_limiter.acquire())
                 
-                # Try to refresh the access token
-                if self._refresh_access_token():
-                    # Retry the request with the new token
-                    if method == "GET":
-                        response = requests.get(url, headers=self.headers)
-                    elif method == "POST":
-                        response = requests.post(url, headers=self.headers, json=data)
-                    elif method == "DELETE":
-                        response = requests.delete(url, headers=self.headers)
+                try:
+                    # Make the request over the pooled session
+                    self.request_stats["requests"] += 1
+                    sent_token = self.access_token
+                    started = time.perf_counter()
+                    response = self.session.request(method, url, headers=self.headers, json=data)
+                    record_http(method, endpoint, response.status_code, time.perf_counter() - started,
+                                len(response.request.body or b""), len(response.content))
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    record_http(method, endpoint, "error", time.perf_counter() - started)
+                    # Failing to connect means the server never saw the request
+                    request_sent = not isinstance(e, requests.exceptions.ConnectTimeout)
+                    if not self.retry_policy.should_retry(method, attempt, request_sent=request_sent):
+                        raise
+                    delay = self.retry_policy.backoff(attempt)
+                    self._record_retry(method, endpoint, e, delay)
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                
+                # Check if the request was unauthorized (401)
+                if response.status_code == 401 and not refreshed:
+                    logger.info("Access token expired. Attempting to refresh...")
+                    refreshed = True
+                    
+                    # Try to refresh the access token, then retry the request with the new token
+                    if self._refresh_token_once(sent_token):
+                        continue
+                
+                if response.status_code == 429:
+                    self.request_stats["rate_limited_responses"] += 1
+                if self.retry_policy.should_retry(method, attempt, status=response.status_code):
+                    delay = self.retry_policy.backoff(attempt, response.headers.get("Retry-After"))
+                    if delay is not None:
+                        self._record_retry(method, endpoint, f"HTTP {response.status_code}", delay)
+                        time.sleep(delay)
+                        attempt += 1
+                        continue
+                break
             
             # Raise an exception for 4xx/5xx status codes
             response.raise_for_status()
             
-            # Return empty dict for 204 No Content
-            if response.status_code == 204:
+            # Return empty dict for 204 No Content or an empty body
+            if response.status_code == 204 or not response.content:
                 return {}
             
             return response.json()
@@ -193,27 +524,13 @@ class TickTickClient:
     
     def create_project(self, name: str, color: str = "#F18181", view_mode: str = "list", kind: str = "TASK") -> Dict:
         """Creates a new project."""
-        data = {
-            "name": name,
-            "color": color,
-            "viewMode": view_mode,
-            "kind": kind
-        }
+        data = self._project_data(name, color, view_mode, kind)
         return self._make_request("POST", "/project", data)
     
-    def update_project(self, project_id: str, name: str = None, color: str = None, 
+    def update_project(self, project_id: str, name: str = None, color: str = None,
                        view_mode: str = None, kind: str = None) -> Dict:
         """Updates an existing project."""
-        data = {}
-        if name:
-            data["name"] = name
-        if color:
-            data["color"] = color
-        if view_mode:
-            data["viewMode"] = view_mode
-        if kind:
-            data["kind"] = kind
-            
+        data = self._project_data(name, color, view_mode, kind)
         return self._make_request("POST", f"/project/{project_id}", data)
     
     def delete_project(self, project_id: str) -> Dict:
@@ -225,48 +542,20 @@ class TickTickClient:
         """Gets a specific task by project ID and task ID."""
         return self._make_request("GET", f"/project/{project_id}/task/{task_id}")
     
-    def create_task(self, title: str, project_id: str, content: str = None, 
-                   start_date: str = None, due_date: str = None, 
+    def create_task(self, title: str, project_id: str, content: str = None,
+                   start_date: str = None, due_date: str = None,
                    priority: int = 0, is_all_day: bool = False) -> Dict:
         """Creates a new task."""
-        data = {
-            "title": title,
-            "projectId": project_id
-        }
-        
-        if content:
-            data["content"] = content
-        if start_date:
-            data["startDate"] = start_date
-        if due_date:
-            data["dueDate"] = due_date
-        if priority is not None:
-            data["priority"] = priority
-        if is_all_day is not None:
-            data["isAllDay"] = is_all_day
-            
+        data = self._create_task_data(title, project_id, content, start_date,
+                                      due_date, priority, is_all_day)
         return self._make_request("POST", "/task", data)
     
-    def update_task(self, task_id: str, project_id: str, title: str = None, 
-                   content: str = None, priority: int = None, 
+    def update_task(self, task_id: str, project_id: str, title: str = None,
+                   content: str = None, priority: int = None,
                    start_date: str = None, due_date: str = None) -> Dict:
         """Updates an existing task."""
-        data = {
-            "id": task_id,
-            "projectId": project_id
-        }
-        
-        if title:
-            data["title"] = title
-        if content:
-            data["content"] = content
-        if priority is not None:
-            data["priority"] = priority
-        if start_date:
-            data["startDate"] = start_date
-        if due_date:
-            data["dueDate"] = due_date
-            
+        data = self._update_task_data(task_id, project_id, title, content,
+                                      priority, start_date, due_date)
         return self._make_request("POST", f"/task/{task_id}", data)
     
     def complete_task(self, project_id: str, task_id: str) -> Dict:
@@ -275,4 +564,4 @@ class TickTickClient:
     
     def delete_task(self, project_id: str, task_id: str) -> Dict:
         """Deletes a task."""
-        return self._make_request("DELETE", f"/project/{project_id}/task/{task_id}")
\ No newline at end of file
+        return self._make_request("DELETE", f"/project/{project_id}/task/{task_id}")
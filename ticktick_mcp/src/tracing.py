@@ -0,0 +1,267 @@
+"""
+Span-style tracing from MCP tool calls down to individual HTTP requests.
+
+A span records the name, start and end time, attributes and outcome of one
+step (a tool call, a cache lookup, a token refresh, an HTTP attempt, ...).
+Spans opened while another span is active become its children, following the
+asyncio task context, so every span of a tool call shares one trace ID.
+
+Finished spans are handed to the configured exporters: a log (a JSON line per
+span, to a file or the logger), an in-memory ring of recent spans, or OTLP
+JSON lines that OpenTelemetry tooling can import. Without exporters, span()
+returns a shared no-op context and tracing costs next to nothing.
+"""
+
+import os
+import json
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Dict, List, Any, Optional, Iterable
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Supported exporters
+EXPORTERS = ("log", "memory", "otlp")
+
+# Default number of spans kept by the memory exporter
+DEFAULT_BUFFER_SIZE = 1000
+
+# Default file written by the OTLP exporter
+DEFAULT_OTLP_FILE = "ticktick-traces.jsonl"
+
+class Span:
+    """One traced step, with its timings and attributes."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+                 "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str],
+                 attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set(self, **attributes: Any) -> None:
+        """Add or update attributes."""
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+class _NoopSpan:
+    """Stands in for a span when tracing is off."""
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+_NOOP = nullcontext(_NoopSpan())
+
+class LogExporter:
+    """Writes each finished span as a JSON line to a file, or to the logger."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8") if path else None
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        if self._file:
+            self._file.write(line + "\n")
+        else:
+            logger.info(f"span {line}")
+
+    def close(self) -> None:
+        if self._file:
+            self._file.close()
+
+class MemoryExporter:
+    """Keeps the most recent finished spans in a ring buffer."""
+
+    def __init__(self, maxlen: int = DEFAULT_BUFFER_SIZE):
+        self.spans: deque = deque(maxlen=maxlen)
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def get_traces(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get the most recent spans, newest last."""
+        spans = list(self.spans)
+        if limit:
+            spans = spans[-limit:]
+        return [span.to_dict() for span in spans]
+
+    def close(self) -> None:
+        pass
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+class OTLPJsonExporter:
+    """
+    Writes each finished span as an OTLP/JSON ExportTraceServiceRequest line,
+    the format of the OpenTelemetry collector's file exporter and receiver.
+    """
+
+    def __init__(self, path: str = DEFAULT_OTLP_FILE, service_name: str = "ticktick-mcp"):
+        self.path = path
+        self.service_name = service_name
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, span: Span) -> None:
+        otlp_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            # SPAN_KIND_CLIENT for outgoing requests, SPAN_KIND_INTERNAL otherwise
+            "kind": 3 if span.name.startswith("http") else 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)}
+                           for key, value in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1}
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        request = {"resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": self.service_name}}
+            ]},
+            "scopeSpans": [{"scope": {"name": "ticktick_mcp"}, "spans": [otlp_span]}]
+        }]}
+        self._file.write(json.dumps(request, separators=(",", ":")) + "\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+# Configured exporters and the span active in the current context
+_exporters: List[Any] = []
+_current: ContextVar = ContextVar("ticktick_span", default=None)
+
+def span(name: str, **attributes: Any):
+    """
+    Trace a block as a child of the active span (or as a new trace).
+
+    Usage:
+        with span("cache.lookup", endpoint="get_task") as current:
+            ...
+            current.set(hit=True)
+
+    Exceptions escaping the block mark the span as failed and are re-raised.
+    """
+    if not _exporters:
+        return _NOOP
+    return _record(name, attributes)
+
+@contextmanager
+def _record(name: str, attributes: Dict[str, Any]):
+    parent = _current.get()
+    current = Span(name, parent.trace_id if parent else os.urandom(16).hex(),
+                   parent.span_id if parent else None, attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = repr(e)
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current.reset(token)
+        for exporter in _exporters:
+            try:
+                exporter.export(current)
+            except Exception as e:
+                logger.warning(f"Span export failed: {e}")
+
+def exporter_path(path: str, name: str) -> str:
+    """Insert an exporter name before a file's extension (traces.jsonl -> traces.otlp.jsonl)."""
+    root, extension = os.path.splitext(path)
+    return f"{root}.{name}{extension}"
+
+def configure_tracing(exporters: Iterable[str], path: Optional[str] = None,
+                      buffer_size: int = DEFAULT_BUFFER_SIZE) -> None:
+    """
+    Replace the active exporters.
+
+    Args:
+        exporters: Exporter names from EXPORTERS (empty turns tracing off)
+        path: File for the log exporter (default: the logger) and the OTLP
+            exporter (default: ticktick-traces.jsonl). When both write to it,
+            each gets its own file named by exporter_path
+        buffer_size: Number of spans kept by the memory exporter
+
+    Raises:
+        ValueError: If an exporter name is unknown
+    """
+    names = [name for name in exporters if name]
+    unknown = [name for name in names if name not in EXPORTERS]
+    if unknown:
+        raise ValueError(f"Unknown trace exporter: {', '.join(unknown)}. "
+                         f"Must be one of: {', '.join(EXPORTERS)}.")
+
+    shutdown_tracing()
+    # The log and OTLP formats can't share a file
+    shared = bool(path) and "log" in names and "otlp" in names
+    for name in names:
+        if name == "log":
+            _exporters.append(LogExporter(exporter_path(path, name) if shared else path))
+        elif name == "memory":
+            _exporters.append(MemoryExporter(buffer_size))
+        else:
+            _exporters.append(OTLPJsonExporter(exporter_path(path, name) if shared else
+                                               path or DEFAULT_OTLP_FILE))
+        if shared and name != "memory":
+            logger.info(f"Writing {name} trace spans to {exporter_path(path, name)}")
+    if names:
+        logger.info(f"Tracing enabled with exporters: {', '.join(names)}")
+
+def tracing_from_env() -> None:
+    """Configure tracing from TICKTICK_TRACE, TICKTICK_TRACE_FILE and TICKTICK_TRACE_BUFFER."""
+    exporters = [name.strip() for name in os.getenv("TICKTICK_TRACE", "").split(",") if name.strip()]
+    if exporters:
+        configure_tracing(exporters, os.getenv("TICKTICK_TRACE_FILE"),
+                          int(os.getenv("TICKTICK_TRACE_BUFFER", DEFAULT_BUFFER_SIZE)))
+
+def tracing_enabled() -> bool:
+    """Whether any exporter is configured."""
+    return bool(_exporters)
+
+def get_recent_traces(limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+    """Get the spans kept by the memory exporter, or None if it is not configured."""
+    for exporter in _exporters:
+        if isinstance(exporter, MemoryExporter):
+            return exporter.get_traces(limit)
+    return None
+
+def shutdown_tracing() -> None:
+    """Close and remove every exporter."""
+    while _exporters:
+        _exporters.pop().close()
@@ -0,0 +1,376 @@
+"""
+Fuzzy full-text index over tasks, for finding tasks without knowing their IDs.
+
+Each task's title, content, description and checklist item titles are split
+into words, and every word into trigrams (padded like PostgreSQL's pg_trgm, so
+word starts and ends count). An inverted index maps each trigram to the tasks
+containing it. A query scores the tasks sharing its trigrams by the fraction
+of the query's trigrams they contain, with matches in the title weighted up,
+which tolerates typos and partial words.
+
+Posting lists are compact arrays of document numbers. Trigrams found in many
+tasks also keep a bitset, and a query adds up its trigrams' bitsets with
+bit-sliced counters, so the per-task counting happens in a few big-integer
+operations instead of a Python loop over every posting.
+
+Updating a task retires its old document number and indexes the new text
+under a fresh one; retired numbers are dropped, and the rest renumbered, once
+they outnumber the live ones. Tasks whose text did not change are left alone,
+so refreshing the index from the API only re-indexes what changed.
+"""
+
+import re
+import time
+import heapq
+import unicodedata
+from array import array
+from collections import defaultdict
+from functools import lru_cache, partial
+from typing import Dict, List, Any, Optional, Tuple, Iterable, Set
+
+# Default number of seconds the index is trusted before it is refreshed from the API
+DEFAULT_TEXT_INDEX_MAX_AGE = 60.0
+
+# Default minimum fraction of the query's trigrams a task must contain
+DEFAULT_MIN_SIMILARITY = 0.4
+
+# Compact posting lists once this many documents are retired and they outnumber the live ones
+COMPACT_MIN_RETIRED = 1000
+
+# Keep a bitset for trigrams in at least 1/BITSET_RATIO of the documents, where it is no larger than the array
+BITSET_RATIO = 32
+
+_WORD = re.compile(r"\w+")
+
+def normalize(text: str) -> str:
+    """Case-fold text and strip accents."""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+@lru_cache(maxsize=65536)
+def _word_trigrams(word: str) -> Tuple[str, ...]:
+    padded = f"  {word} "
+    return tuple(padded[i:i + 3] for i in range(len(padded) - 2))
+
+def trigrams(text: str) -> Set[str]:
+    """The distinct trigrams of the words in text."""
+    result = set()
+    for word in _WORD.findall(normalize(text)):
+        result.update(_word_trigrams(word))
+    return result
+
+def _set_bit(bits: bytearray, position: int) -> None:
+    index = position >> 3
+    if index >= len(bits):
+        bits.extend(bytes(index + 1 - len(bits)))
+    bits[index] |= 1 << (position & 7)
+
+def _clear_bit(bits: bytearray, position: int) -> None:
+    index = position >> 3
+    if index < len(bits):
+        bits[index] &= ~(1 << (position & 7)) & 0xFF
+
+def _add_bits(planes: List[int], bits: int) -> None:
+    """Add a bitset to bit-sliced counters, where planes[j] holds bit j of every count."""
+    for j, plane in enumerate(planes):
+        planes[j] = plane ^ bits
+        bits &= plane
+        if not bits:
+            return
+    planes.append(bits)
+
+def _count_at_least(planes: List[int], minimum: int, within: int) -> int:
+    """The positions in within whose bit-sliced count is at least minimum."""
+    if minimum <= 0:
+        return within
+    if minimum >> len(planes):
+        return 0
+    greater, equal = 0, within
+    for j in range(len(planes) - 1, -1, -1):
+        if minimum >> j & 1:
+            equal &= planes[j]
+        else:
+            greater |= equal & planes[j]
+            equal &= ~planes[j]
+    return greater | equal
+
+def _count_equal(planes: List[int], value: int, within: int) -> int:
+    """The positions in within whose bit-sliced count is exactly value."""
+    if value >> len(planes):
+        return 0
+    for j, plane in enumerate(planes):
+        within = within & plane if value >> j & 1 else within & ~plane
+    return within
+
+def _count_of(planes: List[int], position: int) -> int:
+    return sum(1 << j for j, plane in enumerate(planes) if plane >> position & 1)
+
+def _positions(bits: int) -> List[int]:
+    """The set positions of a bitset, in increasing order."""
+    positions = []
+    for index, byte in enumerate(bits.to_bytes((bits.bit_length() + 7) // 8, "little")):
+        if byte:
+            base = index << 3
+            positions.extend(base + bit for bit in range(8) if byte >> bit & 1)
+    return positions
+
+def task_texts(task: Dict) -> Tuple[str, str]:
+    """The title of a task and the rest of its searchable text."""
+    body = [task.get('content') or '', task.get('desc') or '']
+    body.extend(item.get('title') or '' for item in task.get('items') or [])
+    return task.get('title') or '', "\n".join(body)
+
+class TrigramIndex:
+    """
+    Inverted trigram index over task titles, content, descriptions and checklist items.
+    """
+
+    def __init__(self, max_age: float = DEFAULT_TEXT_INDEX_MAX_AGE):
+        """
+        Args:
+            max_age: Seconds after a refresh before is_fresh() asks for another
+        """
+        self.max_age = max_age
+        # Trigram -> document numbers containing it anywhere, and in the title
+        self._postings: Dict[str, array] = defaultdict(partial(array, "I"))
+        self._title_postings: Dict[str, array] = defaultdict(partial(array, "I"))
+        # Bitsets of the same, for the frequent trigrams a query has used
+        self._bitsets: Dict[str, bytearray] = {}
+        self._title_bitsets: Dict[str, bytearray] = {}
+        # Document number -> (task ID, project ID, title, text fingerprint), None once retired
+        self._docs: List[Optional[Tuple[str, str, str, int]]] = []
+        self._live = bytearray()
+        self._doc_of: Dict[str, int] = {}
+        self._project_tasks: Dict[str, Set[str]] = {}
+        self._retired = 0
+        self.built_at: Optional[float] = None
+        self.stats = {"builds": 0, "upserts": 0, "removals": 0, "queries": 0, "compactions": 0}
+
+    def __len__(self) -> int:
+        return len(self._doc_of)
+
+    def is_fresh(self) -> bool:
+        """Whether the index was refreshed from the API within max_age seconds."""
+        return self.built_at is not None and time.monotonic() - self.built_at < self.max_age
+
+    def invalidate(self) -> None:
+        """Ask for a refresh on next use."""
+        self.built_at = None
+
+    def build(self, project_tasks: Iterable[Tuple[str, List[Dict]]]) -> None:
+        """
+        Bring the given projects' tasks up to date, and mark the index fresh.
+
+        Tasks whose text and project are unchanged are not re-indexed, and
+        tasks no longer listed are removed. Projects not listed keep their
+        tasks (e.g. projects that failed to load).
+
+        Args:
+            project_tasks: (project ID, undone tasks of the project) pairs
+        """
+        for project_id, tasks in project_tasks:
+            listed = set()
+            for task in tasks:
+                if task.get('id'):
+                    listed.add(task['id'])
+                    self._index(task, project_id)
+            for task_id in self._project_tasks.get(project_id, set()) - listed:
+                self._retire(task_id)
+        self.stats["builds"] += 1
+        self.built_at = time.monotonic()
+        self._maybe_compact()
+        # Have the bitsets of frequent trigrams ready before the first query
+        for postings, bitsets in ((self._postings, self._bitsets), (self._title_postings, self._title_bitsets)):
+            for trigram, docs in postings.items():
+                if trigram not in bitsets and len(docs) * BITSET_RATIO >= len(self._docs):
+                    self._bits(postings, bitsets, trigram)
+
+    def retain_projects(self, project_ids: Iterable[str]) -> None:
+        """Remove the tasks of every project not in project_ids."""
+        keep = set(project_ids)
+        for project_id in [project_id for project_id in self._project_tasks if project_id not in keep]:
+            self.remove_project(project_id)
+
+    def upsert(self, task: Dict, project_id: Optional[str] = None) -> None:
+        """Index a new task, or re-index a task whose text or project changed (completed tasks are removed)."""
+        if not task.get('id'):
+            return
+        if task.get('status') == 2:
+            self.remove(task['id'])
+            return
+        self._index(task, project_id or task.get('projectId'))
+        self.stats["upserts"] += 1
+        self._maybe_compact()
+
+    def remove(self, task_id: str) -> None:
+        """Remove a task, if it is indexed."""
+        if self._retire(task_id):
+            self.stats["removals"] += 1
+            self._maybe_compact()
+
+    def remove_project(self, project_id: str) -> None:
+        """Remove every task of a project."""
+        for task_id in list(self._project_tasks.pop(project_id, ())):
+            self.remove(task_id)
+
+    def _index(self, task: Dict, project_id: str) -> None:
+        title, body = task_texts(task)
+        fingerprint = hash((title, body))
+        doc = self._doc_of.get(task['id'])
+        if doc is not None:
+            _, indexed_project, _, indexed_fingerprint = self._docs[doc]
+            if indexed_project == project_id and indexed_fingerprint == fingerprint:
+                return
+            self._retire(task['id'])
+
+        doc = len(self._docs)
+        self._docs.append((task['id'], project_id, title, fingerprint))
+        _set_bit(self._live, doc)
+        self._doc_of[task['id']] = doc
+        self._project_tasks.setdefault(project_id, set()).add(task['id'])
+
+        title_trigrams = trigrams(title)
+        self._post(self._postings, self._bitsets, title_trigrams | trigrams(body), doc)
+        self._post(self._title_postings, self._title_bitsets, title_trigrams, doc)
+
+    @staticmethod
+    def _post(postings: Dict[str, array], bitsets: Dict[str, bytearray], keys: Set[str], doc: int) -> None:
+        for trigram in keys:
+            postings[trigram].append(doc)
+        if bitsets:
+            for trigram in keys & bitsets.keys():
+                _set_bit(bitsets[trigram], doc)
+
+    def _retire(self, task_id: str) -> bool:
+        doc = self._doc_of.pop(task_id, None)
+        if doc is None:
+            return False
+        project_id = self._docs[doc][1]
+        self._docs[doc] = None
+        _clear_bit(self._live, doc)
+        self._retired += 1
+        self._project_tasks.get(project_id, set()).discard(task_id)
+        return True
+
+    def _maybe_compact(self) -> None:
+        if self._retired >= COMPACT_MIN_RETIRED and self._retired > len(self._doc_of):
+            self.compact()
+
+    def compact(self) -> None:
+        """Drop retired documents from the posting lists and renumber the rest."""
+        renumbered = {}
+        docs = []
+        for doc, indexed in enumerate(self._docs):
+            if indexed is not None:
+                renumbered[doc] = len(docs)
+                docs.append(indexed)
+        for postings in (self._postings, self._title_postings):
+            for trigram in list(postings):
+                live = array("I", (renumbered[doc] for doc in postings[trigram] if doc in renumbered))
+                if live:
+                    postings[trigram] = live
+                else:
+                    del postings[trigram]
+
+        self._docs = docs
+        self._doc_of = {indexed[0]: doc for doc, indexed in enumerate(docs)}
+        self._live = bytearray(b"\xff" * (len(docs) >> 3))
+        if len(docs) & 7:
+            self._live.append((1 << (len(docs) & 7)) - 1)
+        self._bitsets.clear()
+        self._title_bitsets.clear()
+        self._retired = 0
+        self.stats["compactions"] += 1
+
+    def _bits(self, postings: Dict[str, array], bitsets: Dict[str, bytearray], trigram: str) -> int:
+        """The documents containing a trigram, as a bitset."""
+        bits = bitsets.get(trigram)
+        if bits is None:
+            bits = bytearray((len(self._docs) + 7) >> 3)
+            for doc in postings.get(trigram, ()):
+                bits[doc >> 3] |= 1 << (doc & 7)
+            # Frequent trigrams keep their bitset, which later updates maintain
+            if len(postings.get(trigram, ())) * BITSET_RATIO >= len(self._docs):
+                bitsets[trigram] = bits
+        return int.from_bytes(bits, "little")
+
+    def search(self, query: str, limit: int = 10, min_similarity: float = DEFAULT_MIN_SIMILARITY,
+               project_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Find the tasks best matching query.
+
+        A task's similarity is the fraction of the query's trigrams found in
+        any of its text; its score averages that with the fraction found in
+        its title, so title matches rank first. Equal scores go to the
+        shorter title.
+
+        Args:
+            query: Text to look for; typos and partial words are tolerated
+            limit: Maximum number of results (0 for all)
+            min_similarity: Minimum similarity, from 0 to 1
+            project_id: Only tasks in this project (optional)
+
+        Returns:
+            Matches with id, projectId, title, score and similarity, best first
+        """
+        self.stats["queries"] += 1
+        wanted = trigrams(query)
+        if not wanted or not self._doc_of:
+            return []
+
+        # Count each document's matching trigrams, then add its title matches for the score
+        hits: List[int] = []
+        for trigram in wanted:
+            _add_bits(hits, self._bits(self._postings, self._bitsets, trigram))
+        scores = list(hits)
+        for trigram in wanted:
+            _add_bits(scores, self._bits(self._title_postings, self._title_bitsets, trigram))
+
+        candidates = int.from_bytes(self._live, "little")
+        if project_id:
+            candidates &= self._project_bits(project_id)
+        candidates = _count_at_least(hits, max(1, -int(-min_similarity * len(wanted) // 1)), candidates)
+
+        # Walk the scores from the best down, until enough tasks are found
+        matches = []
+        for score in range(2 * len(wanted), 0, -1):
+            if not candidates or (limit and len(matches) >= limit):
+                break
+            tier = _count_equal(scores, score, candidates)
+            if not tier:
+                continue
+            candidates &= ~tier
+            ranked = ((len(self._docs[doc][2]), self._docs[doc][0], doc) for doc in _positions(tier))
+            ranked = heapq.nsmallest(limit - len(matches), ranked) if limit else sorted(ranked)
+            for _, _, doc in ranked:
+                task_id, task_project, title, _ = self._docs[doc]
+                matches.append({
+                    "id": task_id,
+                    "projectId": task_project,
+                    "title": title,
+                    "score": round(score / (2 * len(wanted)), 3),
+                    "similarity": round(_count_of(hits, doc) / len(wanted), 3)
+                })
+        return matches
+
+    def _project_bits(self, project_id: str) -> int:
+        bits = bytearray((len(self._docs) + 7) >> 3)
+        for task_id in self._project_tasks.get(project_id, ()):
+            doc = self._doc_of[task_id]
+            bits[doc >> 3] |= 1 << (doc & 7)
+        return int.from_bytes(bits, "little")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the number of indexed tasks and trigrams, its age and update counters."""
+        return {
+            "tasks": len(self._doc_of),
+            "trigrams": len(self._postings),
+            "postings": sum(len(postings) for postings in self._postings.values()),
+            "bitsets": len(self._bitsets) + len(self._title_bitsets),
+            "retired": self._retired,
+            "age_seconds": round(time.monotonic() - self.built_at, 1) if self.built_at is not None else None,
+            "max_age": self.max_age,
+            **self.stats
+        }
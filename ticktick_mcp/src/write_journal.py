@@ -0,0 +1,440 @@
+"""
+Write-behind queue for task updates, backed by a durable local journal.
+
+update_task calls are acknowledged as soon as they are written to a SQLite
+journal, then sent to the API in the background. Updates to the same task
+that arrive before its entry is sent are merged into that entry (later values
+win), so a burst of edits costs a single request. An entry is sent once it is
+older than the coalescing window; entries left in the journal by a crash or an
+unclean shutdown are sent again on the next start. Updates set fields, so
+sending one twice is harmless.
+
+Failures the API reports as the client's fault (4xx other than 408 and 429)
+are not retried. Other failures are retried with exponential backoff, up to a
+limit. An update that is given up on stays in the journal, marked failed, so
+it can be shown to the user. It is cleared once a later update of the task is
+sent or the task is deleted.
+"""
+
+import json
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Callable, Awaitable, Tuple, Iterable
+
+from .ratelimit import RETRY_STATUSES
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Default seconds an update waits for more updates to the same task before it is sent
+DEFAULT_WINDOW = 2.0
+
+# Default number of attempts before an update is given up on
+DEFAULT_MAX_ATTEMPTS = 5
+
+# Seconds before the first retry of a failed update, doubled for each further attempt
+RETRY_DELAY = 1.0
+
+# Number of failed updates listed in the stats
+FAILURES_SHOWN = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_updates (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL,
+    project_id TEXT NOT NULL,
+    fields TEXT NOT NULL,
+    updates INTEGER NOT NULL DEFAULT 1,
+    created_at REAL NOT NULL,
+    not_before REAL NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    failed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_pending_updates_task ON pending_updates (task_id);
+CREATE INDEX IF NOT EXISTS idx_pending_updates_project ON pending_updates (project_id);
+"""
+
+_COLUMNS = "seq, task_id, project_id, fields, updates, created_at, not_before, attempts"
+
+def _entry(row: Tuple) -> Dict[str, Any]:
+    seq, task_id, project_id, fields, updates, created_at, not_before, attempts = row
+    return {"seq": seq, "task_id": task_id, "project_id": project_id, "fields": json.loads(fields),
+            "updates": updates, "created_at": created_at, "not_before": not_before,
+            "attempts": attempts}
+
+def is_permanent(error: Dict[str, Any]) -> bool:
+    """Whether a failed request would fail the same way again: a 4xx status that is not 408 or 429."""
+    status = error.get('status_code')
+    return status is not None and 400 <= status < 500 and status != 408 and status not in RETRY_STATUSES
+
+class WriteJournal:
+    """
+    SQLite journal of task updates not yet sent to the API.
+
+    Entries being sent are claimed in memory; an entry is only merged into
+    while it is unclaimed, and a task's next entry is not handed out while an
+    earlier one is being sent, so updates reach the API in order.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (and create if needed) the journal database.
+
+        Args:
+            path: Path to the SQLite database file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # An acknowledged update must survive a crash
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(SCHEMA)
+        self._claimed: Dict[int, str] = {}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def append(self, task_id: str, project_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Record an update, merging it into the task's unsent entry for the same project if any.
+
+        Args:
+            task_id: Task to update
+            project_id: Project the task belongs to
+            fields: update_task keyword arguments to set
+
+        Returns:
+            The resulting entry, with every field pending for the task
+        """
+        with self._lock:
+            claimed = [seq for seq, claimed_task in self._claimed.items() if claimed_task == task_id]
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM pending_updates WHERE task_id = ? AND failed = 0 "
+                f"ORDER BY seq DESC LIMIT 1", (task_id,)).fetchone()
+            entry = _entry(row) if row else None
+            if entry and entry["seq"] not in claimed and entry["project_id"] == project_id:
+                entry["fields"].update(fields)
+                entry["updates"] += 1
+                self._conn.execute(
+                    "UPDATE pending_updates SET fields = ?, updates = ? WHERE seq = ?",
+                    (json.dumps(entry["fields"]), entry["updates"], entry["seq"]))
+                return entry
+
+            created_at = time.time()
+            cursor = self._conn.execute(
+                "INSERT INTO pending_updates (task_id, project_id, fields, created_at) VALUES (?, ?, ?, ?)",
+                (task_id, project_id, json.dumps(fields), created_at))
+            return {"seq": cursor.lastrowid, "task_id": task_id, "project_id": project_id,
+                    "fields": dict(fields), "updates": 1, "created_at": created_at,
+                    "not_before": 0, "attempts": 0}
+
+    def claim_due(self, created_before: float, now: float, task_id: Optional[str] = None,
+                  project_id: Optional[str] = None, exclude: Iterable[int] = ()) -> List[Dict[str, Any]]:
+        """
+        Claim the entries that may be sent now: each task's oldest unsent entry,
+        unless another entry of the task is being sent.
+
+        Args:
+            created_before: Only entries created before this time
+            now: Only entries whose retry delay has passed by this time
+            task_id: Only this task's entries (optional)
+            project_id: Only this project's entries (optional)
+            exclude: Entries not to claim
+
+        Returns:
+            The claimed entries, oldest first
+        """
+        query = f"SELECT {_COLUMNS} FROM pending_updates WHERE failed = 0"
+        params: List[Any] = []
+        if task_id:
+            query += " AND task_id = ?"
+            params.append(task_id)
+        if project_id:
+            query += " AND project_id = ?"
+            params.append(project_id)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY seq", params).fetchall()
+            busy = set(self._claimed.values())
+            entries = []
+            for row in rows:
+                entry = _entry(row)
+                # Entries that cannot go yet still hold back the task's later ones
+                if entry["task_id"] in busy or entry["seq"] in exclude \
+                        or entry["created_at"] >= created_before or entry["not_before"] > now:
+                    busy.add(entry["task_id"])
+                    continue
+                busy.add(entry["task_id"])
+                self._claimed[entry["seq"]] = entry["task_id"]
+                entries.append(entry)
+            return entries
+
+    def complete(self, seq: int) -> None:
+        """Remove a sent entry, and the task's earlier failed entries it supersedes."""
+        with self._lock:
+            task_id = self._claimed.pop(seq, None)
+            self._conn.execute("DELETE FROM pending_updates WHERE seq = ?", (seq,))
+            if task_id is not None:
+                self._conn.execute("DELETE FROM pending_updates WHERE task_id = ? AND failed = 1 AND seq < ?",
+                                   (task_id, seq))
+
+    def retry(self, seq: int, error: str, not_before: float, give_up: bool) -> None:
+        """Release a failed entry, to be sent again after not_before, or never if give_up."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pending_updates SET attempts = attempts + 1, last_error = ?, "
+                "not_before = ?, failed = ? WHERE seq = ?", (error, not_before, int(give_up), seq))
+            self._claimed.pop(seq, None)
+
+    def discard(self, task_id: Optional[str] = None, project_id: Optional[str] = None) -> int:
+        """
+        Drop the unsent and failed entries of a task or project, e.g. because it is being deleted.
+
+        Returns:
+            The number of entries dropped
+        """
+        query = "DELETE FROM pending_updates WHERE 1 = 1"
+        params: List[Any] = []
+        if task_id:
+            query += " AND task_id = ?"
+            params.append(task_id)
+        if project_id:
+            query += " AND project_id = ?"
+            params.append(project_id)
+        with self._lock:
+            if self._claimed:
+                query += f" AND seq NOT IN ({','.join('?' * len(self._claimed))})"
+                params.extend(self._claimed)
+            return self._conn.execute(query, params).rowcount
+
+    def next_due(self, window: float) -> Optional[float]:
+        """
+        The earliest time an entry becomes due, or None if there are none.
+
+        Only each task's oldest entry counts, and tasks with an entry being
+        sent are left out, as their later entries wait for it.
+        """
+        with self._lock:
+            busy = list(set(self._claimed.values()))
+            query = ("SELECT MIN(MAX(created_at + ?, not_before)) FROM pending_updates WHERE seq IN "
+                     "(SELECT MIN(seq) FROM pending_updates WHERE failed = 0 GROUP BY task_id)")
+            if busy:
+                query += f" AND task_id NOT IN ({','.join('?' * len(busy))})"
+            return self._conn.execute(query, [window] + busy).fetchone()[0]
+
+    def has_pending(self, task_id: Optional[str] = None, project_id: Optional[str] = None) -> bool:
+        """Whether updates of a task or project (or any, if neither is given) are waiting or being sent."""
+        query = "SELECT 1 FROM pending_updates WHERE failed = 0"
+        params = []
+        if task_id:
+            query += " AND task_id = ?"
+            params.append(task_id)
+        if project_id:
+            query += " AND project_id = ?"
+            params.append(project_id)
+        with self._lock:
+            return self._conn.execute(query + " LIMIT 1", params).fetchone() is not None
+
+    def failures(self, task_id: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get the updates that were given up on, newest first.
+
+        Args:
+            task_id: Only this task's failed updates (optional)
+            limit: Maximum number of updates to return (optional)
+
+        Returns:
+            Entries with the error of their last attempt
+        """
+        query = f"SELECT {_COLUMNS}, last_error FROM pending_updates WHERE failed = 1"
+        params: List[Any] = []
+        if task_id:
+            query += " AND task_id = ?"
+            params.append(task_id)
+        query += " ORDER BY seq DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [{**_entry(row[:-1]), "error": row[-1]} for row in rows]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the number of waiting, in-flight and failed entries."""
+        with self._lock:
+            pending, failed = self._conn.execute(
+                "SELECT COALESCE(SUM(failed = 0), 0), COALESCE(SUM(failed = 1), 0) FROM pending_updates").fetchone()
+            return {"pending": pending, "in_flight": len(self._claimed), "failed": failed}
+
+class WriteBehindQueue:
+    """
+    Journals task updates and sends them to the API in the background.
+    """
+
+    def __init__(self, path: str, send: Callable[..., Awaitable[Dict]],
+                 on_sent: Optional[Callable[[Dict], None]] = None,
+                 on_failed: Optional[Callable[[Dict], None]] = None,
+                 window: float = DEFAULT_WINDOW, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        """
+        Args:
+            path: Path to the journal database
+            send: Coroutine function called as send(task_id=..., project_id=..., **fields),
+                returning the updated task or an error dictionary
+            on_sent: Called with each task the API returns after an update
+            on_failed: Called with each entry given up on, with its "error"
+            window: Seconds an update waits for more updates to the same task
+            max_attempts: Attempts before an update is given up on
+        """
+        self.journal = WriteJournal(path)
+        self.send = send
+        self.on_sent = on_sent
+        self.on_failed = on_failed
+        self.window = window
+        self.max_attempts = max_attempts
+        # Journal sequence number -> (entry, future resolved once it is sent or released)
+        self._in_flight: Dict[int, Tuple[Dict[str, Any], asyncio.Future]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self.stats = {"queued": 0, "merged": 0, "sent": 0, "retries": 0, "given_up": 0,
+                      "rejected": 0, "discarded": 0, "recovered": 0}
+
+    def start(self) -> None:
+        """Start sending in the background, beginning with entries left by an earlier run."""
+        if self._flusher is not None:
+            return
+        recovered = self.journal.get_stats()["pending"]
+        if recovered:
+            self.stats["recovered"] = recovered
+            logger.info(f"Recovered {recovered} unsent task updates from {self.journal.path}")
+        self._wakeup = asyncio.Event()
+        self._flusher = asyncio.ensure_future(self._run())
+
+    async def close(self) -> None:
+        """Stop the background sender, send what is waiting and close the journal."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        try:
+            await self.flush()
+        finally:
+            self.journal.close()
+
+    def enqueue(self, task_id: str, project_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Journal an update and return without waiting for the API.
+
+        Returns:
+            The journal entry the update was recorded in, with every field
+            pending for the task and the number of updates merged into it
+        """
+        entry = self.journal.append(task_id, project_id, fields)
+        self.stats["queued"] += 1
+        if entry["updates"] > 1:
+            self.stats["merged"] += 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return entry
+
+    def has_pending(self, task_id: Optional[str] = None, project_id: Optional[str] = None) -> bool:
+        """Whether updates of a task or project are waiting or being sent."""
+        return self.journal.has_pending(task_id, project_id)
+
+    def failures(self, task_id: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get the updates that were given up on, newest first (see WriteJournal.failures)."""
+        return self.journal.failures(task_id, limit)
+
+    async def flush(self, task_id: Optional[str] = None, project_id: Optional[str] = None) -> None:
+        """
+        Send the waiting updates of a task or project (or all) now, and wait
+        for those already being sent. Each update is attempted once; failures
+        stay in the journal for the background sender.
+        """
+        attempted = set()
+        while True:
+            waiting = [future for entry, future in self._in_flight.values()
+                       if (not task_id or entry["task_id"] == task_id)
+                       and (not project_id or entry["project_id"] == project_id)]
+            if waiting:
+                await asyncio.gather(*waiting)
+            entries = self.journal.claim_due(float("inf"), float("inf"), task_id, project_id, attempted)
+            if not entries:
+                return
+            attempted.update(entry["seq"] for entry in entries)
+            await asyncio.gather(*(self._send(entry) for entry in entries))
+
+    async def discard(self, task_id: Optional[str] = None, project_id: Optional[str] = None) -> None:
+        """Drop the waiting and failed updates of a task or project, and wait for those already being sent."""
+        self.stats["discarded"] += self.journal.discard(task_id, project_id)
+        await self.flush(task_id, project_id)
+
+    async def _run(self) -> None:
+        while True:
+            now = time.time()
+            for entry in self.journal.claim_due(now - self.window, now):
+                asyncio.ensure_future(self._send(entry))
+            due = self.journal.next_due(self.window)
+            timeout = max(0.0, due - time.time()) if due is not None else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _send(self, entry: Dict[str, Any]) -> None:
+        seq = entry["seq"]
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[seq] = (entry, future)
+        try:
+            try:
+                task = await self.send(task_id=entry["task_id"], project_id=entry["project_id"],
+                                       **entry["fields"])
+            except Exception as e:
+                task = {"error": str(e)}
+
+            if 'error' in task:
+                attempts = entry["attempts"] + 1
+                permanent = is_permanent(task)
+                give_up = permanent or attempts >= self.max_attempts
+                self.journal.retry(seq, task['error'], time.time() + RETRY_DELAY * 2 ** (attempts - 1), give_up)
+                if give_up:
+                    self.stats["given_up"] += 1
+                    if permanent:
+                        self.stats["rejected"] += 1
+                        logger.error(f"Update of task {entry['task_id']} was rejected: {task['error']}")
+                    else:
+                        logger.error(f"Giving up on update of task {entry['task_id']} after {attempts} "
+                                     f"attempts: {task['error']}")
+                    if self.on_failed:
+                        self.on_failed({**entry, "attempts": attempts, "error": task['error']})
+                else:
+                    self.stats["retries"] += 1
+                    logger.warning(f"Update of task {entry['task_id']} failed, will retry: {task['error']}")
+                return
+
+            self.journal.complete(seq)
+            self.stats["sent"] += 1
+            if self.on_sent:
+                self.on_sent(task)
+        finally:
+            del self._in_flight[seq]
+            future.set_result(None)
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get journal sizes, queue counters and the most recent failed updates."""
+        return {**self.journal.get_stats(), "window": self.window, **self.stats,
+                "failures": [{"task_id": entry["task_id"], "project_id": entry["project_id"],
+                              "fields": entry["fields"], "attempts": entry["attempts"],
+                              "error": entry["error"]}
+                             for entry in self.journal.failures(limit=FAILURES_SHOWN)]}